@@ -0,0 +1,195 @@
+'''
+This module allows reading objects out of git repositories.
+Namely through long-lived ``git cat-file`` processes,
+so many objects can be read without launching a command for each of them.
+'''
+from collections import namedtuple
+from logging import getLogger
+from os import environ
+from subprocess import DEVNULL, PIPE, Popen
+from threading import Lock, Thread
+
+from git_sh_sync.util.disk import joined
+
+BATCH_MISSING = (b'missing', b'ambiguous')
+'''
+Answers of ``git cat-file`` if an object could not be found
+'''
+
+
+class GitObject(namedtuple('GitObject', (
+        'oid', 'kind', 'size', 'data'
+))):
+    '''
+    :arg oid: Complete object hash
+    :arg kind: Type of the object (e.g. ``blob``, ``tree`` or ``commit``)
+    :arg size: Size of the object in bytes
+    :arg data: Contents of the object as bytes,
+               ``None`` if contents were not requested
+    '''
+
+
+class CatFile:
+    '''
+    Wraps a long-lived ``git cat-file --batch`` process (or
+    ``--batch-check`` if only metadata is needed)
+    '''
+
+    def __init__(self, cwd, *, contents=True, env=None):
+        '''
+        Initialize a new coprocess. It is launched on first use.
+
+        :param cwd: Location of the repository
+        :param contents: Read contents of objects (``--batch``),
+                         otherwise only their metadata (``--batch-check``)
+        :param env: Environment variables to set (or override)
+        '''
+        self._log = getLogger(self.__class__.__name__)
+        self._lock = Lock()
+        self._proc = None
+
+        self.cwd = joined(cwd)
+        self.contents = contents
+        self.env = env
+
+    @property
+    def cmd(self):
+        '''
+        :returns: Commandline of the coprocess
+        :rtype: list
+        '''
+        return [
+            'git', 'cat-file',
+            '--batch' if self.contents else '--batch-check'
+        ]
+
+    @property
+    def running(self):
+        '''
+        :returns: ``True`` if the coprocess is alive, otherwise ``False``
+        '''
+        return self._proc is not None and self._proc.poll() is None
+
+    def open(self):
+        '''
+        Launches the coprocess, if not already running.
+
+        :returns: ``True`` if the coprocess is running, otherwise ``False``
+        '''
+        if self.running:
+            return True
+
+        self.close()
+        try:
+            self._proc = Popen(
+                self.cmd, stdin=PIPE, stdout=PIPE, stderr=DEVNULL,
+                cwd=self.cwd,
+                env=dict(environ, **self.env) if self.env else None
+            )
+        except(OSError, TypeError, ValueError) as exc:
+            self._log.error(
+                'could not launch cat-file in "%s": %s', self.cwd, exc
+            )
+            return False
+
+        self._log.debug('cat-file launched in "%s"', self.cwd)
+        return True
+
+    def close(self):
+        '''
+        Stops the coprocess (if running).
+        '''
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+
+        for pipe in (proc.stdin, proc.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+        proc.wait()
+
+    def __enter__(self):
+        '''
+        Launches the coprocess when entering a ``with`` block.
+        '''
+        self.open()
+        return self
+
+    def __exit__(self, *_):
+        '''
+        Stops the coprocess when leaving a ``with`` block.
+        '''
+        self.close()
+
+    def _read(self):
+        '''
+        Helper to read the answer to one request of the coprocess.
+
+        :returns: The object or ``None`` if it could not be found
+        :rtype: :class:`GitObject`
+        '''
+        header = self._proc.stdout.readline()
+        if not header:
+            raise EOFError('cat-file in "{}" stopped'.format(self.cwd))
+
+        head, _, tail = header.rstrip(b'\n').rpartition(b' ')
+        if tail in BATCH_MISSING:
+            return None
+
+        oid, _, kind = head.partition(b' ')
+        size = int(tail)
+        data = None
+        if self.contents:
+            data = self._proc.stdout.read(size)
+            self._proc.stdout.read(1)
+
+        return GitObject(
+            oid=oid.decode(), kind=kind.decode(), size=size, data=data
+        )
+
+    def __call__(self, *revs):
+        '''
+        Looks up objects, all through the same coprocess.
+
+        :param revs: Object names, e.g. ``HEAD``, ``master:README.rst``
+                     or some hash
+        :returns: Objects in the same order as *revs*, with ``None``
+                  for each object that could not be found (object names
+                  containing newlines are never found)
+        :rtype: list of :class:`GitObject`
+
+        All requests are sent at once, while answers are read back.
+        If the coprocess is not running, it gets launched.
+        '''
+        request = b''.join(
+            rev.encode() + b'\n' for rev in revs
+            if '\n' not in rev
+        )
+        with self._lock:
+            if not revs or not self.open():
+                return [None for _ in revs]
+
+            def feed():
+                '''Helper to send requests without blocking'''
+                try:
+                    self._proc.stdin.write(request)
+                    self._proc.stdin.flush()
+                except OSError:
+                    pass
+
+            feeder = Thread(target=feed)
+            feeder.start()
+            try:
+                result = [
+                    self._read() if '\n' not in rev else None
+                    for rev in revs
+                ]
+            except(EOFError, OSError, ValueError) as exc:
+                self._log.error('cat-file failed: %s', exc)
+                self.close()
+                feeder.join()
+                return [None for _ in revs]
+            feeder.join()
+            return result
@@ -0,0 +1,159 @@
+'''
+This module allows caching results of read-only queries.
+Namely keyed by a cheap fingerprint of the state of a repository.
+'''
+from logging import getLogger
+from os import path, stat, walk
+
+from git_sh_sync.util.disk import joined
+
+GIT_STATE_FILES = ('packed-refs', 'config')
+'''
+Files inside the common git folder, which are part of the :func:`fingerprint`
+'''
+GIT_WORKTREE_FILES = ('HEAD', 'index')
+'''
+Files inside the git folder of the worktree,
+which are part of the :func:`fingerprint`
+'''
+
+
+def git_folder(location):
+    '''
+    Locates the git folder of some repository.
+
+    :param location: Local path of the repository
+    :returns: Path of the git folder and of the common git folder
+              (these differ for additional worktrees)
+    :rtype: tuple
+
+    Follows ``.git`` files (``gitdir: ...``) as used by worktrees
+    and submodules.
+    '''
+    folder = joined(location, '.git')
+    if path.isfile(folder):
+        with open(folder, 'r', encoding='utf-8') as handle:
+            head, _, tail = handle.read().strip().partition(':')
+        if head == 'gitdir':
+            folder = path.normpath(path.join(location, tail.strip()))
+
+    common = folder
+    commondir = path.join(folder, 'commondir')
+    if path.isfile(commondir):
+        with open(commondir, 'r', encoding='utf-8') as handle:
+            common = path.normpath(path.join(folder, handle.read().strip()))
+
+    return folder, common
+
+
+def _stamp(location):
+    '''
+    Helper to describe a file or folder by its metadata.
+
+    :param location: Path to the file or folder
+    :returns: Inode, size and modification time or ``None`` if missing
+    :rtype: tuple
+    '''
+    try:
+        res = stat(location)
+    except OSError:
+        return None
+    return res.st_ino, res.st_size, res.st_mtime_ns
+
+
+def fingerprint(location):
+    '''
+    Builds a cheap fingerprint of the state of a repository.
+
+    :param location: Local path of the repository
+    :returns: Something that changes once refs, ``HEAD``, the index
+              or the config of the repository change
+    :rtype: tuple
+
+    Consists of the contents of ``HEAD`` and the metadata (inode, size and
+    modification time) of :const:`GIT_WORKTREE_FILES`,
+    :const:`GIT_STATE_FILES` and of all folders below ``refs``
+    (updating a loose ref renames a new file into its folder).
+    Only ``stat`` and one small ``read`` are needed - no command is launched.
+    Changes of the working tree are not part of the fingerprint, and
+    changes within the timestamp granularity of the file system may go
+    unnoticed - so caches should be cleared explicitly after changing
+    the repository.
+    '''
+    folder, common = git_folder(location)
+
+    head = None
+    try:
+        with open(path.join(folder, 'HEAD'), 'rb') as handle:
+            head = handle.read()
+    except OSError:
+        pass
+
+    stamps = tuple(
+        _stamp(path.join(folder, name)) for name in GIT_WORKTREE_FILES
+    ) + tuple(
+        _stamp(path.join(common, name)) for name in GIT_STATE_FILES
+    )
+    refs = tuple(
+        (root, _stamp(root))
+        for root, _, _ in walk(path.join(common, 'refs'))
+    )
+    return head, stamps, refs
+
+
+class ResultCache:
+    '''
+    Remembers results of read-only queries for as long as
+    the :func:`fingerprint` of a repository stays the same
+    '''
+
+    def __init__(self, location, *, enabled=True):
+        '''
+        Initialize a new cache
+
+        :param location: Local path of the repository
+        :param enabled: Use ``False`` to always run the queries
+        '''
+        self._log = getLogger(self.__class__.__name__)
+        self._print = None
+        self._data = {}
+
+        self.location = joined(location)
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        '''
+        Forgets all results. Has to be called after running
+        commands that change the repository.
+        '''
+        self._print = None
+        self._data.clear()
+
+    def __call__(self, key, query):
+        '''
+        Looks up a result.
+
+        :param key: Identifies the *query*, e.g. its commandline
+        :param query: Computes the result if it is not known yet
+        :returns: Output of *query* (which could be a cached one,
+                  so please do not modify)
+
+        All results are forgotten once the :func:`fingerprint` changes.
+        '''
+        if not self.enabled:
+            return query()
+
+        current = fingerprint(self.location)
+        if current != self._print:
+            self._data.clear()
+            self._print = current
+
+        if key in self._data:
+            self.hits += 1
+            return self._data[key]
+
+        self.misses += 1
+        result = self._data[key] = query()
+        return result
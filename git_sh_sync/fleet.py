@@ -0,0 +1,259 @@
+'''
+This module allows syncing many repositories at once.
+Namely in parallel, with limits on how many of them talk to the
+same remote host at the same time.
+'''
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from json import load
+from logging import getLogger
+from os import cpu_count, path
+from re import match
+from threading import BoundedSemaphore, Lock
+from time import monotonic
+from urllib.parse import urlsplit
+
+from git_sh_sync.proc import Command
+from git_sh_sync.repo import Repository
+from git_sh_sync.util.disk import joined
+
+FLEET_ACTIONS = ('scrub', 'cleanup', 'sync')
+'''
+What to do with each repository:
+
+* ``scrub`` commits all local changes (see :meth:`Repository.scrub
+  <git_sh_sync.repo.Repository.scrub>`), this needs no remote
+* ``cleanup`` additionally pulls (see :meth:`Repository.cleanup
+  <git_sh_sync.repo.Repository.cleanup>`)
+* ``sync`` additionally pushes (see :meth:`Repository.__call__
+  <git_sh_sync.repo.Repository.__call__>`)
+'''
+
+
+class FleetResult(namedtuple('FleetResult', (
+        'location', 'host', 'success', 'duration'
+))):
+    '''
+    :arg location: Local path of the repository
+    :arg host: Remote host the repository talked to
+               (``None`` for local remotes or if not known)
+    :arg success: ``True`` if the action went well, otherwise ``False``
+    :arg duration: Wall time in seconds spent on the repository
+                   (including waiting for its host to be available)
+    '''
+
+
+def remote_host(url):
+    '''
+    Finds out the host of a remote URL.
+
+    :param url: Remote URL, like ``https://host/repo.git``
+                or ``user@host:repo.git``
+    :returns: Name of the host, ``None`` for local paths
+    '''
+    if not url:
+        return None
+    if '://' in url:
+        parts = urlsplit(url)
+        return parts.hostname if parts.scheme != 'file' else None
+    found = match(r'^(?:[^@/]+@)?([^:/]+):(?!//)', url)
+    if found:
+        return found.group(1)
+    return None
+
+
+class RepositoryFleet:
+    '''
+    Runs one of the :const:`FLEET_ACTIONS` on a batch of repositories
+    in parallel, with a limit on how many are processed at the same time
+    in total and per remote host
+    '''
+
+    def __init__(
+            self, repos, *,
+            action='sync', workers=None, per_host=None, options=None
+    ):
+        '''
+        Initialize a new fleet
+
+        :param repos: Locations of the repositories, or dicts of arguments
+                      for :class:`Repository <git_sh_sync.repo.Repository>`
+                      (including the *location*)
+        :param action: One of :const:`FLEET_ACTIONS`
+        :param workers: Limit of repositories processed in parallel.
+                        If left blank the number of CPUs is used
+        :param per_host: Limit of repositories talking to the same
+                         remote host in parallel.
+                         Use ``None`` for no limit
+        :param options: Arguments for :class:`Repository
+                        <git_sh_sync.repo.Repository>` used for all
+                        *repos* (those of single *repos* win)
+        '''
+        if action not in FLEET_ACTIONS:
+            raise ValueError('unknown action "{}"'.format(action))
+
+        self._log = getLogger(self.__class__.__name__)
+        self._lock = Lock()
+        self._hosts = {}
+
+        self.entries = [
+            dict(options or {}, **(
+                repo if isinstance(repo, dict) else dict(location=repo)
+            ))
+            for repo in repos
+        ]
+        self.action = action
+        self.workers = max(1, workers or cpu_count() or 1)
+        self.per_host = per_host
+        self.results = []
+
+        self._log.debug(
+            'fleet initialized: %d repositories, %d workers',
+            len(self.entries), self.workers
+        )
+
+    @classmethod
+    def load(cls, manifest, **kwargs):
+        '''
+        Creates a fleet out of a manifest file.
+
+        :param manifest: Path of a json file. Contains either a list of
+                         *repos*, or an object with the *repos* and
+                         other arguments of :meth:`__init__`
+        :param kwargs: Passed into :meth:`__init__`,
+                       win over those inside the *manifest*
+        :returns: A new fleet
+        :rtype: :class:`RepositoryFleet`
+        '''
+        with open(joined(manifest), 'r', encoding='utf-8') as handle:
+            data = load(handle)
+        if isinstance(data, list):
+            data = dict(repos=data)
+        data.update(kwargs)
+        return cls(data.pop('repos'), **data)
+
+    @property
+    def launched(self):
+        '''
+        :returns: ``True`` if the fleet was launched, otherwise ``False``
+        '''
+        return bool(self.results)
+
+    @property
+    def success(self):
+        '''
+        :returns: ``True`` if the fleet was launched and all
+                  repositories were successful, otherwise ``False``
+        '''
+        return self.launched and all(res.success for res in self.results)
+
+    @property
+    def duration(self):
+        '''
+        :returns: Sum of the time spent on all repositories
+                  (not the wall time, as they run in parallel)
+        '''
+        return sum(res.duration for res in self.results)
+
+    def _slot(self, host):
+        '''
+        Helper to get the semaphore of a remote host.
+
+        :returns: The semaphore, ``None`` if there is no limit
+        '''
+        if host is None or self.per_host is None:
+            return None
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = BoundedSemaphore(self.per_host)
+            return self._hosts[host]
+
+    @staticmethod
+    def _remote_url(repo):
+        '''
+        Helper to look up the remote URL of an existing repository,
+        without preparing it (see *lazy* of :class:`Repository
+        <git_sh_sync.repo.Repository>`).
+
+        :returns: The URL, ``None`` if not known (yet)
+        '''
+        if not path.isdir(repo.location):
+            return None
+        cmd = Command([
+            'git', 'remote', 'get-url', '--push', repo.remote_name
+        ], cwd=repo.location)
+        return cmd.stdout if cmd() else None
+
+    def _process(self, entry):
+        '''
+        Helper to run the action on one repository
+        while keeping track of the time.
+
+        :param entry: Arguments for :class:`Repository
+                      <git_sh_sync.repo.Repository>`
+        :returns: Result of the repository
+        :rtype: :class:`FleetResult`
+
+        The repository is prepared (e.g. cloned) only once it got
+        the slot of its host. Whatever goes wrong is logged and
+        ends up as unsuccessful result, the other repositories
+        are not affected.
+        '''
+        start = monotonic()
+        host = None
+        success = False
+        try:
+            repo = Repository(**dict(entry, lazy=True))
+            if self.action != 'scrub':
+                host = remote_host(
+                    entry.get('remote_url') or self._remote_url(repo)
+                )
+            slot = self._slot(host)
+            if slot is not None:
+                slot.acquire()
+            try:
+                success = {
+                    'scrub': repo.scrub,
+                    'cleanup': repo.cleanup,
+                    'sync': repo,
+                }[self.action]()
+            finally:
+                if slot is not None:
+                    slot.release()
+        except (KeyError, OSError, TypeError, ValueError) as exc:
+            self._log.error(
+                'could not %s "%s": %s',
+                self.action, entry.get('location'), exc
+            )
+        except Exception:  # pylint: disable=broad-except
+            self._log.exception(
+                'failed to %s "%s"', self.action, entry.get('location')
+            )
+
+        return FleetResult(
+            location=entry.get('location'), host=host,
+            success=bool(success), duration=monotonic() - start
+        )
+
+    def __call__(self):
+        '''
+        Processes all repositories of the fleet.
+
+        :returns: Output of :attr:`success`
+
+        The :attr:`results` are available in the same order
+        as the repositories were passed in.
+        A previously :attr:`launched` fleet will not run again,
+        returning always ``False``.
+        '''
+        if self.launched or not self.entries:
+            return False
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            self.results = list(executor.map(self._process, self.entries))
+
+        self._log.info(
+            'fleet finished: %d of %d repositories successful',
+            sum(res.success for res in self.results), len(self.results)
+        )
+        return self.success
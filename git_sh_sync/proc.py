@@ -3,13 +3,35 @@ This module handles communication with the operating system.
 Namely launching commands.
 '''
 
+from asyncio import TimeoutError as AsyncTimeoutError
+from asyncio import create_subprocess_exec, wait_for
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from locale import getpreferredencoding
 from logging import getLogger
+from mmap import ACCESS_READ, mmap
+from os import (
+    WEXITSTATUS, WIFSIGNALED, WTERMSIG, close, cpu_count, environ, fstat, kill,
+    killpg, path, pipe, read, wait4, write
+)
 from pprint import pformat
+from select import PIPE_BUF
+from selectors import EVENT_READ, EVENT_WRITE, DefaultSelector
 from shlex import quote, split
+from shutil import which
+from signal import SIGKILL
 from subprocess import PIPE, Popen
+from tempfile import TemporaryFile
+from threading import Thread, Timer
+from time import monotonic, time
 
 from git_sh_sync.util.disk import joined
 
+try:
+    from os import POSIX_SPAWN_DUP2, posix_spawnp
+except ImportError:
+    POSIX_SPAWN_DUP2, posix_spawnp = None, None
+
 CODE_SUCCESS = 0
 '''
 Returncode of a successful command
@@ -18,6 +40,52 @@ CHAR_NEWLINE = '\n'
 '''
 Newline character used for detailed log output
 '''
+CHAR_NUL = '\0'
+'''
+NUL character, used to separate records (e.g. ``git log -z``)
+'''
+CHUNK_SIZE = 65536
+'''
+Maximum number of bytes read at once while streaming output
+'''
+LAUNCHER_POPEN = 'popen'
+'''
+Launch commands using :py:class:`subprocess.Popen`
+'''
+LAUNCHER_SPAWN = 'spawn'
+'''
+Launch commands using :py:func:`os.posix_spawnp`
+(only available since python 3.8)
+'''
+SPAWN_CHDIR = ('/bin/sh', '-c', 'cd -- "$0" && exec "$@"')
+'''
+:py:func:`os.posix_spawnp` can not change the working directory,
+so commands with *cwd* are wrapped into this
+'''
+
+
+class CommandUsage(namedtuple('CommandUsage', (
+        'utime', 'stime', 'maxrss'
+))):
+    '''
+    :arg utime: User CPU time of the command in seconds
+    :arg stime: System CPU time of the command in seconds
+    :arg maxrss: Maximum resident set size of the command,
+                 as reported by :py:func:`os.wait4`
+                 (kilobytes on Linux, bytes on macOS)
+    '''
+
+
+class CommandRaw(namedtuple('CommandRaw', (
+        'cin', 'stdout', 'stderr'
+))):
+    '''
+    :arg cin: Input sent to the command as bytes (or ``None``)
+    :arg stdout: Output of stdout exactly as captured - bytes,
+                 or a :py:class:`mmap.mmap` if :attr:`spilled
+                 <Command.spilled>`
+    :arg stderr: Output of stderr exactly as captured
+    '''
 
 
 class Command:
@@ -25,13 +93,40 @@ class Command:
     This is a class-based command runner using :py:mod:`subprocess`
     '''
 
-    def __init__(self, cmd, *, cwd=None, cin=None):
+    recorders = []
+    '''
+    Callables which receive each :class:`Command` once it was launched
+    (see :class:`Recorder <git_sh_sync.replay.Recorder>`)
+    '''
+    replayer = None
+    '''
+    If set, commands are not launched, instead this callable returns
+    what they would have done
+    (see :class:`Replayer <git_sh_sync.replay.Replayer>`)
+    '''
+
+    def __init__(
+            self, cmd, *,
+            cwd=None, cin=None, env=None, binary=False, timeout=None,
+            spill=None, launcher=LAUNCHER_POPEN
+    ):
         '''
         Initialize a new command
 
         :param cmd: Commandline of command to launch
         :param cwd: Launch *cmd* inside some other current working directory
         :param cin: Send data via stdin into *cmd*
+        :param env: Environment variables to set (or override) for *cmd*
+        :param binary: Keep output as unmodified bytes, instead of
+                       stripped and decoded text
+        :param timeout: Seconds until *cmd* (and everything it launched)
+                        gets killed. Use ``None`` to wait forever
+        :param spill: Write stdout into a temporary file. If it grows
+                      beyond *spill* bytes, it is kept there and
+                      :py:mod:`memory-mapped <mmap>` - otherwise read back
+                      into memory. Use ``None`` to always use a pipe
+        :param launcher: How to launch *cmd* - either
+                         :const:`LAUNCHER_POPEN` or :const:`LAUNCHER_SPAWN`
         '''
         if isinstance(cmd, str):
             cmd = split(cmd)
@@ -39,13 +134,19 @@ class Command:
         if cwd is not None:
             cwd = joined(cwd)
 
+        empty = b'' if binary else ''
+
         self._log = getLogger(self.__class__.__name__)
+        self._cache = {}
+        self._clock = None
         self._data = dict(
-            cmd=cmd, cwd=cwd, cin=cin,
-            stdout='', stderr='', code=None, exc=None
+            cmd=cmd, cwd=cwd, cin=cin, env=env,
+            binary=binary, timeout=timeout, spill=spill, launcher=launcher,
+            stdout=empty, stderr=empty, code=None, exc=None, timed_out=False,
+            started=None, duration=None, usage=None
         )
 
-        self._log.debug('command initialized: %s', self.repr)
+        self._log.debug('command initialized: %s', _Lazy(lambda: self.repr))
 
     @property
     def cmd(self):
@@ -68,6 +169,67 @@ class Command:
         '''
         return self._data.get('cin', None)
 
+    @property
+    def env(self):
+        '''
+        :returns: Environment variables to set or ``None``
+        '''
+        return self._data.get('env', None)
+
+    @property
+    def environment(self):
+        '''
+        :returns: Complete environment for the command, or ``None``
+                  to inherit the environment of the current process
+        :rtype: dict
+        '''
+        if not self.env:
+            return None
+        return dict(environ, **self.env)
+
+    @property
+    def binary(self):
+        '''
+        :returns: ``True`` if output is kept as bytes, otherwise ``False``
+        '''
+        return self._data.get('binary', False)
+
+    @property
+    def timeout(self):
+        '''
+        :returns: Timeout in seconds or ``None``
+        '''
+        return self._data.get('timeout', None)
+
+    @property
+    def launcher(self):
+        '''
+        :returns: Name of the launcher used in :meth:`__call__`
+        '''
+        return self._data.get('launcher', LAUNCHER_POPEN)
+
+    @property
+    def spill(self):
+        '''
+        :returns: Size in bytes when stdout is kept on disk or ``None``
+        '''
+        return self._data.get('spill', None)
+
+    @property
+    def spilled(self):
+        '''
+        :returns: ``True`` if stdout was kept on disk, otherwise ``False``
+        '''
+        return isinstance(self._data.get('stdout', None), mmap)
+
+    @property
+    def timed_out(self):
+        '''
+        :returns: ``True`` if the command was killed because it ran
+                  out of time, otherwise ``False``
+        '''
+        return self._data.get('timed_out', False)
+
     @property
     def exc(self):
         '''
@@ -89,18 +251,49 @@ class Command:
     @property
     def stdout(self):
         '''
-        :returns: Unmodified output of command stdout or empty string
+        :returns: Unmodified output of command stdout or empty string.
+                  Bytes (or a :py:class:`mmap.mmap` if :attr:`spilled`)
+                  if :attr:`binary` is set
         :rtype: str
+
+        Without :attr:`binary` all of the output is decoded into
+        memory, even if it was :attr:`spilled`.
+        Use :meth:`records` to walk through huge outputs.
         '''
-        return self._data.get('stdout', '')
+        return self._text('stdout')
 
     @property
     def stderr(self):
         '''
-        :returns: Unmodified output of command stderr or empty string
+        :returns: Unmodified output of command stderr or empty string.
+                  Bytes if :attr:`binary` is set
         :rtype: str
         '''
-        return self._data.get('stderr', '')
+        return self._text('stderr')
+
+    @property
+    def started(self):
+        '''
+        :returns: Timestamp (seconds since epoch) of the launch
+                  or ``None`` before launch
+        '''
+        return self._data.get('started', None)
+
+    @property
+    def duration(self):
+        '''
+        :returns: Wall-clock time in seconds the command took
+                  or ``None`` before launch
+        '''
+        return self._data.get('duration', None)
+
+    @property
+    def usage(self):
+        '''
+        :returns: Resource usage of the command or ``None`` if unknown
+        :rtype: :class:`CommandUsage`
+        '''
+        return self._data.get('usage', None)
 
     @property
     def command(self):
@@ -128,26 +321,209 @@ class Command:
             ``True`` if command launch was successful, otherwise ``False``
 
         A command is considered successful if no :attr:`exception <exc>`
-        was thrown and the :attr:`returncode <code>`
-        equals :const:`CODE_SUCCESS`
+        was thrown, it has not :attr:`timed out <timed_out>` and the
+        :attr:`returncode <code>` equals :const:`CODE_SUCCESS`
         '''
-        return self.exc is None and self.code == CODE_SUCCESS
+        return (
+            self.exc is None and not self.timed_out and
+            self.code == CODE_SUCCESS
+        )
 
     @property
     def out(self):
         '''
-        :returns: Splitted list output of :attr:`stdout`
+        :returns: Splitted list output of :attr:`stdout`.
+                  Computed once, please do not modify
         :rtype: list
+
+        :attr:`Spilled <spilled>` output in :attr:`binary` mode is
+        split through :meth:`records`. Without :attr:`binary` it is
+        decoded into memory first (see :attr:`stdout`).
         '''
-        return self.stdout.splitlines()
+        return self._cached('out', self.stdout, lambda src: (
+            list(self.records()) if isinstance(src, mmap)
+            else src.splitlines()
+        ))
 
     @property
     def err(self):
         '''
-        :returns: Splitted list output of :attr:`stderr`
+        :returns: Splitted list output of :attr:`stderr`.
+                  Computed once, please do not modify
         :rtype: list
         '''
-        return self.stderr.splitlines()
+        return self._cached('err', self.stderr, lambda src: src.splitlines())
+
+    def _cached(self, name, source, func):
+        '''
+        Helper to compute views of output only once.
+
+        :param name: Name of the view
+        :param source: Data the view is computed from
+        :param func: Computes the view out of *source*
+        :returns: Output of *func*, cached as long as *source* stays the same
+        '''
+        hit = self._cache.get(name)
+        if hit is not None and hit[0] is source:
+            return hit[1]
+
+        result = func(source)
+        self._cache[name] = (source, result)
+        return result
+
+    def _text(self, name):
+        '''
+        Helper to decode raw output on demand.
+
+        :param name: Either ``stdout`` or ``stderr``
+        :returns: Raw output if :attr:`binary` is set,
+                  otherwise stripped and :func:`decoded` output
+        '''
+        raw = self._data.get(name, '')
+        if self.binary or isinstance(raw, str):
+            return raw
+        return self._cached(name, raw, lambda src: decoded(src).strip())
+
+    def records(self, sep=CHAR_NEWLINE):
+        '''
+        Walks through the output of stdout, record by record.
+
+        :param sep: Separator between the records of stdout.
+                    Use :const:`CHAR_NUL` for ``-z`` style output
+        :returns: Generator of decoded records, without the *sep*.
+                  Records are bytes if :attr:`binary` is set
+
+        Works directly on the captured output, so if it was
+        :attr:`spilled` only one record at a time is read from disk.
+        Other than :attr:`stdout` the output is not stripped.
+        '''
+        raw = self._data.get('stdout', '')
+        if isinstance(raw, str):
+            raw = raw.encode(getpreferredencoding(False))
+
+        convert = (lambda rec: rec) if self.binary else decoded
+        separator = _separator(sep)
+        pos, end = 0, len(raw)
+        while pos < end:
+            found = raw.find(separator, pos)
+            if found < 0:
+                found = end
+            yield convert(raw[pos:found])
+            pos = found + len(separator)
+
+    @property
+    def raw(self):
+        '''
+        :returns: Input and output of the command, unmodified
+                  (e.g. for :class:`Recorder <git_sh_sync.replay.Recorder>`)
+        :rtype: :class:`CommandRaw`
+        '''
+        return CommandRaw(
+            cin=self._input,
+            stdout=self._data.get('stdout'),
+            stderr=self._data.get('stderr'),
+        )
+
+    @property
+    def _input(self):
+        '''
+        :returns: :attr:`cin` as bytes (or ``None``) to send into a pipe
+        '''
+        cin = self.cin
+        if isinstance(cin, str):
+            return cin.encode(getpreferredencoding(False))
+        return cin
+
+    def _sink(self):
+        '''
+        Helper to decide where stdout should be written into.
+
+        :returns: Some temporary file if :attr:`spill` is set,
+                  otherwise :py:data:`subprocess.PIPE`
+        '''
+        if self.spill is None:
+            return PIPE
+        return TemporaryFile()
+
+    def _drain(self, sink, stdout):
+        '''
+        Helper to read back stdout of a launch.
+
+        :param sink: Output of :meth:`_sink`
+        :param stdout: Output of stdout if *sink* was a pipe
+        :returns: Output of stdout as bytes or :py:class:`mmap.mmap`
+        '''
+        if sink is PIPE:
+            return stdout
+
+        with sink:
+            size = fstat(sink.fileno()).st_size
+            if size > self.spill:
+                return mmap(sink.fileno(), 0, access=ACCESS_READ)
+            sink.seek(0)
+            return sink.read()
+
+    def _collect(self, code, stdout, stderr):
+        '''
+        Helper to store the outcome of a launch.
+        Output is kept unmodified, see :meth:`_text`.
+        '''
+        self._data.update(code=code, stdout=stdout, stderr=stderr)
+
+    def _kill(self, pid, group=None):
+        '''
+        Helper to kill a running command.
+        With a :attr:`timeout` set, the command runs in its own
+        process group - which is then killed as a whole.
+
+        :param group: Use ``True`` or ``False`` to decide about
+                      the process group regardless of the :attr:`timeout`
+        '''
+        if group is None:
+            group = self.timeout is not None
+        try:
+            if group:
+                killpg(pid, SIGKILL)
+            else:
+                kill(pid, SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def _expire(self, pid, group=None):
+        '''
+        Helper to stop a command which ran out of time.
+
+        :param group: See :meth:`_kill`
+        '''
+        self._data['timed_out'] = True
+        self._kill(pid, group=group)
+
+    def _fail(self, exc):
+        '''
+        Helper to note a launch which failed with *exc*.
+        '''
+        self._data['exc'] = exc
+        self._stop()
+
+    def _start(self):
+        '''
+        Helper to note the time of a launch.
+        '''
+        self._data['started'] = time()
+        self._clock = monotonic()
+
+    def _stop(self, rusage=None):
+        '''
+        Helper to note the :attr:`duration` and :attr:`usage` of a launch.
+
+        :param rusage: Resource usage as returned by :py:func:`os.wait4`
+        '''
+        self._data['duration'] = monotonic() - self._clock
+        if rusage is not None:
+            self._data['usage'] = CommandUsage(
+                utime=rusage.ru_utime, stime=rusage.ru_stime,
+                maxrss=rusage.ru_maxrss
+            )
 
     @property
     def fields(self):
@@ -158,13 +534,25 @@ class Command:
         Before the command was :attr:`launched` only
         :attr:`cmd`, :attr:`cwd` and :attr:`cin` are included.
         After :attr:`launch <launched>` the result is extended by
-        :attr:`stdout`, :attr:`stderr`, :attr:`exc` and :attr:`code`.
+        :attr:`stdout`, :attr:`stderr`, :attr:`exc`, :attr:`code`,
+        :attr:`timed_out`, :attr:`started`, :attr:`duration`
+        and :attr:`usage`.
+        :attr:`Spilled <spilled>` stdout is left on disk,
+        only its size is included.
         '''
         res = dict(command=self.command, cwd=self.cwd, cin=self.cin)
         if self.launched:
+            if self.spilled:
+                stdout = '<{} bytes spilled>'.format(
+                    len(self._data['stdout'])
+                )
+            else:
+                stdout = self.stdout
             res.update(
-                stdout=self.stdout, stderr=self.stderr,
-                exc=self.exc, code=self.code
+                stdout=stdout, stderr=self.stderr,
+                exc=self.exc, code=self.code, timed_out=self.timed_out,
+                started=self.started, duration=self.duration,
+                usage=self.usage
             )
         return res
 
@@ -194,23 +582,703 @@ class Command:
         if self.launched:
             return False
 
+        launch = {
+            LAUNCHER_POPEN: self._launch_popen,
+            LAUNCHER_SPAWN: self._launch_spawn,
+        }.get(self.launcher)
+        if self.replayer is not None:
+            launch = self._launch_replay
+
+        self._start()
+        sink = self._sink()
+        try:
+            if launch is None:
+                raise ValueError('unknown launcher "{}"'.format(
+                    self.launcher
+                ))
+            code, stdout, stderr, rusage = launch(sink)
+        except(OSError, TypeError, ValueError) as exc:
+            self._drain(sink, None)
+            self._fail(exc)
+        else:
+            self._collect(code, self._drain(sink, stdout), stderr)
+            self._stop(rusage)
+
+        return self._report()
+
+    def _launch_popen(self, sink):
+        '''
+        Launches the command using :py:class:`subprocess.Popen`.
+
+        :param sink: Output of :meth:`_sink`
+        :returns: Returncode, stdout, stderr and resource usage
+        '''
+        procs = []
+
+        def launch(child_in, child_out, child_err):
+            '''Helper to start the command connected to the pipes'''
+            procs.append(Popen(
+                self.cmd, stdin=child_in, stdout=child_out, stderr=child_err,
+                cwd=self.cwd, env=self.environment,
+                start_new_session=self.timeout is not None
+            ))
+            return procs[-1].pid
+
+        code, stdout, stderr, rusage = self._connect(sink, launch)
+        procs[-1].returncode = code
+        return code, stdout, stderr, rusage
+
+    def _launch_replay(self, sink):
+        '''
+        Pretends to launch the command using the :attr:`replayer`.
+
+        :param sink: Output of :meth:`_sink`
+        :returns: Returncode, stdout, stderr and resource usage
+        '''
+        recording = self.replayer(self)  # pylint: disable=not-callable
+        if recording.exc is not None:
+            raise OSError(recording.exc)
+
+        self._data['timed_out'] = recording.timed_out
+        stdout = recording.stdout
+        if sink is not PIPE:
+            sink.write(stdout)
+            sink.flush()
+            stdout = None
+        return recording.code, stdout, recording.stderr, None
+
+    def _launch_spawn(self, sink):
+        '''
+        Launches the command using :py:func:`os.posix_spawnp`.
+        This avoids copying the memory of the current process,
+        which gets expensive with growing heaps.
+
+        :param sink: Output of :meth:`_sink`
+        :returns: Returncode, stdout, stderr and resource usage
+
+        Commands with a *cwd* are wrapped into :const:`SPAWN_CHDIR`.
+        '''
+        if posix_spawnp is None:
+            raise ValueError(
+                'launcher "{}" needs os.posix_spawnp (python 3.8+)'.format(
+                    LAUNCHER_SPAWN
+                )
+            )
+        cmd = list(self.cmd)
+        env = self.environment or environ
+        if not cmd or which(cmd[0], path=env.get('PATH')) is None:
+            raise FileNotFoundError('command not found: {}'.format(
+                self.command
+            ))
+        if self.cwd is not None:
+            if not path.isdir(self.cwd):
+                raise FileNotFoundError('no such folder: {}'.format(
+                    self.cwd
+                ))
+            cmd = [*SPAWN_CHDIR, self.cwd, *cmd]
+
+        return self._connect(
+            sink, lambda child_in, child_out, child_err: posix_spawnp(
+                cmd[0], cmd, env, file_actions=[
+                    (POSIX_SPAWN_DUP2, child_in, 0),
+                    (POSIX_SPAWN_DUP2, child_out, 1),
+                    (POSIX_SPAWN_DUP2, child_err, 2),
+                ], setsid=self.timeout is not None
+            )
+        )
+
+    def _connect(self, sink, launch):
+        '''
+        Helper to launch the command with stdin, stdout and stderr
+        connected to pipes, served by :meth:`_exchange`.
+        The child is reaped by :func:`_reap`.
+
+        :param sink: Output of :meth:`_sink`
+        :param launch: Starts the command, gets the file descriptors
+                       for its stdin, stdout and stderr and returns
+                       its process id
+        :returns: Returncode, stdout, stderr and resource usage
+        '''
+        child_in, parent_in = pipe()
+        parent_err, child_err = pipe()
+        parent_out, child_out = pipe() if sink is PIPE else (
+            None, sink.fileno()
+        )
+        try:
+            pid = launch(child_in, child_out, child_err)
+        except BaseException:
+            for fd in (parent_in, parent_out, parent_err):
+                if fd is not None:
+                    close(fd)
+            raise
+        finally:
+            for fd in (child_in, child_out, child_err):
+                if sink is PIPE or fd != child_out:
+                    close(fd)
+
+        stdout, stderr = self._exchange(
+            pid, parent_in, parent_out, parent_err
+        )
+        code, rusage = _reap(pid)
+        return code, stdout, stderr, rusage
+
+    def _exchange(self, pid, fd_in, fd_out, fd_err):
+        '''
+        Helper to send stdin and collect stdout and stderr through pipes,
+        much like :py:meth:`subprocess.Popen.communicate` does.
+        Takes care of the :attr:`timeout`.
+
+        :param pid: Process id of the command
+        :param fd_in: Pipe to write stdin into
+        :param fd_out: Pipe to read stdout from or ``None``
+        :param fd_err: Pipe to read stderr from
+        :returns: Output of stdout and stderr (as bytes)
+        '''
+        data = self._input or b''
+        offset = 0
+        chunks = {fd_out: [], fd_err: []}
+        deadline = None
+        if self.timeout is not None:
+            deadline = monotonic() + self.timeout
+
+        with DefaultSelector() as selector:
+            if data:
+                selector.register(fd_in, EVENT_WRITE)
+            else:
+                close(fd_in)
+            for fd in (fd_out, fd_err):
+                if fd is not None:
+                    selector.register(fd, EVENT_READ)
+
+            while selector.get_map():
+                wait = None
+                if deadline is not None:
+                    wait = deadline - monotonic()
+                    if wait <= 0:
+                        self._expire(pid)
+                        deadline, wait = None, None
+
+                for key, _ in selector.select(wait):
+                    if key.fd == fd_in:
+                        try:
+                            offset += write(
+                                fd_in, data[offset:offset + PIPE_BUF]
+                            )
+                        except BrokenPipeError:
+                            offset = len(data)
+                        if offset >= len(data):
+                            selector.unregister(fd_in)
+                            close(fd_in)
+                        continue
+
+                    chunk = read(key.fd, CHUNK_SIZE)
+                    if chunk:
+                        chunks[key.fd].append(chunk)
+                    else:
+                        selector.unregister(key.fd)
+                        close(key.fd)
+
+        return b''.join(chunks[fd_out]), b''.join(chunks[fd_err])
+
+    def stream(self, sep=CHAR_NEWLINE):
+        '''
+        Launches the command, but yields the output while it arrives.
+
+        :param sep: Separator between the records of stdout.
+                    Use :const:`CHAR_NUL` for ``-z`` style output
+        :returns: Generator of decoded records, without the *sep*.
+                  Records are bytes if :attr:`binary` is set
+
+        Only one record is held in memory at a time, so :attr:`stdout`
+        stays empty (unless there are :attr:`recorders`).
+        Once the generator is exhausted :attr:`code` and
+        :attr:`stderr` are available as usual. Closing the generator early
+        terminates the command, so does running out of :attr:`timeout`.
+        A previously :attr:`launched` command yields nothing.
+        '''
+        if self.launched:
+            return
+
+        if self.replayer is not None:
+            self()
+            yield from self.records(sep=sep)
+            return
+
+        self._start()
         try:
             proc = Popen(
                 self.cmd, stdin=PIPE, stdout=PIPE, stderr=PIPE,
-                cwd=self.cwd, universal_newlines=True
+                cwd=self.cwd, env=self.environment,
+                start_new_session=self.timeout is not None
             )
         except(OSError, TypeError, ValueError) as exc:
             self._data['exc'] = exc
-        else:
-            stdout, stderr = proc.communicate(input=self.cin)
-            self._data['code'] = proc.returncode
-            self._data['stdout'] = stdout.strip()
-            self._data['stderr'] = stderr.strip()
+            self._stop()
+            self._report()
+            return
+
+        convert = (lambda raw: raw) if self.binary else decoded
+        errors = []
+
+        def feed():
+            '''Helper to send stdin data without blocking'''
+            try:
+                if self.cin is not None:
+                    proc.stdin.write(self._input)
+                proc.stdin.close()
+            except OSError:
+                pass
+
+        def drain():
+            '''Helper to collect stderr without blocking'''
+            errors.append(proc.stderr.read())
+
+        helpers = [Thread(target=feed), Thread(target=drain)]
+        for helper in helpers:
+            helper.start()
+
+        timer = None
+        if self.timeout is not None:
+            timer = Timer(self.timeout, self._expire, args=(proc.pid,))
+            timer.start()
+
+        separator = _separator(sep)
+        captured = [] if self.recorders else None
+        finished = False
+        tail = b''
+        try:
+            for chunk in iter(lambda: proc.stdout.read1(CHUNK_SIZE), b''):
+                *records, tail = (tail + chunk).split(separator)
+                for record in records:
+                    if captured is not None:
+                        captured.append(record)
+                    yield convert(record)
+            if tail:
+                if captured is not None:
+                    captured.append(tail)
+                yield convert(tail)
+            finished = True
+        finally:
+            if timer is not None:
+                timer.cancel()
+            if not finished:
+                self._kill(proc.pid)
+            proc.stdout.close()
+            for helper in helpers:
+                helper.join()
+            proc.stderr.close()
+            proc.returncode, rusage = _reap(proc.pid)
+            self._collect(
+                proc.returncode,
+                separator.join(captured) if captured is not None else b'',
+                b''.join(errors)
+            )
+            self._stop(rusage)
+            self._report()
+
+    def _report(self):
+        '''
+        Writes the outcome of a launch into the log
+        and hands the command over to all :attr:`recorders`.
+
+        :returns: Output of :attr:`success`
+        '''
+        for recorder in self.recorders:
+            recorder(self)
 
         success = self.success
         if success:
-            self._log.info('command success: %s', self.repr)
+            self._log.info('command success: %s', _Lazy(lambda: self.repr))
         else:
-            self._log.error('command failed: %s', self.repr)
+            self._log.error('command failed: %s', _Lazy(lambda: self.repr))
 
         return success
+
+
+def _reap(pid):
+    '''
+    Helper to wait for a child using :py:func:`os.wait4`,
+    which also reports its resource usage.
+
+    :param pid: Process id of the child
+    :returns: Returncode (negative signal number if it was killed)
+              and resource usage
+    :rtype: tuple
+    '''
+    _, status, rusage = wait4(pid, 0)
+    if WIFSIGNALED(status):
+        return -WTERMSIG(status), rusage
+    return WEXITSTATUS(status), rusage
+
+
+class _Lazy:
+    '''
+    Helper to build log arguments only once the message is emitted
+    '''
+
+    def __init__(self, func):
+        '''
+        :param func: Returns the argument as text
+        '''
+        self._func = func
+
+    def __str__(self):
+        return self._func()
+
+
+def decoded(data):
+    '''
+    Turns raw output of some command into text, the same way
+    :py:class:`subprocess.Popen` does with ``universal_newlines``.
+
+    :param data: Bytes (or anything alike) to decode
+    :returns: Decoded text with translated newlines
+    :rtype: str
+    '''
+    text = str(data, getpreferredencoding(False))
+    return text.replace('\r\n', CHAR_NEWLINE).replace('\r', CHAR_NEWLINE)
+
+
+def _separator(sep):
+    '''
+    Helper to prepare separators for splitting raw output.
+
+    :param sep: Separator as text or bytes
+    :returns: Separator as bytes
+    '''
+    if isinstance(sep, bytes):
+        return sep
+    return sep.encode(getpreferredencoding(False))
+
+
+class AsyncCommand(Command):
+    '''
+    This is an awaitable command runner using :py:mod:`asyncio`.
+
+    Offers the same properties as :class:`Command`,
+    and :meth:`run` has to be awaited inside some event loop.
+    This allows many commands to be in flight at the same time.
+    Calling it still launches the command synchronously
+    (see :meth:`Command.__call__`).
+
+    The child is reaped by :py:mod:`asyncio`, so no
+    :attr:`usage <Command.usage>` is available.
+    '''
+
+    async def run(self):
+        '''
+        Launches the command inside the running event loop.
+
+        :returns: Output of :attr:`success <Command.success>`
+
+        Same rules as in :meth:`Command.__call__` apply:
+        A previously :attr:`launched <Command.launched>` command
+        will not run again, returning always ``False``.
+        '''
+        if self.launched:
+            return False
+        if self.replayer is not None:
+            return Command.__call__(self)
+
+        self._start()
+        sink = self._sink()
+        try:
+            proc = await create_subprocess_exec(
+                *self.cmd, stdin=PIPE, stdout=sink, stderr=PIPE,
+                cwd=self.cwd, env=self.environment,
+                start_new_session=self.timeout is not None
+            )
+        except(OSError, TypeError, ValueError) as exc:
+            self._data['exc'] = exc
+            self._drain(sink, None)
+        else:
+            try:
+                stdout, stderr = await wait_for(
+                    proc.communicate(input=self._input), self.timeout
+                )
+            except AsyncTimeoutError:
+                self._expire(proc.pid)
+                await proc.wait()
+                stdout, stderr = b'', b''
+            self._collect(
+                proc.returncode, self._drain(sink, stdout), stderr
+            )
+        self._stop()
+
+        return self._report()
+
+
+class PoolResult(namedtuple('PoolResult', (
+        'command', 'success', 'duration'
+))):
+    '''
+    :arg command: The launched :class:`Command`
+    :arg success: Output of :attr:`Command.success`
+    :arg duration: Wall time in seconds spent running *command*
+    '''
+
+
+class CommandPool:
+    '''
+    Launches a batch of :class:`Command` objects in parallel,
+    with a limit on how many are running at the same time
+    '''
+
+    def __init__(self, cmds, *, cwd=None, workers=None):
+        '''
+        Initialize a new pool
+
+        :param cmds: Either :class:`Command` objects or commandlines
+        :param cwd: Current working directory for *cmds* given
+                    as commandlines
+        :param workers: Limit of commands running in parallel.
+                        If left blank the number of CPUs is used
+        '''
+        self._log = getLogger(self.__class__.__name__)
+        self.commands = [
+            cmd if isinstance(cmd, Command) else Command(cmd, cwd=cwd)
+            for cmd in cmds
+        ]
+        self.workers = max(1, workers or cpu_count() or 1)
+        self.results = []
+
+        self._log.debug(
+            'pool initialized: %d commands, %d workers',
+            len(self.commands), self.workers
+        )
+
+    @property
+    def launched(self):
+        '''
+        :returns: ``True`` if the pool was launched, otherwise ``False``
+        '''
+        return bool(self.results)
+
+    @property
+    def success(self):
+        '''
+        :returns: ``True`` if the pool was launched and all
+                  commands were successful, otherwise ``False``
+        '''
+        return self.launched and all(res.success for res in self.results)
+
+    @staticmethod
+    def _launch(cmd):
+        '''
+        Helper to launch one command while keeping track of the time.
+
+        :returns: Result of the command
+        :rtype: :class:`PoolResult`
+        '''
+        start = monotonic()
+        success = cmd()
+        return PoolResult(
+            command=cmd, success=success, duration=monotonic() - start
+        )
+
+    def __call__(self):
+        '''
+        Launches all commands of the pool.
+
+        :returns: Output of :attr:`success`
+
+        The :attr:`results` are available in the same order
+        as the :attr:`commands` were passed in.
+        Like with :class:`Command` a previously :attr:`launched`
+        pool will not run again, returning always ``False``.
+        '''
+        if self.launched or not self.commands:
+            return False
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            self.results = list(executor.map(self._launch, self.commands))
+
+        return self.success
+
+
+class Pipeline(Command):
+    '''
+    Launches several commands, connecting stdout of each command directly
+    to stdin of the next one (like ``|`` in the shell), without passing
+    the data through python
+    '''
+
+    def __init__(
+            self, *cmds,
+            cwd=None, cin=None, env=None, binary=False, timeout=None,
+            spill=None
+    ):
+        '''
+        Initialize a new pipeline
+
+        :param cmds: Either :class:`Command` objects or commandlines,
+                     in order of the data flow
+        :param cwd: Current working directory for *cmds* given
+                    as commandlines
+        :param cin: Send data via stdin into the first command
+        :param env: Environment variables for *cmds* given as commandlines
+        :param binary: See :class:`Command`
+        :param timeout: Seconds until all commands get killed,
+                        see :class:`Command`
+        :param spill: Keep stdout of the last command on disk,
+                      see :class:`Command`
+        '''
+        self.stages = [
+            cmd if isinstance(cmd, Command) else Command(
+                cmd, cwd=cwd, env=env
+            )
+            for cmd in cmds
+        ]
+        super().__init__(
+            [stage.cmd for stage in self.stages],
+            cwd=cwd, cin=cin, env=env, binary=binary, timeout=timeout,
+            spill=spill
+        )
+
+    @property
+    def command(self):
+        '''
+        :returns: Joined :attr:`command <Command.command>` of all stages
+        '''
+        return ' | '.join(stage.command for stage in self.stages)
+
+    @property
+    def success(self):
+        '''
+        :returns:
+            ``True`` if all stages were successful, otherwise ``False``
+            (like ``pipefail`` in the shell).
+            Stages not launched (while replaying) are left out
+        '''
+        return super().success and all(
+            stage.success for stage in self.stages if stage.launched
+        )
+
+    @property
+    def fields(self):
+        '''
+        :returns: Same as :attr:`Command.fields`, after launch extended
+                  by the fields of all stages
+        :rtype: dict
+        '''
+        res = super().fields
+        if self.launched:
+            res.update(stages=[stage.fields for stage in self.stages])
+        return res
+
+    def __call__(self):
+        '''
+        Launches all commands of the pipeline.
+
+        :returns: Output of :attr:`success`
+
+        :attr:`stdout <Command.stdout>` and :attr:`code <Command.code>`
+        are taken from the last stage, :attr:`stderr <Command.stderr>`
+        of all stages is joined together. Each stage keeps its own
+        :attr:`code <Command.code>`, :attr:`stderr <Command.stderr>`,
+        :attr:`duration <Command.duration>` and
+        :attr:`usage <Command.usage>`.
+        A previously :attr:`launched <Command.launched>` pipeline
+        will not run again, returning always ``False``.
+        '''
+        if self.launched or not self.stages:
+            return False
+        if self.replayer is not None:
+            return super().__call__()
+
+        self._start()
+        sink = self._sink()
+        errors = [TemporaryFile() for _ in self.stages]
+        procs = []
+        try:
+            for num, stage in enumerate(self.stages):
+                Command._start(stage)
+                procs.append(Popen(
+                    stage.cmd,
+                    stdin=procs[-1].stdout if procs else PIPE,
+                    stdout=sink if num == len(self.stages) - 1 else PIPE,
+                    stderr=errors[num],
+                    cwd=stage.cwd, env=stage.environment,
+                    start_new_session=self.timeout is not None
+                ))
+                if num:
+                    procs[-2].stdout.close()
+        except(OSError, TypeError, ValueError) as exc:
+            Command._fail(stage, exc)
+            for proc in procs:
+                self._kill(proc.pid)
+                for pipe_ in (proc.stdin, proc.stdout):
+                    if pipe_ is not None:
+                        pipe_.close()
+                proc.wait()
+            self._drain(sink, None)
+            for handle in errors:
+                handle.close()
+            self._fail(exc)
+            return self._report()
+
+        def feed():
+            '''Helper to send stdin data without blocking'''
+            try:
+                if self.cin is not None:
+                    procs[0].stdin.write(self._input)
+                procs[0].stdin.close()
+            except OSError:
+                pass
+
+        feeder = Thread(target=feed)
+        feeder.start()
+        reapers = [
+            Thread(target=self._reap_stage, args=(stage, proc))
+            for stage, proc in zip(self.stages, procs)
+        ]
+        for reaper in reapers:
+            reaper.start()
+        timer = None
+        if self.timeout is not None:
+            timer = Timer(self.timeout, self._expire_stages, args=(procs,))
+            timer.start()
+
+        stdout = None
+        if sink is PIPE:
+            stdout = procs[-1].stdout.read()
+            procs[-1].stdout.close()
+
+        for reaper in reapers:
+            reaper.join()
+
+        stderr = []
+        for stage, proc, handle in zip(self.stages, procs, errors):
+            with handle:
+                handle.seek(0)
+                stderr.append(handle.read())
+            Command._collect(stage, proc.returncode, b'', stderr[-1])
+
+        if timer is not None:
+            timer.cancel()
+        feeder.join()
+
+        self._collect(
+            procs[-1].returncode, self._drain(sink, stdout),
+            b'\n'.join(err for err in stderr if err)
+        )
+        self._stop()
+        return self._report()
+
+    @staticmethod
+    def _reap_stage(stage, proc):
+        '''
+        Helper to note the exit of one stage as soon as it happens.
+        '''
+        proc.returncode, rusage = _reap(proc.pid)
+        Command._stop(stage, rusage)
+
+    def _expire_stages(self, procs):
+        '''
+        Helper to kill all stages still running.
+        '''
+        group = self.timeout is not None
+        for stage, proc in zip(self.stages, procs):
+            if proc.returncode is None:
+                self._data['timed_out'] = True
+                Command._expire(stage, proc.pid, group=group)
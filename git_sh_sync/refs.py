@@ -0,0 +1,217 @@
+'''
+This module allows reading refs of git repositories.
+Namely by parsing the files inside the git folder directly,
+so no command has to be launched.
+'''
+from logging import getLogger
+from os import path, walk
+from re import IGNORECASE, MULTILINE, findall, search, split, sub
+
+from git_sh_sync.cache import git_folder
+from git_sh_sync.proc import Command
+from git_sh_sync.util.disk import joined
+
+REF_HEADS = 'refs/heads/'
+'''
+Prefix of all branches
+'''
+REF_TAGS = 'refs/tags/'
+'''
+Prefix of all tags
+'''
+REF_SYMBOLIC = 'ref: '
+'''
+Prefix of the contents of symbolic refs (like ``HEAD``)
+'''
+
+
+class RefReader:
+    '''
+    Reads ``HEAD``, loose refs and ``packed-refs`` of a repository without
+    launching git. Answers ``None`` to everything it can not handle
+    (e.g. the ``reftable`` format), so callers have to ask git instead.
+    The same happens while commands are recorded or replayed
+    (see :func:`direct_reads`)
+    '''
+
+    def __init__(self, location):
+        '''
+        Initialize a new reader
+
+        :param location: Local path of the repository
+        '''
+        self._log = getLogger(self.__class__.__name__)
+
+        self.location = joined(location)
+
+    @property
+    def folders(self):
+        '''
+        :returns: Git folder and common git folder (see
+                  :func:`git_folder <git_sh_sync.cache.git_folder>`)
+                  or ``None`` if they can not be read by this reader
+        :rtype: tuple
+        '''
+        if not direct_reads():
+            return None
+        folder, common = git_folder(self.location)
+        if not path.isfile(path.join(folder, 'HEAD')):
+            return None
+        if path.exists(path.join(common, 'reftable')):
+            return None
+        return folder, common
+
+    @property
+    def supported(self):
+        '''
+        :returns: ``True`` if this reader is able to read the repository,
+                  otherwise ``False``
+        '''
+        return self.folders is not None
+
+    def head(self):
+        '''
+        Reads ``HEAD``.
+
+        :returns: Full name of the current branch (``None`` if detached) and
+                  complete hash of the current commit (``None`` if there
+                  are no commits yet), or ``None`` if not supported
+        :rtype: tuple
+        '''
+        folders = self.folders
+        if folders is None:
+            return None
+
+        folder, _ = folders
+        content = _read(path.join(folder, 'HEAD'))
+        if content is None:
+            return None
+        if not content.startswith(REF_SYMBOLIC):
+            return None, content
+
+        name = content[len(REF_SYMBOLIC):].strip()
+        return name, self.refs(name).get(name)
+
+    def refs(self, prefix='refs/'):
+        '''
+        Collects refs.
+
+        :param prefix: Only refs starting with this are collected
+        :returns: Full names of refs and the complete hashes they point to,
+                  or ``None`` if not supported
+        :rtype: dict
+
+        Loose refs win over those from ``packed-refs``.
+        Symbolic refs are followed one level deep.
+        '''
+        folders = self.folders
+        if folders is None:
+            return None
+
+        _, common = folders
+        res = {}
+
+        packed = _read(path.join(common, 'packed-refs'))
+        for line in (packed or '').splitlines():
+            if not line or line[0] in ('#', '^'):
+                continue
+            oid, _, name = line.partition(' ')
+            if name.startswith(prefix):
+                res[name] = oid
+
+        symbolic = {}
+        base = path.join(common, *prefix.rstrip('/').split('/'))
+        if not prefix.endswith('/'):
+            base = path.dirname(base)
+        for root, _, files in walk(base):
+            for filename in files:
+                if filename.endswith('.lock'):
+                    continue
+                full = path.join(root, filename)
+                name = path.relpath(full, common).replace(path.sep, '/')
+                if not name.startswith(prefix):
+                    continue
+                content = _read(full)
+                if content is None:
+                    continue
+                if content.startswith(REF_SYMBOLIC):
+                    symbolic[name] = content[len(REF_SYMBOLIC):].strip()
+                else:
+                    res[name] = content
+
+        for name, target in symbolic.items():
+            if target in res:
+                res[name] = res[target]
+
+        return res
+
+    def remotes(self):
+        '''
+        Collects names of the remotes out of the config.
+
+        :returns: Names of the remotes, in order of appearance,
+                  or ``None`` if not supported
+        :rtype: list
+
+        Configs using ``include`` are not supported.
+        '''
+        folders = self.folders
+        if folders is None:
+            return None
+
+        _, common = folders
+        config = _read(path.join(common, 'config'))
+        if config is None or search(
+                r'^\s*\[\s*include', config, IGNORECASE | MULTILINE
+        ):
+            return None
+
+        res = []
+        for name in findall(
+                r'^\s*\[\s*remote\s+"((?:[^"\\]|\\.)*)"\s*\]',
+                config, IGNORECASE | MULTILINE
+        ):
+            name = sub(r'\\(.)', r'\1', name)
+            if name not in res:
+                res.append(name)
+        return res
+
+
+def direct_reads():
+    '''
+    Decides if refs may be read directly.
+
+    :returns: ``True`` if so, ``False`` while commands are recorded or
+              replayed (see :mod:`git_sh_sync.replay`) - then git has
+              to be asked, so the answers end up in the recording
+    '''
+    return not Command.recorders and Command.replayer is None
+
+
+def _read(location):
+    '''
+    Helper to read a small file.
+
+    :param location: Path of the file
+    :returns: Stripped contents, ``None`` if the file could not be read
+    '''
+    try:
+        with open(location, 'r', encoding='utf-8') as handle:
+            return handle.read().strip()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def version_key(name):
+    '''
+    Sort key comparing numbers inside *name* by their value
+    (like ``--sort=version:refname``).
+
+    :param name: Some ref name, like a tag
+    :returns: Parts of *name*, numbers as int
+    :rtype: tuple
+    '''
+    return tuple(
+        int(part) if num % 2 else part
+        for num, part in enumerate(split(r'(\d+)', name))
+    )
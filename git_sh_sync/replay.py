@@ -0,0 +1,239 @@
+'''
+This module allows recording commands and replaying them later on.
+Namely to measure the own overhead (parsing, decisions) without
+launching git at all.
+'''
+from base64 import b64decode, b64encode
+from collections import deque, namedtuple
+from gzip import open as gzip_open
+from json import dumps, loads
+from locale import getpreferredencoding
+from logging import getLogger
+from threading import Lock
+
+from git_sh_sync.proc import Command
+from git_sh_sync.util.disk import joined
+
+
+class Recording(namedtuple('Recording', (
+        'cmd', 'cwd', 'cin', 'code', 'stdout', 'stderr',
+        'exc', 'timed_out', 'duration'
+))):
+    '''
+    :arg cmd: Commandline as list
+    :arg cwd: Folder the command was launched in
+    :arg cin: Input sent to the command as bytes (or ``None``)
+    :arg code: Returncode of the command
+    :arg stdout: Raw output of stdout as bytes
+    :arg stderr: Raw output of stderr as bytes
+    :arg exc: Message of the exception raised on launch (or ``None``)
+    :arg timed_out: ``True`` if the command was killed after its timeout
+    :arg duration: Seconds the command took to complete
+    '''
+
+
+def _raw(value):
+    '''
+    Helper to get captured output or input as bytes.
+
+    :param value: Output as str, bytes or :py:class:`mmap.mmap`
+    :returns: *value* as bytes, ``None`` stays ``None``
+    '''
+    if value is None or isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode(getpreferredencoding(False))
+    return value[:]
+
+
+def _encoded(value):
+    '''
+    Helper to store bytes inside json.
+
+    :returns: *value* base64 encoded as str, ``None`` stays ``None``
+    '''
+    if value is None:
+        return None
+    return b64encode(value).decode('ascii')
+
+
+def _decoded(value):
+    '''
+    Reverse of :func:`_encoded`.
+
+    :returns: *value* as bytes, ``None`` stays ``None``
+    '''
+    if value is None:
+        return None
+    return b64decode(value)
+
+
+def _key(cmd, cwd, cin):
+    '''
+    Helper to identify a command.
+
+    :returns: Commandline, folder and input as hashable str
+    '''
+    return dumps([
+        cmd, cwd, None if cin is None else b64encode(cin).decode('ascii')
+    ])
+
+
+class Recorder:
+    '''
+    Writes every launched :class:`Command <git_sh_sync.proc.Command>`
+    into a gzip compressed file, one json object per line
+    '''
+
+    def __init__(self, location):
+        '''
+        Initialize a new recorder. Recording starts by using
+        it as a context manager.
+
+        :param location: Path of the file to write into
+        '''
+        self._log = getLogger(self.__class__.__name__)
+        self._lock = Lock()
+        self._handle = None
+
+        self.location = joined(location)
+        self.count = 0
+
+    def __enter__(self):
+        '''
+        Opens the file and registers as
+        :attr:`recorder <git_sh_sync.proc.Command.recorders>`
+        '''
+        self._handle = gzip_open(self.location, 'wt', encoding='utf-8')
+        Command.recorders.append(self)
+        return self
+
+    def __exit__(self, *_):
+        '''
+        Unregisters and closes the file
+        '''
+        if self in Command.recorders:
+            Command.recorders.remove(self)
+        with self._lock:
+            self._handle.close()
+            self._handle = None
+        self._log.info(
+            'recorded %d commands into "%s"', self.count, self.location
+        )
+
+    def __call__(self, command):
+        '''
+        Writes one command into the file.
+
+        :param command: A launched :class:`Command <git_sh_sync.proc.Command>`
+        '''
+        exc = command.exc
+        raw = command.raw
+        line = dumps(dict(
+            cmd=command.cmd,
+            cwd=command.cwd,
+            cin=_encoded(_raw(raw.cin)),
+            code=command.code,
+            stdout=_encoded(_raw(raw.stdout)),
+            stderr=_encoded(_raw(raw.stderr)),
+            exc=None if exc is None else str(exc),
+            timed_out=command.timed_out,
+            duration=command.duration,
+        ))
+        with self._lock:
+            if self._handle is None:
+                return
+            self._handle.write(line + '\n')
+            self.count += 1
+
+
+def load(location):
+    '''
+    Reads back the file of a :class:`Recorder`.
+
+    :param location: Path of the file to read
+    :returns: Generator of :class:`Recording`
+    '''
+    with gzip_open(joined(location), 'rt', encoding='utf-8') as handle:
+        for line in handle:
+            data = loads(line)
+            yield Recording(
+                cmd=data['cmd'],
+                cwd=data['cwd'],
+                cin=_decoded(data['cin']),
+                code=data['code'],
+                stdout=_decoded(data['stdout']) or b'',
+                stderr=_decoded(data['stderr']) or b'',
+                exc=data['exc'],
+                timed_out=data['timed_out'],
+                duration=data['duration'],
+            )
+
+
+class Replayer:
+    '''
+    Answers :class:`Command <git_sh_sync.proc.Command>` launches from a
+    file written by a :class:`Recorder`, no command is launched at all
+    '''
+
+    def __init__(self, location):
+        '''
+        Initialize a new replayer. Replaying starts by using
+        it as a context manager.
+
+        :param location: Path of the file to read from
+
+        Commands are matched by their commandline, folder and input.
+        If one command was recorded multiple times, the recordings are
+        replayed in order - the last one is repeated once all others
+        were used.
+        '''
+        self._log = getLogger(self.__class__.__name__)
+        self._lock = Lock()
+        self._data = {}
+
+        self.location = joined(location)
+        self.count = 0
+
+        for recording in load(self.location):
+            self._data.setdefault(_key(
+                recording.cmd, recording.cwd, recording.cin
+            ), deque()).append(recording)
+
+    def __enter__(self):
+        '''
+        Registers as :attr:`replayer <git_sh_sync.proc.Command.replayer>`
+        '''
+        Command.replayer = self
+        return self
+
+    def __exit__(self, *_):
+        '''
+        Unregisters again
+        '''
+        if Command.replayer is self:
+            Command.replayer = None
+
+    def __call__(self, command):
+        '''
+        Looks up the recording of one command.
+
+        :param command: A :class:`Command <git_sh_sync.proc.Command>`
+                        about to be launched
+        :returns: The matching :class:`Recording`
+        :raises ValueError: If the command was never recorded
+                            (ends up in :attr:`exc
+                            <git_sh_sync.proc.Command.exc>`)
+        '''
+        key = _key(command.cmd, command.cwd, _raw(command.raw.cin))
+        with self._lock:
+            queue = self._data.get(key)
+            if not queue:
+                self._log.error('not recorded: "%s"', command.command)
+                raise ValueError('command not recorded: "{}"'.format(
+                    command.command
+                ))
+            self.count += 1
+            if len(queue) > 1:
+                return queue.popleft()
+            return queue[0]
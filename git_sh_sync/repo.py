@@ -2,10 +2,19 @@
 This module allows working with git repositories.
 '''
 from collections import namedtuple
+from functools import wraps
 from logging import getLogger
-
-from git_sh_sync.proc import Command
-from git_sh_sync.util.disk import ensured
+from os import devnull, fsdecode, fsencode, path, remove, replace
+from shlex import split
+from shutil import copyfileobj
+
+from git_sh_sync.batch import CatFile
+from git_sh_sync.cache import ResultCache, git_folder
+from git_sh_sync.proc import CHAR_NUL, Command
+from git_sh_sync.refs import (
+    REF_HEADS, REF_TAGS, RefReader, direct_reads, version_key
+)
+from git_sh_sync.util.disk import ensured, joined
 from git_sh_sync.util.host import get_hostname
 
 GIT_DIVIDER = '|-: ^_^ :-|'
@@ -13,10 +22,65 @@ GIT_DIVIDER = '|-: ^_^ :-|'
 Format divider (e.g. used in log) - Should be different from any text
 inside a commit message
 '''
+SPILL_SIZE = 16 * 1024 * 1024
+'''
+Bytes of output of a single command to keep in memory,
+everything above is kept on disk instead
+'''
+GIT_STATUS_SYMBOLS = dict(U='conflicting', D='deleted', M='modified')
+'''
+Which symbol inside the ``XY`` field of the :attr:`Repository.status`
+leads to which list of the :class:`GitStatus`
+'''
+GIT_STATUS_TABLE = dict(
+    (x_sym + y_sym, tuple(
+        key for sym, key in sorted(GIT_STATUS_SYMBOLS.items())
+        if sym in x_sym + y_sym
+    ))
+    for x_sym in '.MTADRCU' for y_sym in '.MTADRCU'
+)
+'''
+Lookup table of all possible ``XY`` fields
+to their lists of the :class:`GitStatus`
+'''
+GIT_REF_KINDS = (
+    ('refs/heads/', 'branch'),
+    ('refs/tags/', 'tag'),
+    ('refs/remotes/', 'remote'),
+)
+'''
+Prefixes of full ref names and the *kind* of :class:`GitRevision`
+they lead to
+'''
+SCRUB_STRATEGIES = ('checkout', 'plumbing')
+'''
+Possible ways for :meth:`Repository.scrub` to commit changes:
+
+* ``checkout`` switches to the temporary branch, commits there,
+  switches back and merges
+* ``plumbing`` builds the commit inside a temporary index and moves both
+  branches onto it, the working tree is not touched
+  (no checkouts, no hooks)
+'''
+GIT_STAGE_ERRORS = ('pathspec', 'adding files failed')
+'''
+Parts of the output of ``git add`` or ``git rm`` pointing at single
+paths. Only then :meth:`Repository.mutate` retries path by path
+(these commands run with ``LC_ALL=C``, so the output is not translated)
+'''
+GIT_UNTRACKED_MODES = ('no', 'normal', 'all')
+'''
+Possible values for ``--untracked-files``:
+
+* ``no`` skips scanning for untracked files at all
+* ``normal`` reports untracked folders, without looking inside
+* ``all`` reports each untracked file
+'''
 
 
 class GitStatus(namedtuple('GitStatus', (
-        'clean', 'conflicting', 'deleted', 'modified', 'untracked'
+        'clean', 'conflicting', 'deleted', 'modified', 'untracked',
+        'renamed', 'submodules'
 ))):
     '''
     :arg clean: Is ``True`` if there are pending changes, otherwise ``False``
@@ -24,6 +88,35 @@ class GitStatus(namedtuple('GitStatus', (
     :arg deleted: Removed files
     :arg modified: Files with modifications
     :arg untracked: Files not yet added end up here
+    :arg renamed: Renamed (or copied) files as tuples of
+                  original and new path
+    :arg submodules: Changed submodules as :class:`GitSubmodule`
+    '''
+
+
+class GitSubmodule(namedtuple('GitSubmodule', (
+        'path', 'commit', 'modified', 'untracked'
+))):
+    '''
+    :arg path: Location of the submodule
+    :arg commit: Is ``True`` if the checked out commit changed
+    :arg modified: Is ``True`` if tracked files inside were modified
+    :arg untracked: Is ``True`` if there are untracked files inside
+    '''
+
+
+class GitSnapshot(namedtuple('GitSnapshot', (
+        'status', 'oid', 'branch', 'upstream', 'ahead', 'behind'
+))):
+    '''
+    :arg status: Current status as :class:`GitStatus`
+    :arg oid: Complete hash of the current commit
+              (``None`` if there are no commits yet)
+    :arg branch: Currently active branch (``None`` if detached)
+    :arg upstream: Upstream of the *branch* (``None`` if there is none)
+    :arg ahead: Commits of *branch* missing in *upstream*
+    :arg behind: Commits of *upstream* missing in *branch*
+                 (both ``None`` if there is no *upstream*)
     '''
 
 
@@ -46,6 +139,137 @@ class GitLog(namedtuple('GitLog', (
     '''
 
 
+class GitRevision(namedtuple('GitRevision', (
+        'kind', 'name', 'oid'
+))):
+    '''
+    :arg kind: One of ``branch``, ``tag``, ``remote``, ``ref`` (any other
+               ref) or ``commit`` (if not referred to by name)
+    :arg name: Full name of the ref (``None`` for commits)
+    :arg oid: Complete hash of the commit
+    '''
+
+
+class GitProfile(namedtuple('GitProfile', (
+        'env', 'config', 'query_env'
+))):
+    '''
+    :arg env: Environment variables for all git commands
+    :arg config: Configuration overrides for all git commands
+                 (passed as ``git -c key=value``)
+    :arg query_env: Additional environment variables for read-only
+                    queries (e.g. :attr:`Repository.status`)
+    '''
+
+
+GIT_PROFILES = dict(
+    default=GitProfile(env={}, config={}, query_env={}),
+    batch=GitProfile(
+        env=dict(
+            LC_ALL='C', GIT_TERMINAL_PROMPT='0', GIT_PAGER='cat',
+        ),
+        config={},
+        query_env=dict(GIT_OPTIONAL_LOCKS='0'),
+    ),
+    nohooks=GitProfile(
+        env=dict(
+            LC_ALL='C', GIT_TERMINAL_PROMPT='0', GIT_PAGER='cat',
+        ),
+        config={'core.hooksPath': devnull},
+        query_env=dict(GIT_OPTIONAL_LOCKS='0'),
+    ),
+)
+'''
+Named :class:`GitProfile` presets:
+
+* ``default`` inherits everything from the calling process
+* ``batch`` uses untranslated messages, never prompts for credentials,
+  never launches a pager and lets read-only queries skip optional locks
+  (so polling the :attr:`status <Repository.status>` does not contend
+  with a running sync)
+* ``nohooks`` is like ``batch``, but additionally skips all hooks
+'''
+
+
+class GitCloneMode(namedtuple('GitCloneMode', (
+        'filter', 'depth', 'single_branch', 'tags'
+))):
+    '''
+    :arg filter: Objects to leave out until needed (``--filter``),
+                 e.g. ``blob:none``. Use ``None`` to get everything
+    :arg depth: Number of commits to get (``--depth``).
+                Use ``None`` to get the complete history
+    :arg single_branch: Get only one branch (``--single-branch``)
+    :arg tags: Get tags (otherwise ``--no-tags``),
+               also when pulling
+    '''
+
+
+GIT_CLONE_MODES = dict(
+    full=GitCloneMode(
+        filter=None, depth=None, single_branch=False, tags=True
+    ),
+    blobless=GitCloneMode(
+        filter='blob:none', depth=None, single_branch=False, tags=True
+    ),
+    treeless=GitCloneMode(
+        filter='tree:0', depth=None, single_branch=False, tags=True
+    ),
+    shallow=GitCloneMode(
+        filter=None, depth=1, single_branch=True, tags=False
+    ),
+)
+'''
+Named :class:`GitCloneMode` presets:
+
+* ``full`` gets everything, like a plain ``git clone``
+* ``blobless`` gets all commits and trees, file contents
+  are fetched once they are needed
+* ``treeless`` gets all commits, trees and file contents
+  are fetched once they are needed
+* ``shallow`` gets only the latest commit of one branch, without tags
+  (see :meth:`Repository.deepen` to get more)
+
+Partial clones (*filter*) need a server allowing this
+(``uploadpack.allowFilter``). Local paths as remote URL ignore
+*filter* and *depth*, ``file://`` URLs do not.
+'''
+
+
+def _cached(func):
+    '''
+    Decorator for read-only queries of :class:`Repository`.
+    Results are kept in its :class:`ResultCache
+    <git_sh_sync.cache.ResultCache>`, keyed by the name of the
+    query and its arguments.
+    '''
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        '''Runs *func* only if the result is not known yet'''
+        return self.cache(
+            (func.__name__, args, tuple(sorted(kwargs.items()))),
+            lambda: func(self, *args, **kwargs)
+        )
+    return wrapper
+
+
+def _invalidates(func):
+    '''
+    Decorator for methods of :class:`Repository` which change the
+    repository. Clears its :class:`ResultCache
+    <git_sh_sync.cache.ResultCache>` afterwards.
+    '''
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        '''Runs *func*, then clears the cache'''
+        cache = self.cache
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            cache.clear()
+    return wrapper
+
+
 class Repository:
     '''
     Handles communications with git repositories, using native ``git``
@@ -54,7 +278,10 @@ class Repository:
 
     def __init__(
             self, location, *,
-            master_branch='master', remote_name='origin', remote_url=None
+            master_branch='master', remote_name='origin', remote_url=None,
+            timeout=None, spill=SPILL_SIZE, cache=True, profile='default',
+            untracked='normal', lazy=False, strategy='checkout',
+            clone_mode='full', object_cache=None, dissociate=False
     ):
         '''
         Initialize a new Repository
@@ -63,43 +290,232 @@ class Repository:
         :param master_branch: Name of the master branch
         :param remote_name: Default name of the remote
         :param remote_url: Remote URL of the repository
+        :param timeout: Seconds until commands talking to the remote
+                        (clone, pull, push) are killed.
+                        Use ``None`` to wait forever
+        :param spill: Bytes of output to keep in memory for potentially
+                      huge outputs (like :meth:`remote_tips`), see
+                      :class:`Command <git_sh_sync.proc.Command>`
+        :param cache: Keep results of read-only queries (e.g. :attr:`tags`
+                      or :meth:`branches`) as long as the repository
+                      does not change, see
+                      :class:`ResultCache <git_sh_sync.cache.ResultCache>`
+        :param profile: Name of one of the :const:`GIT_PROFILES`
+                        or some :class:`GitProfile`
+        :param untracked: One of :const:`GIT_UNTRACKED_MODES`,
+                          used for :attr:`status`
+        :param lazy: Postpone everything touching the disk
+                     until the repository is used for the first time
+        :param strategy: One of :const:`SCRUB_STRATEGIES`,
+                         used for :meth:`scrub`
+        :param clone_mode: Name of one of the :const:`GIT_CLONE_MODES`
+                           or some :class:`GitCloneMode`, used for
+                           :meth:`initialize` and :meth:`cleanup`
+        :param object_cache: Some :class:`ObjectCache
+                             <git_sh_sync.store.ObjectCache>` to borrow
+                             objects from when cloning
+        :param dissociate: Copy the borrowed objects after cloning
+                           (``--dissociate``), so the clone does not
+                           depend on the *object_cache* afterwards
 
         Calls then :meth:`initialize` to set everything up
+        (and :meth:`checkout` afterwards).
+        See :meth:`open`, :meth:`clone` and :meth:`init` for
+        more explicit ways.
         '''
         self._log = getLogger(self.__class__.__name__)
 
-        self.location = ensured(location, folder=True)
+        self.location = path.abspath(
+            path.expandvars(path.expanduser(location))
+        )
         self.master_branch = master_branch.strip()
         self.remote_name = remote_name.strip()
+        self.timeout = timeout
+        self.spill = spill
+        self.untracked = untracked
+        if strategy not in SCRUB_STRATEGIES:
+            raise ValueError('unknown strategy "{}"'.format(strategy))
+        self.strategy = strategy
+        self.clone_mode = (
+            clone_mode if isinstance(clone_mode, GitCloneMode)
+            else GIT_CLONE_MODES[clone_mode]
+        )
+        self.object_cache = object_cache
+        self.dissociate = dissociate
+        self.profile = (
+            profile if isinstance(profile, GitProfile)
+            else GIT_PROFILES[profile]
+        )
+        self._objects = {}
+        self._cache = None
+        self._refs = None
+        self._deferred = ('setup', remote_url, cache)
 
+        if not lazy:
+            self._prepare()
+
+    @classmethod
+    def open(cls, location, **kwargs):
+        '''
+        Creates a handle for an already existing repository.
+
+        :param location: Local path of the repository
+        :param kwargs: Passed into :meth:`__init__`
+        :returns: A new handle
+        :rtype: :class:`Repository`
+
+        Nothing happens until the handle is used for the first time,
+        not even then the repository is initialized or checked out.
+        So this is cheap enough to create many handles for monitoring.
+        '''
+        kwargs.update(lazy=True, remote_url=None)
+        repo = cls(location, **kwargs)
+        repo._deferred = ('open', None, kwargs.get('cache', True))
+        return repo
+
+    @classmethod
+    def clone(cls, remote_url, location, **kwargs):
+        '''
+        Creates a handle, cloning the repository first if necessary.
+
+        :param remote_url: Remote URL of the repository
+        :param location: Local path of the repository
+        :param kwargs: Passed into :meth:`__init__` (e.g. *lazy*)
+        :returns: A new handle
+        :rtype: :class:`Repository`
+        '''
+        return cls(location, remote_url=remote_url, **kwargs)
+
+    @classmethod
+    def init(cls, location, **kwargs):
+        '''
+        Creates a handle, initializing a new repository first if necessary.
+
+        :param location: Local path of the repository
+        :param kwargs: Passed into :meth:`__init__` (e.g. *lazy*)
+        :returns: A new handle
+        :rtype: :class:`Repository`
+        '''
+        kwargs.update(remote_url=None)
+        return cls(location, **kwargs)
+
+    def _prepare(self):
+        '''
+        Runs the setup postponed by :meth:`__init__` (only once).
+        Is called on first use of the repository.
+
+        While commands are replayed (see :class:`Replayer
+        <git_sh_sync.replay.Replayer>`) the folder is not created.
+        '''
+        if self._deferred is None:
+            return
+
+        mode, remote_url, cache = self._deferred
+        self._deferred = None
+
+        if mode == 'open' or Command.replayer is not None:
+            self.location = joined(self.location)
+        else:
+            self.location = ensured(self.location, folder=True)
+        self._cache = ResultCache(self.location, enabled=cache)
+        self._refs = RefReader(self.location)
+
+        if mode == 'open':
+            return
         if self.initialize(remote_url):
             self.checkout()
 
+    @property
+    def cache(self):
+        '''
+        :returns: Results of read-only queries
+                  (see *cache* of :meth:`__init__`)
+        :rtype: :class:`ResultCache <git_sh_sync.cache.ResultCache>`
+        '''
+        self._prepare()
+        return self._cache
+
+    def _git(self, line, *, query=False, **kwargs):
+        '''
+        Prepares a git command inside the repository,
+        applying the :class:`profile <GitProfile>`.
+
+        :param line: Commandline, starting with ``git``
+        :param query: Set to ``True`` for read-only queries
+        :param kwargs: Passed into :class:`Command
+                       <git_sh_sync.proc.Command>`
+                       (an *env* is applied on top of the profile)
+        :returns: The command, not yet launched
+        '''
+        self._prepare()
+        head, *tail = split(line) if isinstance(line, str) else line
+        config = [
+            arg for key, val in sorted(self.profile.config.items())
+            for arg in ('-c', '{}={}'.format(key, val))
+        ]
+        env = dict(self.profile.env)
+        if query:
+            env.update(self.profile.query_env)
+        env.update(kwargs.pop('env', None) or {})
+
+        return Command(
+            [head, *config, *tail], cwd=self.location, env=env, **kwargs
+        )
+
     @property
     def is_repo(self):
         '''
         Verifies if current :class:`Repository` is indeed a git repository.
+
+        Looks into the git folder first (see :class:`RefReader
+        <git_sh_sync.refs.RefReader>`), git is asked only for
+        layouts it does not know.
         '''
-        cmd = Command('git rev-parse --show-toplevel', cwd=self.location)
+        self._prepare()
+        if self._refs.supported:
+            return True
+        if direct_reads() and not path.exists(
+                joined(self.location, '.git')
+        ):
+            return False
+
+        cmd = self._git('git rev-parse --show-toplevel', query=True)
         return cmd() and cmd.stdout == self.location
 
+    @_invalidates
     def initialize(self, remote_url=None):
         '''
         Is called from inside :meth:`__init__` to prepare the repository.
         Checks :attr:`is_repo` first to bail out early.
         If no *remote_url* is given a new repository is initialized.
-        Otherwise a clone from the *remote_url* is attempted.
+        Otherwise a clone from the *remote_url* is attempted
+        (according to the *clone_mode*). If there is an *object_cache*,
+        its mirror of *remote_url* is used as reference
+        (if the mirror can not be created, the clone runs without).
         '''
         if self.is_repo:
             return True
 
         if remote_url is not None:
-            cmd = Command('git clone "{}" -o "{}" .'.format(
-                remote_url, self.remote_name
-            ), cwd=self.location)
+            mode = self.clone_mode
+            reference = []
+            if self.object_cache is not None:
+                mirror = self.object_cache.ensure(remote_url)
+                if mirror is not None:
+                    reference = ['--reference-if-able', mirror]
+                    if self.dissociate:
+                        reference.append('--dissociate')
+            cmd = self._git([
+                'git', 'clone', remote_url, '-o', self.remote_name,
+                *(['--filter={}'.format(mode.filter)] if mode.filter else []),
+                *(['--depth={}'.format(mode.depth)] if mode.depth else []),
+                *(['--single-branch'] if mode.single_branch else []),
+                *(['--no-tags'] if not mode.tags else []),
+                *reference, '.'
+            ], timeout=self.timeout)
             return cmd()
 
-        cmd = Command('git init', cwd=self.location)
+        cmd = self._git('git init')
         return cmd()
 
     @property
@@ -110,23 +526,125 @@ class Repository:
         :returns: Current status
         :rtype: :class:`GitStatus`
 
+        Same as :meth:`scan`, using the *untracked* mode
+        of :meth:`__init__`.
+        '''
+        return self.scan(untracked=self.untracked)
+
+    def scan(self, untracked='normal'):
+        '''
+        Determines current status of the repository.
+
+        :param untracked: One of :const:`GIT_UNTRACKED_MODES`
+        :returns: Current status
+        :rtype: :class:`GitStatus`
+
         Generates lists of changed files according to matching state.
+        Streams the ``--porcelain=v2 -z`` output record by record,
+        so paths are taken literally (spaces, quotes or newlines
+        included), each record is classified by the
+        :const:`GIT_STATUS_TABLE`. Only conflicting, deleted, modified
+        and untracked files count against *clean* - these are the
+        ones :meth:`mutate` takes care of.
+        '''
+        status, _ = self._scan(untracked)
+        return status
+
+    def snapshot(self, untracked=None):
         '''
-        symbols = dict(
-            conflicting='U', deleted='D', modified='M', untracked='?'
+        Determines current status and branch of the repository at once.
+
+        :param untracked: One of :const:`GIT_UNTRACKED_MODES`,
+                          if left blank the one of :meth:`__init__`
+        :returns: Current state
+        :rtype: :class:`GitSnapshot`
+
+        Same as :meth:`scan`, but uses the ``--branch`` headers of the
+        very same command to find out about the current branch,
+        its upstream and how far they diverged.
+        '''
+        if untracked is None:
+            untracked = self.untracked
+
+        status, headers = self._scan(untracked, branch=True)
+        oid = headers.get('branch.oid')
+        head = headers.get('branch.head')
+        ahead, behind = None, None
+        if 'branch.ab' in headers:
+            ahead, behind = (
+                abs(int(num)) for num in headers['branch.ab'].split()
+            )
+
+        return GitSnapshot(
+            status=status,
+            oid=None if oid == '(initial)' else oid,
+            branch=None if head == '(detached)' else head,
+            upstream=headers.get('branch.upstream'),
+            ahead=ahead, behind=behind
         )
-        res = dict((key, []) for key in symbols)
 
-        cmd = Command('git status --porcelain', cwd=self.location)
-        if cmd():
-            for elem in cmd.out:
-                sym, _, tail = elem.partition(' ')
-                for key, state in symbols.items():
-                    if state in sym:
-                        res[key].append(tail.strip())
+    def _scan(self, untracked, branch=False):
+        '''
+        Helper for :meth:`scan` and :meth:`snapshot`.
 
-        return GitStatus(**res, clean=not any(res.values()))
+        :param untracked: One of :const:`GIT_UNTRACKED_MODES`
+        :param branch: Ask for the ``--branch`` headers
+        :returns: Current status and the headers by name
+        :rtype: tuple
+
+        Records are read as bytes and paths decoded with
+        :py:func:`os.fsdecode`, so they are kept literally
+        (no newline translation).
+        '''
+        if untracked not in GIT_UNTRACKED_MODES:
+            raise ValueError('unknown untracked mode "{}"'.format(untracked))
+
+        res = dict(
+            (key, []) for key in (
+                'conflicting', 'deleted', 'modified', 'untracked',
+                'renamed', 'submodules'
+            )
+        )
+        headers = {}
+        cmd = self._git(
+            'git status --porcelain=v2 -z --untracked-files={}{}'.format(
+                untracked, ' --branch' if branch else ''
+            ), query=True, binary=True
+        )
+        records = (fsdecode(elem) for elem in cmd.stream(sep=CHAR_NUL))
+        for elem in records:
+            kind = elem[:1]
+            if kind == '#':
+                name, _, value = elem[2:].partition(' ')
+                headers[name] = value
+                continue
+            if kind == '?':
+                res['untracked'].append(elem[2:])
+                continue
+            if kind not in ('1', '2', 'u'):
+                continue
+
+            fields = elem.split(' ', {'1': 8, '2': 9, 'u': 10}[kind])
+            xy_sym, sub, tail = fields[1], fields[2], fields[-1]
+            for key in GIT_STATUS_TABLE.get(xy_sym, ()):
+                res[key].append(tail)
+            if kind == 'u' and 'U' not in xy_sym:
+                res['conflicting'].append(tail)
+            if kind == '2':
+                res['renamed'].append((next(records, ''), tail))
+            if sub[0] == 'S':
+                res['submodules'].append(GitSubmodule(
+                    path=tail, commit=sub[1] == 'C',
+                    modified=sub[2] == 'M', untracked=sub[3] == 'U'
+                ))
+
+        return GitStatus(**res, clean=not any(
+            res[key] for key in (
+                'conflicting', 'deleted', 'modified', 'untracked'
+            )
+        )), headers
 
+    @_cached
     def branches(self):
         '''
         Collects all branches of the repository
@@ -135,9 +653,22 @@ class Repository:
         :rtype: :class:`GitBranches`
 
         Signals current branch and a list of all other branches.
+        The refs are read directly (see :class:`RefReader
+        <git_sh_sync.refs.RefReader>`) unless ``HEAD`` is detached or
+        the layout is unknown.
         '''
+        head, heads = self._refs.head(), self._refs.refs(REF_HEADS)
+        if head is not None and heads is not None and (
+                head[0] is not None and head[0].startswith(REF_HEADS)
+        ):
+            current = head[0][len(REF_HEADS):]
+            names = sorted(name[len(REF_HEADS):] for name in heads)
+            if current not in names:
+                names.append(current)
+            return GitBranches(current=current, all=names)
+
         res = dict(current=None, all=[])
-        cmd = Command('git branch', cwd=self.location)
+        cmd = self._git('git branch', query=True)
         if cmd():
             for elem in cmd.out:
                 if '*' in elem:
@@ -146,14 +677,41 @@ class Repository:
                 res['all'].append(elem.strip())
 
         if res['current'] is None:
-            cmd = Command('git symbolic-ref --short HEAD', cwd=self.location)
+            cmd = self._git('git symbolic-ref --short HEAD', query=True)
             if cmd():
                 res['current'] = cmd.stdout
                 res['all'].append(cmd.stdout)
 
         return GitBranches(**res)
 
+    def _read_refs(self, prefix):
+        '''
+        Helper to collect refs, directly (see :class:`RefReader
+        <git_sh_sync.refs.RefReader>`) or by asking git.
+
+        :param prefix: Only refs starting with this are collected
+        :returns: Full names of refs and the complete hashes they point to,
+                  ``None`` if git failed
+        :rtype: dict
+        '''
+        refs = self._refs.refs(prefix)
+        if refs is not None:
+            return refs
+
+        cmd = self._git([
+            'git', 'for-each-ref', '--format=%(objectname) %(refname)', prefix
+        ], query=True, spill=self.spill)
+        if not cmd():
+            return None
+        res = {}
+        for elem in cmd.records():
+            oid, _, name = elem.partition(' ')
+            if name:
+                res[name] = oid
+        return res
+
     @property
+    @_cached
     def remote_names(self):
         '''
         Emit names of the remotes.
@@ -163,10 +721,15 @@ class Repository:
         :returns: Remote names
         :rtype: list
         '''
-        cmd = Command('git remote show -n', cwd=self.location)
+        names = self._refs.remotes()
+        if names is not None:
+            return names
+
+        cmd = self._git('git remote show -n', query=True)
         cmd()
         return cmd.out
 
+    @_cached
     def remote_url(self, remote=None):
         '''
         Retrieve URL of remote by name.
@@ -177,13 +740,14 @@ class Repository:
         if remote is None:
             remote = self.remote_name
 
-        cmd = Command(
-            'git remote get-url --push "{}"'.format(remote), cwd=self.location
+        cmd = self._git(
+            'git remote get-url --push "{}"'.format(remote), query=True
         )
         if cmd():
             return cmd.stdout
         return None
 
+    @_cached
     def log(self, num=-1):
         '''
         Retrieve log of repository
@@ -193,16 +757,99 @@ class Repository:
         :rtype: list of :class:`GitLog`
         '''
         result = []
-        cmd = Command('git log --max-count {} --format="{}"'.format(
+        cmd = self._git('git log -z --max-count {} --format="{}"'.format(
             num, GIT_DIVIDER.join(['%h', '%H', '%B'])
-        ), cwd=self.location)
-        if cmd():
-            for elem in (el for el in cmd.out if el):
-                short, full, message = elem.split(GIT_DIVIDER)
-                result.append(GitLog(short=short, full=full, message=message))
+        ), query=True)
+        for elem in cmd.stream(sep=CHAR_NUL):
+            short, full, message = elem.split(GIT_DIVIDER, 2)
+            result.append(GitLog(
+                short=short, full=full, message=message.strip()
+            ))
         return result
 
+    def objects(self, *revs, contents=True):
+        '''
+        Reads objects out of the repository.
+
+        :param revs: Object names, e.g. ``HEAD``, ``master:README.rst``
+                     or some hash
+        :param contents: Read contents of objects, otherwise only metadata
+        :returns: Objects in the same order as *revs*, ``None`` for
+                  those that could not be found
+        :rtype: list of :class:`GitObject <git_sh_sync.batch.GitObject>`
+
+        The lookups happen inside a long-lived
+        :class:`CatFile <git_sh_sync.batch.CatFile>` coprocess,
+        which is kept running until :meth:`close` is called.
+        '''
+        self._prepare()
+        if contents not in self._objects:
+            self._objects[contents] = CatFile(
+                self.location, contents=contents,
+                env=dict(self.profile.env, **self.profile.query_env)
+            )
+        return self._objects[contents](*revs)
+
+    def read(self, filename, treeish=None):
+        '''
+        Reads contents of a file at some revision.
+
+        :param filename: Path of the file, relative to the repository
+        :param treeish: Commit (short or full), tag or branch.
+                        If left blank, ``HEAD`` is assumed
+        :returns: Contents of the file as bytes or ``None``
+        '''
+        if treeish is None:
+            treeish = 'HEAD'
+
+        obj, = self.objects('{}:{}'.format(treeish, filename))
+        if obj is None or obj.kind != 'blob':
+            return None
+        return obj.data
+
+    def close(self):
+        '''
+        Stops all coprocesses of :meth:`objects`.
+        '''
+        for cat in self._objects.values():
+            cat.close()
+        self._objects.clear()
+
+    @_cached
+    def resolve(self, treeish):
+        '''
+        Find out what some name refers to.
+
+        :param treeish: Commit (short or full), tag or branch
+        :returns: The resolved revision,
+                  ``None`` if *treeish* is not known
+        :rtype: :class:`GitRevision`
+
+        Needs one ``git rev-parse`` only, asking for the commit and the
+        full name of the ref at once.
+        '''
+        if not treeish or treeish.startswith('-'):
+            return None
+
+        cmd = self._git([
+            'git', 'rev-parse', '{}^{{commit}}'.format(treeish),
+            '--symbolic-full-name', treeish, '--'
+        ], query=True)
+        if not cmd():
+            return None
+
+        oid, *names = (elem for elem in cmd.out if elem != '--')
+        name = names[0] if names else None
+        kind = 'commit' if name is None else 'ref'
+        for prefix, ref_kind in GIT_REF_KINDS:
+            if name is not None and name.startswith(prefix):
+                kind = ref_kind
+                break
+
+        return GitRevision(kind=kind, name=name, oid=oid)
+
     @property
+    @_cached
     def tags(self):
         '''
         Query existing tags.
@@ -210,13 +857,20 @@ class Repository:
         :returns: Name of tags, newest first
         :rtype: list
         '''
-        cmd = Command(
+        tags = self._refs.refs(REF_TAGS)
+        if tags is not None:
+            return sorted((
+                name[len(REF_TAGS):] for name in tags
+            ), key=version_key, reverse=True)
+
+        cmd = self._git(
             'git tag --list --sort="-version:refname"',
-            cwd=self.location
+            query=True, spill=self.spill
         )
         cmd()
-        return cmd.out
+        return [elem for elem in cmd.records() if elem]
 
+    @_invalidates
     def tag(self, name):
         '''
         Stick tags onto commits.
@@ -224,9 +878,10 @@ class Repository:
         :param name: Tag name
         :returns: ``True`` if successful else ``False``
         '''
-        cmd = Command('git tag "{}"'.format(name), cwd=self.location)
+        cmd = self._git('git tag "{}"'.format(name))
         return cmd()
 
+    @_invalidates
     def checkout(self, treeish=None):
         '''
         Checkout a commit, tag or branch.
@@ -241,65 +896,79 @@ class Repository:
         if treeish is None:
             treeish = self.master_branch
 
-        def is_known():
-            '''
-            Helper to optimize detection if *treeish* is a known
-            tag, branch or commit.
-            '''
-            if treeish in self.tags:
-                return True
-
-            branches = self.branches()
-            for branch in branches.all:
-                if treeish in branch:
-                    return True
-
-            for log in self.log():
-                if treeish in log.short:
-                    return True
-                if treeish in log.full:
-                    return True
-            return False
-
         line = (
-            'git checkout "{}"' if is_known() else 'git checkout -b "{}"'
+            'git checkout "{}"' if self.resolve(treeish) is not None
+            else 'git checkout -b "{}"'
         ).format(treeish)
 
-        cmd = Command(line, cwd=self.location)
+        cmd = self._git(line)
         return cmd()
 
-    def mutate(self):
+    @_invalidates
+    def mutate(self, status=None, everything=False, index=None):
         '''
         Collects all changes and tries to add/remove them.
 
+        :param status: Recently determined :attr:`status`.
+                       If left blank, it is determined again
+        :param everything: Stage all changes of the working tree
+                           (``git add -A``) instead of only those
+                           listed in *status*
+        :param index: Path of some other index file to stage into
+                      (``GIT_INDEX_FILE``)
         :returns: ``True`` if everything went well, else ``False``
 
         Will freak out if there are conflicts detected
         - thus returning ``False`` and writing issues into the log.
+
+        All untracked and modified files are added by one command,
+        all deleted ones removed by another (paths are sent through
+        stdin, taken literally). Only if one of these fails because of
+        some path (see :const:`GIT_STAGE_ERRORS`), the paths are retried
+        one by one to find out which ones are at fault.
         '''
-        status = self.status
+        if status is None:
+            status = self.status
 
         if status.clean:
             return True
 
         results = []
+        env = dict(GIT_INDEX_FILE=index) if index is not None else None
 
-        def add(elem):
-            '''Helper to run git add onto one element'''
-            cmd = Command('git add "{}"'.format(elem), cwd=self.location)
-            return cmd()
+        def stage(line, paths):
+            '''Helper to run git add or git rm onto many paths'''
+            if not paths:
+                return True
+            cmd = self._git([
+                'git', '--literal-pathspecs', *split(line),
+                '--pathspec-from-file=-', '--pathspec-file-nul'
+            ], cin=fsencode(CHAR_NUL).join(
+                fsencode(elem) for elem in paths
+            ), env=dict(env or {}, LC_ALL='C'))
+            if cmd():
+                return True
+            if len(paths) == 1:
+                self._log.error(
+                    'could not stage "%s" in "%s"', paths[0], self.location
+                )
+                return False
+            if not any(part in cmd.stderr for part in GIT_STAGE_ERRORS):
+                self._log.error(
+                    'could not stage %d paths in "%s"',
+                    len(paths), self.location
+                )
+                return False
+            return all([stage(line, [elem]) for elem in paths])
 
-        def remove(elem):
-            '''Helper to run git rm onto one element'''
-            cmd = Command('git rm "{}"'.format(elem), cwd=self.location)
-            return cmd()
+        if everything:
+            results.append(self._git('git add -A', env=env)())
+        else:
+            results.append(stage(
+                'add', [*status.untracked, *status.modified]
+            ))
+            results.append(stage('rm --ignore-unmatch', status.deleted))
 
-        for elem in status.untracked:
-            results.append(add(elem))
-        for elem in status.modified:
-            results.append(add(elem))
-        for elem in status.deleted:
-            results.append(remove(elem))
         for elem in status.conflicting:
             self._log.error(
                 'conflicting file "%s" discovered in "%s"',
@@ -309,49 +978,287 @@ class Repository:
 
         return all(results)
 
-    def scrub(self, branch_name=None):
+    @_invalidates
+    def scrub(self, branch_name=None, snapshot=None):
         '''
         Uses :meth:`mutate` to handle all changes and commits them into
         a temporary branch. Will merge the branches back into the original
         branch afterwards.
+        How this is done depends on the *strategy* (see
+        :const:`SCRUB_STRATEGIES`).
 
         :param branch_name: Name of the temporary branch.
                             Will use the :func:`current hostname
                             <git_sh_sync.util.host.get_hostname>`
                             if left blank.
+        :param snapshot: Recently determined :meth:`snapshot`.
+                         If left blank, it is determined again
         :returns: ``True`` if everything went well (or there is nothing to do),
                   ``False`` otherwise
         '''
-        if self.status.clean:
+        if snapshot is None:
+            snapshot = self.snapshot()
+
+        status = snapshot.status
+        if status.clean:
             return True
 
-        branches = self.branches()
+        current = (
+            snapshot.branch if snapshot.branch is not None else snapshot.oid
+        )
         hostname = get_hostname(short=True)
         if branch_name is None:
             branch_name = hostname
 
+        if self.strategy == 'plumbing':
+            return self._scrub_plumbing(
+                snapshot, branch_name, '{} auto commit'.format(hostname)
+            )
+
         self.checkout(branch_name)
 
-        if not self.mutate():
+        if not self.mutate(status=status):
             self._log.warning(
                 'problems discovered, will not continue to clean "%s"',
                 self.location
             )
             return False
 
-        cmd = Command('git commit --message="{} auto commit"'.format(
+        cmd = self._git('git commit --message="{} auto commit"'.format(
             hostname
-        ), cwd=self.location)
+        ))
         cmd()
 
-        self.checkout(branches.current)
+        self.checkout(current)
 
-        cmd = Command('git merge "{}" --message="{} auto merge"'.format(
+        cmd = self._git('git merge "{}" --message="{} auto merge"'.format(
             branch_name, hostname
-        ), cwd=self.location)
+        ))
         return cmd()
 
-    def cleanup(self, branch_name=None, remote_name=None):
+    def _scrub_plumbing(self, snapshot, branch_name, message):
+        '''
+        Helper for :meth:`scrub`, building the commit without
+        touching the working tree.
+
+        :param snapshot: Recently determined :meth:`snapshot`
+        :param branch_name: Name of the temporary branch
+        :param message: Message of the commit
+        :returns: ``True`` if everything went well, ``False`` otherwise
+
+        Copies the index into ``index.lock`` (which also keeps other git
+        commands from changing the index meanwhile), stages all changes
+        there (without an index yet, git creates a new one), builds
+        the commit by ``write-tree`` and ``commit-tree`` on
+        top of the current commit, moves the temporary branch and the
+        current branch (a fast-forward, like the merge would do) with
+        one ``update-ref --stdin`` transaction and finally moves
+        ``index.lock`` into place.
+
+        An already existing temporary branch has to be merged into the
+        current commit, otherwise nothing is done (use the ``checkout``
+        strategy to merge it). Both refs are only moved if they still
+        point where they did before, and either both or none of them.
+        If the temporary branch is the current branch, only that one
+        is moved.
+        '''
+        tip = self._git([
+            'git', 'rev-parse', '--verify', '--quiet',
+            '{}{}^{{commit}}'.format(REF_HEADS, branch_name)
+        ], query=True)
+        old_tip = tip.stdout if tip() else ''
+        if old_tip and old_tip != snapshot.oid and not (
+                snapshot.oid and self._git([
+                    'git', 'merge-base', '--is-ancestor',
+                    old_tip, snapshot.oid
+                ], query=True)()
+        ):
+            self._log.error(
+                'branch "%s" of "%s" is not merged, will not move it',
+                branch_name, self.location
+            )
+            return False
+
+        folder, _ = git_folder(self.location)
+        index = path.join(folder, 'index')
+        lock = '{}.lock'.format(index)
+        try:
+            handle = open(lock, 'xb')
+        except OSError as exc:
+            self._log.error(
+                'could not lock index of "%s": %s', self.location, exc
+            )
+            return False
+
+        success = False
+        try:
+            with handle:
+                if path.exists(index):
+                    with open(index, 'rb') as source:
+                        copyfileobj(source, handle)
+            if not path.exists(index):
+                remove(lock)
+
+            if not self.mutate(status=snapshot.status, index=lock):
+                self._log.warning(
+                    'problems discovered, will not continue to clean "%s"',
+                    self.location
+                )
+                return False
+
+            tree = self._git(
+                'git write-tree', env=dict(GIT_INDEX_FILE=lock)
+            )
+            if not tree():
+                return False
+            commit = self._git([
+                'git', 'commit-tree', tree.stdout,
+                *(['-p', snapshot.oid] if snapshot.oid else []),
+                '-m', message
+            ])
+            if not commit():
+                return False
+
+            missing = '0' * len(commit.stdout)
+            updates = [('HEAD', snapshot.oid or missing)]
+            if branch_name != snapshot.branch:
+                updates.insert(0, (
+                    '{}{}'.format(REF_HEADS, branch_name), old_tip or missing
+                ))
+            refs = self._git([
+                'git', 'update-ref', '-m', message, '--stdin'
+            ], cin=''.join(
+                'update {} {} {}\n'.format(ref, commit.stdout, old)
+                for ref, old in updates
+            ))
+            if not refs():
+                return False
+
+            replace(lock, index)
+            success = True
+            return True
+        finally:
+            if not success and path.exists(lock):
+                remove(lock)
+
+    @property
+    def is_shallow(self):
+        '''
+        :returns: ``True`` if parts of the history are missing
+                  (see :meth:`deepen`), otherwise ``False``
+        '''
+        self._prepare()
+        _, common = git_folder(self.location)
+        return path.isfile(path.join(common, 'shallow'))
+
+    @_invalidates
+    def deepen(self, depth=None, remote_name=None):
+        '''
+        Gets more of the history of a shallow repository.
+
+        :param depth: Number of additional commits to get.
+                      If left blank, the complete history is fetched
+        :param remote_name: Name of the remote to fetch from.
+                            If left blank, class wide *remote_name* is taken.
+        :returns: ``True`` if successful (or there is nothing to do),
+                  otherwise ``False``
+        '''
+        if not self.is_shallow:
+            return True
+        if remote_name is None:
+            remote_name = self.remote_name
+
+        cmd = self._git([
+            'git', 'fetch',
+            '--deepen={}'.format(depth) if depth else '--unshallow',
+            remote_name
+        ], timeout=self.timeout)
+        return cmd()
+
+    def remote_tips(self, remote_name=None):
+        '''
+        Asks the remote for its branches (and tags, if the *clone_mode*
+        gets them) - a single round trip, nothing is fetched.
+
+        :param remote_name: Name of the remote to ask.
+                            If left blank, class wide *remote_name* is taken.
+        :returns: Full names of the refs and the complete hashes they
+                  point to, ``None`` if the remote could not be reached
+        :rtype: dict
+        '''
+        if remote_name is None:
+            remote_name = self.remote_name
+
+        cmd = self._git([
+            'git', 'ls-remote', '--heads',
+            *(['--tags'] if self.clone_mode.tags else []), remote_name
+        ], query=True, timeout=self.timeout, spill=self.spill)
+        if not cmd():
+            return None
+
+        res = {}
+        for elem in cmd.records():
+            oid, _, name = elem.partition('\t')
+            if name and not name.endswith('^{}'):
+                res[name] = oid
+        return res
+
+    def unchanged(self, snapshot=None, remote_name=None, branch_name=None):
+        '''
+        Finds out if a sync would do nothing.
+
+        :param snapshot: Recently determined :meth:`snapshot`.
+                         If left blank, it is determined again
+        :param remote_name: Name of the remote.
+                            If left blank, class wide *remote_name* is taken.
+        :param branch_name: Name of the branch to sync.
+                            If left blank, class wide *master_branch*
+                            is taken.
+        :returns: ``True`` if neither side changed, otherwise ``False``
+
+        The last seen tips of the remote are its remote-tracking refs
+        (updated by each pull). Nothing changed if the working tree is
+        clean, *branch_name* is checked out and on par with its
+        remote-tracking ref, and the :meth:`remote_tips` still are the
+        same (the tags as well, if the *clone_mode* gets them).
+        '''
+        if snapshot is None:
+            snapshot = self.snapshot()
+        if remote_name is None:
+            remote_name = self.remote_name
+        if branch_name is None:
+            branch_name = self.master_branch
+
+        upstream = '{}/{}'.format(remote_name, branch_name)
+        if not snapshot.status.clean or snapshot.oid is None:
+            return False
+        if snapshot.branch != branch_name or snapshot.upstream != upstream:
+            return False
+        if snapshot.ahead or snapshot.behind:
+            return False
+
+        tips = self.remote_tips(remote_name)
+        if tips is None:
+            return False
+        if tips.get('{}{}'.format(REF_HEADS, branch_name)) != snapshot.oid:
+            return False
+
+        if self.clone_mode.tags:
+            remote_tags = dict(
+                (name, oid) for name, oid in tips.items()
+                if name.startswith(REF_TAGS)
+            )
+            local_tags = self._read_refs(REF_TAGS)
+            if local_tags is None or any(
+                    local_tags.get(name) != oid
+                    for name, oid in remote_tags.items()
+            ):
+                return False
+
+        return True
+
+    @_invalidates
+    def cleanup(self, branch_name=None, remote_name=None, snapshot=None):
         '''
         Uses :meth:`scrub` to form a new commit and pulls afterwards.
 
@@ -359,18 +1266,20 @@ class Repository:
         :param remote_name: Name of the remote to pull from. For best results
                             this should be some part of :meth:`remote_names`.
                             If left blank, class wide *remote_name* is taken.
+        :param snapshot: Recently determined :meth:`snapshot`
+                         (see :meth:`scrub`)
 
         :returns: ``True`` on success, ``False`` otherwise
         '''
-        if not self.scrub(branch_name=branch_name):
+        if not self.scrub(branch_name=branch_name, snapshot=snapshot):
             return False
 
         if remote_name is None:
             remote_name = self.remote_name
 
-        cmd = Command('git pull --tags "{}"'.format(
-            remote_name
-        ), cwd=self.location)
+        cmd = self._git('git pull {}"{}"'.format(
+            '--tags ' if self.clone_mode.tags else '', remote_name
+        ), timeout=self.timeout)
         if not cmd():
             if 'conflict' in cmd.stdout.lower():
                 self._log.error(
@@ -381,14 +1290,18 @@ class Repository:
 
         return True
 
+    @_invalidates
     def __call__(
             self,
-            temp_branch_name=None, push_branch_name=None, remote_name=None
+            temp_branch_name=None, push_branch_name=None, remote_name=None,
+            snapshot=None, force=False
     ):
         '''
         Does a :meth:`cleanup <cleanup>` and tries to push afterwards.
         Will not push if something goes wrong with
         the :meth:`cleanup <cleanup>`.
+        Nothing of this happens if neither side changed
+        (see :meth:`unchanged`).
 
         :param temp_branch_name: Name of the temporary branch
                                  (see :meth:`scrub`)
@@ -397,6 +1310,10 @@ class Repository:
                                  set to ``None``
         :param remote_name: Name of the remote to pull from
                             (see :meth:`cleanup`)
+        :param snapshot: Recently determined :meth:`snapshot`
+                         (see :meth:`scrub`)
+        :param force: Use ``True`` to pull and push even if
+                      nothing changed
 
         :returns: ``True`` if everything went well, ``False`` otherwise
         '''
@@ -404,14 +1321,26 @@ class Repository:
             push_branch_name = self.master_branch
         if remote_name is None:
             remote_name = self.remote_name
+        if snapshot is None:
+            snapshot = self.snapshot()
+
+        if not force and self.unchanged(
+                snapshot, remote_name=remote_name, branch_name=push_branch_name
+        ):
+            self._log.info(
+                'nothing changed in "%s" or on "%s", skipping sync',
+                self.location, remote_name
+            )
+            return True
 
         if not self.cleanup(
                 branch_name=temp_branch_name,
-                remote_name=remote_name
+                remote_name=remote_name,
+                snapshot=snapshot
         ):
             return False
 
-        cmd = Command('git push -u "{}" "{}"'.format(
+        cmd = self._git('git push -u "{}" "{}"'.format(
             remote_name, push_branch_name
-        ), cwd=self.location)
+        ), timeout=self.timeout)
         return cmd()
@@ -0,0 +1,116 @@
+'''
+This module allows sharing objects between clones of the same remote.
+Namely through bare mirrors inside some cache folder, which are used as
+reference (alternates) when cloning.
+'''
+from hashlib import sha1
+from logging import getLogger
+from os import listdir, path
+from threading import Lock
+
+from git_sh_sync.proc import Command
+from git_sh_sync.util.disk import ensured, joined
+
+STORE_CONFIG = {'gc.pruneExpire': 'never'}
+'''
+Configuration of each mirror. Clones borrow objects from the mirrors,
+so objects no longer referenced must never be pruned away
+'''
+
+
+class ObjectCache:
+    '''
+    Keeps one bare mirror per remote URL inside a folder, to be used
+    as reference for clones of the same remote
+    (see *object_cache* of :class:`Repository
+    <git_sh_sync.repo.Repository>`)
+    '''
+
+    def __init__(self, location, *, timeout=None):
+        '''
+        Initialize a new cache
+
+        :param location: Local path of the cache folder
+        :param timeout: Seconds until commands talking to the remote
+                        (clone, fetch) are killed.
+                        Use ``None`` to wait forever
+        '''
+        self._log = getLogger(self.__class__.__name__)
+        self._lock = Lock()
+
+        self.location = joined(location)
+        self.timeout = timeout
+
+    def mirror(self, remote_url):
+        '''
+        :param remote_url: Remote URL of some repository
+        :returns: Local path of the mirror of *remote_url*
+                  (which may not exist yet)
+        '''
+        return joined(self.location, '{}.git'.format(
+            sha1(remote_url.encode('utf-8')).hexdigest()
+        ))
+
+    @property
+    def mirrors(self):
+        '''
+        :returns: Local paths of all existing mirrors
+        :rtype: list
+        '''
+        if not path.isdir(self.location):
+            return []
+        return sorted(
+            joined(self.location, name) for name in listdir(self.location)
+            if name.endswith('.git')
+        )
+
+    def ensure(self, remote_url):
+        '''
+        Creates the mirror of some remote, if not already there.
+
+        :param remote_url: Remote URL of some repository
+        :returns: Local path of the mirror, or ``None``
+                  if it could not be created
+        '''
+        location = self.mirror(remote_url)
+        with self._lock:
+            if path.isdir(location):
+                return location
+
+            cmd = Command([
+                'git', 'clone', '--mirror', remote_url, location
+            ], cwd=ensured(self.location, folder=True), timeout=self.timeout)
+            if not cmd():
+                return None
+
+            for key, val in sorted(STORE_CONFIG.items()):
+                Command(['git', 'config', key, val], cwd=location)()
+            self._log.info(
+                'mirror of "%s" created in "%s"', remote_url, location
+            )
+            return location
+
+    def refresh(self, remote_url=None):
+        '''
+        Fetches everything new into the mirrors. Clones referencing them
+        then only need to get what the mirrors do not already have.
+
+        :param remote_url: Remote URL of the mirror to refresh.
+                           If left blank, all mirrors are refreshed
+        :returns: ``True`` if everything went well, ``False`` otherwise
+        '''
+        if remote_url is not None:
+            locations = [self.mirror(remote_url)]
+        else:
+            locations = self.mirrors
+
+        results = []
+        for location in locations:
+            if not path.isdir(location):
+                results.append(False)
+                continue
+            cmd = Command(
+                'git fetch --prune origin', cwd=location, timeout=self.timeout
+            )
+            results.append(cmd())
+        return all(results)
@@ -0,0 +1,502 @@
+'''
+This module allows syncing repositories as soon as they change.
+Namely by watching their working trees (using inotify where available),
+instead of polling their status on a timer.
+'''
+from collections import namedtuple
+from ctypes import CDLL, get_errno
+from ctypes.util import find_library
+from logging import getLogger
+from os import O_CLOEXEC, O_NONBLOCK, close, fsencode, lstat, path, read, walk
+from selectors import EVENT_READ, DefaultSelector
+from struct import calcsize, unpack_from
+from threading import Event, Lock, Thread
+from time import monotonic, sleep
+
+from git_sh_sync.repo import Repository
+from git_sh_sync.util.disk import joined
+
+WATCH_IGNORE = ('.git',)
+'''
+Names of folders inside the working tree which are not watched
+(changes there are made by git itself)
+'''
+INOTIFY_MASK = (
+    0x00000002 |  # IN_MODIFY
+    0x00000004 |  # IN_ATTRIB
+    0x00000040 |  # IN_MOVED_FROM
+    0x00000080 |  # IN_MOVED_TO
+    0x00000100 |  # IN_CREATE
+    0x00000200    # IN_DELETE
+)
+'''
+Events of files and folders inside the working tree to watch for
+'''
+INOTIFY_NEW = (
+    0x00000080 |  # IN_MOVED_TO
+    0x00000100    # IN_CREATE
+)
+'''
+Events of new entries (which need to be watched as well, if folders)
+'''
+INOTIFY_ISDIR = 0x40000000
+'''
+Flag of events about folders
+'''
+INOTIFY_OVERFLOW = 0x00004000
+'''
+Flag of the event signalling lost events
+'''
+INOTIFY_IGNORED = 0x00008000
+'''
+Flag of the event signalling a removed watch (e.g. the folder is gone)
+'''
+INOTIFY_HEADER = 'iIII'
+'''
+Layout of ``struct inotify_event`` (without the name)
+'''
+
+
+class WatchResult(namedtuple('WatchResult', (
+        'location', 'events', 'success', 'duration'
+))):
+    '''
+    :arg location: Local path of the repository
+    :arg events: Number of file events coalesced into this sync
+    :arg success: Output of the sync
+    :arg duration: Wall time in seconds spent syncing
+    '''
+
+
+class PollWatcher:
+    '''
+    Notices changes of a working tree by comparing the metadata
+    of all files every now and then (works everywhere, but scales
+    with the size of the working tree)
+    '''
+
+    def __init__(self, location, *, interval=1.0):
+        '''
+        Initialize a new watcher
+
+        :param location: Local path of the working tree
+        :param interval: Seconds to wait between two scans
+        '''
+        self._log = getLogger(self.__class__.__name__)
+
+        self.location = joined(location)
+        self.interval = interval
+        self._state = self._scan()
+
+    def _scan(self):
+        '''
+        Helper to collect the metadata of the working tree.
+
+        :returns: Paths and their inode, size and modification time
+        :rtype: dict
+        '''
+        res = {}
+        for root, folders, files in walk(self.location):
+            folders[:] = [
+                name for name in folders if name not in WATCH_IGNORE
+            ]
+            for name in folders + files:
+                full = path.join(root, name)
+                try:
+                    stat = lstat(full)
+                except OSError:
+                    continue
+                res[full] = (
+                    stat.st_ino, stat.st_size, stat.st_mtime_ns,
+                    stat.st_mode
+                )
+        return res
+
+    def wait(self, timeout=None):
+        '''
+        Waits for changes.
+
+        :param timeout: Seconds to wait at most, ``None`` to wait forever
+        :returns: Number of changed paths, ``0`` if nothing changed
+        '''
+        deadline = None if timeout is None else monotonic() + timeout
+        while True:
+            state = self._scan()
+            changed = len(set(state.items()) ^ set(self._state.items()))
+            self._state = state
+            if changed:
+                return changed
+
+            if deadline is None:
+                sleep(self.interval)
+                continue
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                return 0
+            sleep(min(self.interval, remaining))
+
+    def close(self):
+        '''
+        Nothing to release here, exists for the sake of
+        :class:`InotifyWatcher`
+        '''
+
+
+class InotifyWatcher:
+    '''
+    Notices changes of a working tree through inotify (Linux only),
+    waiting costs nothing until something happens
+    '''
+
+    def __init__(self, location):
+        '''
+        Initialize a new watcher
+
+        :param location: Local path of the working tree
+        :raises OSError: If inotify is not available,
+                         or there are not enough watches left
+        '''
+        self._log = getLogger(self.__class__.__name__)
+        self._libc = CDLL(find_library('c'), use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError('inotify not available')
+
+        self.location = joined(location)
+        self._watches = {}
+        self._fd = self._libc.inotify_init1(O_NONBLOCK | O_CLOEXEC)
+        if self._fd < 0:
+            raise self._error('inotify_init1')
+        self._selector = DefaultSelector()
+        self._selector.register(self._fd, EVENT_READ)
+
+        try:
+            self._add(self.location)
+        except OSError:
+            self.close()
+            raise
+
+    def _error(self, name):
+        '''
+        Helper to turn the last error of some libc function into
+        an exception.
+
+        :returns: The exception, ready to be raised
+        :rtype: OSError
+        '''
+        num = get_errno()
+        return OSError(num, '{} failed: {}'.format(name, num))
+
+    def _add(self, location):
+        '''
+        Helper to watch some folder, including all folders below.
+
+        :param location: Path of the folder
+        '''
+        for root, folders, _ in walk(location):
+            folders[:] = [
+                name for name in folders if name not in WATCH_IGNORE
+            ]
+            num = self._libc.inotify_add_watch(
+                self._fd, fsencode(root), INOTIFY_MASK
+            )
+            if num < 0:
+                raise self._error('inotify_add_watch')
+            self._watches[num] = root
+
+    def _read(self):
+        '''
+        Helper to read all pending events.
+
+        :returns: Number of events read
+        '''
+        count = 0
+        size = calcsize(INOTIFY_HEADER)
+        while True:
+            try:
+                data = read(self._fd, 65536)
+            except BlockingIOError:
+                return count
+            if not data:
+                return count
+
+            pos = 0
+            while pos + size <= len(data):
+                num, mask, _, length = unpack_from(INOTIFY_HEADER, data, pos)
+                name = data[pos + size:pos + size + length].rstrip(b'\0')
+                name = name.decode(errors='replace')
+                pos += size + length
+
+                if mask & INOTIFY_OVERFLOW:
+                    count += 1
+                    continue
+                if mask & INOTIFY_IGNORED:
+                    self._watches.pop(num, None)
+                    continue
+                if num not in self._watches:
+                    continue
+                if name in WATCH_IGNORE:
+                    continue
+                count += 1
+                if mask & INOTIFY_ISDIR and mask & INOTIFY_NEW:
+                    try:
+                        self._add(path.join(self._watches[num], name))
+                    except OSError as exc:
+                        self._log.warning(
+                            'could not watch new folder: %s', exc
+                        )
+
+    def wait(self, timeout=None):
+        '''
+        Waits for changes.
+
+        :param timeout: Seconds to wait at most, ``None`` to wait forever
+        :returns: Number of file events, ``0`` if nothing changed
+        '''
+        if self._selector.select(timeout):
+            return self._read()
+        return 0
+
+    def close(self):
+        '''
+        Stops watching
+        '''
+        if self._fd is None:
+            return
+        self._selector.close()
+        close(self._fd)
+        self._fd = None
+        self._watches.clear()
+
+
+def watcher(location, *, poll=False, interval=1.0):
+    '''
+    Creates the best watcher available.
+
+    :param location: Local path of the working tree
+    :param poll: Use ``True`` to skip trying inotify
+    :param interval: Seconds between two scans when polling
+    :returns: Some :class:`InotifyWatcher`, or
+              a :class:`PollWatcher` if inotify is not available
+    '''
+    if not poll:
+        try:
+            return InotifyWatcher(location)
+        except (OSError, AttributeError) as exc:
+            getLogger(__name__).warning(
+                'falling back to polling "%s": %s', location, exc
+            )
+    return PollWatcher(location, interval=interval)
+
+
+class SyncDaemon:
+    '''
+    Watches the working trees of repositories and syncs each one
+    (see :meth:`Repository.__call__ <git_sh_sync.repo.Repository.__call__>`)
+    once a burst of changes is over
+    '''
+
+    def __init__(
+            self, repos, *,
+            debounce=2.0, max_delay=None, poll=False, interval=1.0,
+            backoff=300.0
+    ):
+        '''
+        Initialize a new daemon
+
+        :param repos: :class:`Repository <git_sh_sync.repo.Repository>`
+                      objects or their locations
+        :param debounce: Seconds without changes that end a burst
+        :param max_delay: Seconds after the first change of a burst
+                          to sync at the latest, even if changes keep
+                          coming in. Use ``None`` to wait for the
+                          burst to end
+        :param poll: Use ``True`` to poll instead of using inotify
+        :param interval: Seconds between two checks if the daemon
+                         was stopped (and between two scans when polling)
+        :param backoff: Seconds to wait at most before retrying a failed
+                        sync (the wait starts at *debounce* and doubles
+                        with every failure in a row)
+        '''
+        self._log = getLogger(self.__class__.__name__)
+        self._lock = Lock()
+        self._stop = Event()
+        self._threads = []
+
+        self.repos = [
+            repo if not isinstance(repo, str) else Repository.open(repo)
+            for repo in repos
+        ]
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll = poll
+        self.interval = interval
+        self.backoff = backoff
+        self.results = []
+
+    @property
+    def running(self):
+        '''
+        :returns: ``True`` if the daemon is watching, otherwise ``False``
+        '''
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self):
+        '''
+        Starts watching all repositories, each one in its own thread.
+
+        :returns: ``True`` if the daemon was started,
+                  ``False`` if it was already running
+        '''
+        if self.running:
+            return False
+
+        self._stop.clear()
+        self._threads = [
+            Thread(target=self._watch, args=(repo, watcher(
+                repo.location, poll=self.poll, interval=self.interval
+            )), daemon=True)
+            for repo in self.repos
+        ]
+        for thread in self._threads:
+            thread.start()
+        return True
+
+    def stop(self):
+        '''
+        Stops watching, waits for running syncs to finish.
+        '''
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        self.stop()
+
+    def __call__(self):
+        '''
+        Watches until :meth:`stop` is called (e.g. from a signal handler)
+        '''
+        self.start()
+        try:
+            while not self._stop.wait(self.interval):
+                pass
+        finally:
+            self.stop()
+
+    def _burst(self, watch, events):
+        '''
+        Helper to wait for the end of a burst of changes.
+
+        :param watch: The watcher of the repository
+        :param events: Number of events which started the burst
+        :returns: Number of events of the whole burst,
+                  ``0`` if the daemon was stopped meanwhile
+        '''
+        start = monotonic()
+        while not self._stop.is_set():
+            timeout = self.debounce
+            if self.max_delay is not None:
+                timeout = min(timeout, start + self.max_delay - monotonic())
+                if timeout <= 0:
+                    return events
+            more = watch.wait(timeout)
+            if not more:
+                return events
+            events += more
+        return 0
+
+    def _sync(self, repo, events):
+        '''
+        Helper to sync one repository, and to record the result.
+
+        :param repo: The repository
+        :param events: Number of events which caused the sync
+        :returns: Output of the sync, ``False`` if it raised
+        '''
+        start = monotonic()
+        try:
+            success = repo()
+        except Exception:  # pylint: disable=broad-except
+            self._log.exception('could not sync "%s"', repo.location)
+            success = False
+        result = WatchResult(
+            location=repo.location, events=events,
+            success=success, duration=monotonic() - start
+        )
+        with self._lock:
+            self.results.append(result)
+        self._log.info(
+            'synced "%s" after %d events: %s',
+            repo.location, events, success
+        )
+        return success
+
+    def _clean(self, repo):
+        '''
+        Helper to check if a repository is clean after syncing.
+
+        :param repo: The repository
+        :returns: ``True`` if clean (or unknown), otherwise ``False``
+        '''
+        try:
+            return repo.snapshot().status.clean
+        except Exception:  # pylint: disable=broad-except
+            self._log.exception('could not check "%s"', repo.location)
+            return True
+
+    def _watch(self, repo, watch):
+        '''
+        Helper to watch one repository, runs inside its own thread.
+
+        :param repo: The repository
+        :param watch: Its watcher
+
+        Events arriving while syncing are mostly caused by the sync
+        itself. So afterwards the repository is checked again, and
+        synced once more (after the next burst) if it is not clean.
+
+        If the sync fails, the events stay pending and the sync is
+        retried after waiting (see *backoff* of :meth:`__init__`).
+        '''
+        try:
+            events = 0
+            failures = 0
+            while not self._stop.is_set():
+                if not events:
+                    events = watch.wait(self.interval)
+                    if not events:
+                        continue
+                events = self._burst(watch, events)
+                if not events:
+                    break
+
+                if not self._sync(repo, events):
+                    failures += 1
+                    delay = min(
+                        self.debounce * 2 ** (failures - 1), self.backoff
+                    )
+                    self._log.warning(
+                        'retrying "%s" in %.2f seconds',
+                        repo.location, delay
+                    )
+                    if self._stop.wait(delay):
+                        break
+                    events += watch.wait(0)
+                    continue
+
+                failures = 0
+                events = watch.wait(0)
+                if self._clean(repo):
+                    events = 0
+                    continue
+                self._log.info(
+                    'changes in "%s" arrived while syncing', repo.location
+                )
+                events = max(events, 1)
+        finally:
+            watch.close()
@@ -0,0 +1,12 @@
+from pytest import fixture
+
+
+@fixture(scope='function')
+def catrepo(committed):
+    folder, git = committed
+
+    folder.join('bbb').write_binary(b'\x00\xff\n')
+    git('add', 'bbb')
+    git('commit', '--amend', '--no-edit')
+
+    yield folder
@@ -0,0 +1,68 @@
+from git_sh_sync.batch import CatFile, GitObject
+
+
+def test_catfile_init(catrepo):
+    cat = CatFile(str(catrepo))
+    assert cat.cwd == str(catrepo)
+    assert cat.contents is True
+    assert cat.cmd == ['git', 'cat-file', '--batch']
+    assert cat.running is False
+
+    cat = CatFile(str(catrepo), contents=False)
+    assert cat.cmd == ['git', 'cat-file', '--batch-check']
+
+
+def test_catfile_contents(catrepo):
+    with CatFile(str(catrepo)) as cat:
+        assert cat.running is True
+        aaa, bbb = cat('HEAD:aaa', 'HEAD:bbb')
+
+    assert cat.running is False
+    assert isinstance(aaa, GitObject)
+    assert aaa.kind == 'blob'
+    assert aaa.size == 11
+    assert aaa.data == b'content aaa'
+    assert len(aaa.oid) == 40
+    assert bbb.data == b'\x00\xff\n'
+
+
+def test_catfile_check(catrepo):
+    with CatFile(str(catrepo), contents=False) as cat:
+        commit, tree = cat('HEAD', 'HEAD^{tree}')
+
+    assert commit.kind == 'commit'
+    assert commit.data is None
+    assert tree.kind == 'tree'
+
+
+def test_catfile_missing(catrepo):
+    with CatFile(str(catrepo)) as cat:
+        assert cat('HEAD:nothing', 'HEAD:aaa\nHEAD:bbb', 'HEAD:aaa') == [
+            None, None, cat('HEAD:aaa')[0]
+        ]
+
+
+def test_catfile_one_process(catrepo):
+    cat = CatFile(str(catrepo))
+    assert cat('HEAD:aaa')[0].data == b'content aaa'
+    pid = getattr(cat, '_proc').pid
+
+    for _ in range(100):
+        assert cat('HEAD:bbb')[0].data == b'\x00\xff\n'
+    assert getattr(cat, '_proc').pid == pid
+
+    cat.close()
+    assert cat.running is False
+
+
+def test_catfile_many(catrepo):
+    with CatFile(str(catrepo)) as cat:
+        result = cat(*(['HEAD:aaa', 'HEAD:bbb'] * 5000))
+    assert len(result) == 10000
+    assert all(obj.data == b'content aaa' for obj in result[::2])
+
+
+def test_catfile_no_repo(tmpdir):
+    cat = CatFile(str(tmpdir))
+    assert cat('HEAD') == [None]
+    cat.close()
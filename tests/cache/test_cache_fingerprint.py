@@ -0,0 +1,51 @@
+from git_sh_sync.cache import fingerprint, git_folder
+
+
+def test_git_folder_plain(committed):
+    folder, _ = committed
+    git_dir = str(folder.join('.git'))
+    assert git_folder(str(folder)) == (git_dir, git_dir)
+
+
+def test_git_folder_worktree(committed, tmpdir):
+    folder, git = committed
+    other = tmpdir.join('other')
+    git('worktree', 'add', str(other))
+
+    git_dir, common = git_folder(str(other))
+    assert git_dir == str(folder.join('.git', 'worktrees', 'other'))
+    assert common == str(folder.join('.git'))
+
+    assert other.remove() is None
+
+
+def test_fingerprint_stable(committed):
+    folder, _ = committed
+    assert fingerprint(str(folder)) == fingerprint(str(folder))
+
+
+def test_fingerprint_no_repo(tmpdir):
+    assert fingerprint(str(tmpdir)) == fingerprint(str(tmpdir))
+
+
+def test_fingerprint_changes(committed):
+    folder, git = committed
+    before = fingerprint(str(folder))
+
+    git('tag', 'some-tag')
+    after_tag = fingerprint(str(folder))
+    assert after_tag != before
+
+    git('checkout', '-b', 'other')
+    after_checkout = fingerprint(str(folder))
+    assert after_checkout != after_tag
+
+    git('remote', 'add', 'origin', 'http://localhost')
+    assert fingerprint(str(folder)) != after_checkout
+
+
+def test_fingerprint_ignores_worktree(committed):
+    folder, _ = committed
+    before = fingerprint(str(folder))
+    folder.join('bbb').write_text('content bbb', 'utf-8')
+    assert fingerprint(str(folder)) == before
@@ -0,0 +1,68 @@
+from git_sh_sync.cache import ResultCache
+
+
+def test_cache_init(tmpdir):
+    cache = ResultCache(str(tmpdir))
+    assert cache.location == str(tmpdir)
+    assert cache.enabled is True
+    assert cache.hits == 0
+    assert cache.misses == 0
+
+
+def test_cache_hits(committed):
+    folder, _ = committed
+    cache = ResultCache(str(folder))
+    calls = []
+
+    def query():
+        calls.append(None)
+        return len(calls)
+
+    assert cache('key', query) == 1
+    assert cache('key', query) == 1
+    assert cache('other', query) == 2
+    assert cache.hits == 1
+    assert cache.misses == 2
+
+
+def test_cache_clear(committed):
+    folder, _ = committed
+    cache = ResultCache(str(folder))
+    calls = []
+
+    def query():
+        calls.append(None)
+        return len(calls)
+
+    assert cache('key', query) == 1
+    cache.clear()
+    assert cache('key', query) == 2
+
+
+def test_cache_fingerprint(committed):
+    folder, git = committed
+    cache = ResultCache(str(folder))
+    calls = []
+
+    def query():
+        calls.append(None)
+        return len(calls)
+
+    assert cache('key', query) == 1
+    git('tag', 'some-tag')
+    assert cache('key', query) == 2
+    assert cache('key', query) == 2
+
+
+def test_cache_disabled(committed):
+    folder, _ = committed
+    cache = ResultCache(str(folder), enabled=False)
+    calls = []
+
+    def query():
+        calls.append(None)
+        return len(calls)
+
+    assert cache('key', query) == 1
+    assert cache('key', query) == 2
+    assert cache.hits == 0
@@ -1,5 +1,7 @@
+from asyncio import new_event_loop
 from collections import namedtuple
 from os import path
+from subprocess import PIPE, run
 
 from pytest import fixture
 
@@ -14,3 +16,47 @@ def rootdir():
         root=root,
         join=lambda *locs: path.abspath(path.join(root, *locs))
     )
+
+
+@fixture(scope='function')
+def runloop():
+    loop = new_event_loop()
+
+    yield loop.run_until_complete
+
+    loop.close()
+
+
+def make_committed(folder):
+    def git(*args):
+        return run(
+            ['git', *args], cwd=str(folder), stdout=PIPE,
+            universal_newlines=True
+        ).stdout.strip()
+
+    git('init')
+    folder.join('aaa').write_text('content aaa', 'utf-8')
+    git('add', 'aaa')
+    git('commit', '-m', 'first commit')
+    return git
+
+
+@fixture(scope='function')
+def committed(tmpdir):
+    folder = tmpdir.mkdir('committed.git')
+
+    yield folder, make_committed(folder)
+
+    assert folder.remove() is None
+
+
+@fixture(scope='function')
+def origin(tmpdir):
+    folder = tmpdir.mkdir('origin.git')
+
+    git = make_committed(folder)
+    git('config', '--bool', 'core.bare', 'true')
+
+    yield folder
+
+    assert folder.remove() is None
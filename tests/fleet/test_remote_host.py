@@ -0,0 +1,16 @@
+from git_sh_sync.fleet import remote_host
+
+
+def test_remote_host_urls():
+    assert remote_host('https://example.org/repo.git') == 'example.org'
+    assert remote_host('ssh://git@example.org:22/repo.git') == 'example.org'
+    assert remote_host('git@example.org:repo.git') == 'example.org'
+    assert remote_host('example.org:repo.git') == 'example.org'
+
+
+def test_remote_host_local():
+    assert remote_host(None) is None
+    assert remote_host('') is None
+    assert remote_host('/srv/repo.git') is None
+    assert remote_host('../repo.git') is None
+    assert remote_host('file:///srv/repo.git') is None
@@ -0,0 +1,136 @@
+import json
+from os import path
+
+from pytest import raises
+
+from git_sh_sync.fleet import FleetResult, RepositoryFleet
+from git_sh_sync.repo import Repository
+
+
+def test_fleet_init():
+    fleet = RepositoryFleet(
+        ['/aaa', dict(location='/bbb', timeout=5)],
+        workers=3, per_host=2, options=dict(timeout=10)
+    )
+    assert fleet.entries == [
+        dict(location='/aaa', timeout=10),
+        dict(location='/bbb', timeout=5),
+    ]
+    assert fleet.action == 'sync'
+    assert fleet.workers == 3
+    assert fleet.per_host == 2
+    assert fleet.launched is False
+    assert fleet.success is False
+    assert fleet() is False
+
+    with raises(ValueError):
+        RepositoryFleet([], action='some')
+
+
+def test_fleet_load(tmpdir):
+    manifest = tmpdir.join('manifest.json')
+    manifest.write_text(json.dumps(dict(
+        repos=['/aaa'], action='scrub', workers=2
+    )), 'utf-8')
+
+    fleet = RepositoryFleet.load(str(manifest), workers=4)
+    assert fleet.entries == [dict(location='/aaa')]
+    assert fleet.action == 'scrub'
+    assert fleet.workers == 4
+
+    manifest.write_text(json.dumps(['/bbb']), 'utf-8')
+    assert RepositoryFleet.load(str(manifest)).entries == [
+        dict(location='/bbb')
+    ]
+
+
+def test_fleet_slots():
+    fleet = RepositoryFleet([], per_host=1)
+    assert fleet._slot(None) is None
+    assert fleet._slot('example.org') is fleet._slot('example.org')
+    assert fleet._slot('example.org') is not fleet._slot('example.com')
+    assert RepositoryFleet([])._slot('example.org') is None
+
+
+def test_fleet_scrub(tmpdir):
+    folders = [tmpdir.join('repo_{}.git'.format(num)) for num in range(4)]
+    for folder in folders:
+        Repository(str(folder))
+        folder.join('bbb').write_text('content', 'utf-8')
+
+    fleet = RepositoryFleet(
+        [str(folder) for folder in folders], action='scrub', workers=2
+    )
+    assert fleet() is True
+    assert fleet() is False
+
+    assert [res.location for res in fleet.results] == [
+        str(folder) for folder in folders
+    ]
+    for res in fleet.results:
+        assert isinstance(res, FleetResult)
+        assert res.success is True
+        assert res.host is None
+        assert res.duration > 0
+        assert Repository.open(res.location).status.clean is True
+    assert fleet.duration > 0
+
+
+def test_fleet_sync(tmpdir, origin):
+    entries = [
+        dict(location=str(tmpdir.join('clone_{}.git'.format(num))))
+        for num in range(3)
+    ]
+    fleet = RepositoryFleet(
+        entries, per_host=1, options=dict(remote_url=str(origin))
+    )
+    assert fleet() is True
+    for entry, res in zip(entries, fleet.results):
+        assert res.host is None
+        assert Repository.open(entry['location']).tags == []
+        assert path.isfile(path.join(entry['location'], 'aaa'))
+
+
+def test_fleet_failure(tmpdir, caplog):
+    fleet = RepositoryFleet([dict(
+        location=str(tmpdir.join('clone.git')),
+        remote_url=str(tmpdir.join('missing.git'))
+    ), dict(location=str(tmpdir.join('other.git')), profile='unknown')])
+
+    assert fleet() is False
+    assert [res.success for res in fleet.results] == [False, False]
+
+
+def test_fleet_prepare_in_slot(tmpdir, origin):
+    location = tmpdir.join('clone.git')
+    fleet = RepositoryFleet([dict(
+        location=str(location), remote_url='https://example.invalid/a.git'
+    ), dict(location=str(tmpdir.join('local.git')))], action='cleanup')
+    seen = []
+    slot = fleet._slot
+
+    def _slot(host):
+        seen.append((host, location.check()))
+        return slot(host)
+
+    fleet._slot = _slot
+    fleet()
+    assert seen[0] == ('example.invalid', False)
+
+    Repository(str(location), remote_url=str(origin))
+    assert fleet._remote_url(Repository(
+        str(location), lazy=True
+    )) == str(origin)
+
+
+def test_fleet_unexpected(tmpdir, caplog, monkeypatch):
+    def _call(_):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(Repository, '__call__', _call)
+    fleet = RepositoryFleet([
+        str(tmpdir.join('repo_{}.git'.format(num))) for num in range(2)
+    ])
+    assert fleet() is False
+    assert [res.success for res in fleet.results] == [False, False]
+    assert 'boom' in caplog.text
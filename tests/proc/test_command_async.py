@@ -0,0 +1,69 @@
+from asyncio import gather
+
+from git_sh_sync.proc import AsyncCommand
+
+
+def test_async_cmd_echo(runloop):
+    content = 'test test'
+    res = AsyncCommand('echo "{}"'.format(content))
+    assert runloop(res.run()) is True
+    assert res.cmd == ['echo', content]
+    assert res.exc is None
+    assert res.code == 0
+    assert res.out == [content]
+    assert res.stdout == content
+    assert res.err == []
+    assert res.stderr == ''
+    assert res.success is True
+    assert res.launched is True
+
+
+def test_async_cmd_ls_cwd(rootdir, runloop):
+    res = AsyncCommand('ls -1', cwd=rootdir.root)
+    assert runloop(res.run()) is True
+    assert res.cwd == rootdir.root
+    assert 'makefile' in res.out
+
+
+def test_async_cmd_cat_stdin(runloop):
+    content = 'test test'
+    res = AsyncCommand('cat', cin=content)
+    assert runloop(res.run()) is True
+    assert res.stdout == content
+    assert res.out == [content]
+
+
+def test_async_cmd_no_double(runloop):
+    res = AsyncCommand('echo')
+    assert runloop(res.run()) is True
+    assert runloop(res.run()) is False
+    assert res.success is True
+
+
+def test_async_cmd_error(runloop):
+    res = AsyncCommand('this-is-not-a-command')
+    assert runloop(res.run()) is False
+    assert res.code is None
+    assert res.success is False
+    assert res.launched is True
+
+    assert isinstance(res.exc, OSError)
+
+
+def test_async_cmd_concurrent(runloop):
+    cmds = [AsyncCommand('echo "{}"'.format(num)) for num in range(8)]
+
+    async def launch():
+        return await gather(*(cmd.run() for cmd in cmds))
+
+    assert runloop(launch()) == [True] * 8
+
+    for num, cmd in enumerate(cmds):
+        assert cmd.stdout == str(num)
+
+
+def test_async_call_sync():
+    res = AsyncCommand('echo "test"')
+    assert res() is True
+    assert res.stdout == 'test'
+    assert res.usage is not None
@@ -104,6 +104,10 @@ def test_cmd_fields_post(helpcmd):
         stderr='',
         code=0,
         exc=None,
+        timed_out=False,
+        started=None,
+        duration=None,
+        usage=None,
     )
 
 
@@ -123,6 +127,10 @@ def test_cmd_repr_post(helpcmd):
         stderr='',
         code=0,
         exc=None,
+        timed_out=False,
+        started=None,
+        duration=None,
+        usage=None,
     ))
 
 
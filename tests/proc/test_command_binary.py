@@ -0,0 +1,57 @@
+from git_sh_sync.proc import Command, CommandRaw
+
+
+def test_binary_init(helpcmd):
+    res = helpcmd.init('test-command', binary=True)
+    assert res.binary is True
+    assert res.stdout == b''
+    assert res.stderr == b''
+    assert res.out == []
+    assert res.err == []
+
+
+def test_binary_keeps_bytes():
+    res = Command('printf " \\000\\377\\nbbb\\n"', binary=True)
+    assert res() is True
+    assert res.stdout == b' \x00\xff\nbbb\n'
+    assert res.out == [b' \x00\xff', b'bbb']
+    assert res.stderr == b''
+    assert memoryview(res.stdout)[1:3].tobytes() == b'\x00\xff'
+
+
+def test_binary_stdin():
+    res = Command('cat', cin=b'\x00\x01', binary=True)
+    assert res() is True
+    assert res.stdout == b'\x00\x01'
+
+
+def test_binary_stream():
+    res = Command('printf "aaa\\000bbb"', binary=True)
+    assert list(res.stream(sep=b'\0')) == [b'aaa', b'bbb']
+
+
+def test_text_decodes_lazily():
+    res = Command('echo "test"')
+    assert res() is True
+    assert isinstance(getattr(res, '_data')['stdout'], bytes)
+    assert res.stdout == 'test'
+    assert res.stdout is res.stdout
+
+
+def test_split_views_cached(helpcmd):
+    res = helpcmd.init('test-command')
+    helpcmd.edit(res, stdout='aaa\nbbb', stderr='ccc\nddd')
+    assert res.out == ['aaa', 'bbb']
+    assert res.out is res.out
+    assert res.err == ['ccc', 'ddd']
+    assert res.err is res.err
+
+    helpcmd.edit(res, stdout='eee')
+    assert res.out == ['eee']
+
+
+def test_binary_raw():
+    res = Command('cat', cin='abc')
+    assert res.raw == CommandRaw(cin=b'abc', stdout='', stderr='')
+    assert res() is True
+    assert res.raw == CommandRaw(cin=b'abc', stdout=b'abc', stderr=b'')
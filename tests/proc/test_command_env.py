@@ -0,0 +1,46 @@
+from os import environ
+
+from git_sh_sync.proc import LAUNCHER_SPAWN, AsyncCommand, Command, Pipeline
+
+
+def test_env_init(helpcmd):
+    res = helpcmd.init('test-command')
+    assert res.env is None
+    assert res.environment is None
+
+    res = helpcmd.init('test-command', env=dict(TEST_VAR='test'))
+    assert res.env == dict(TEST_VAR='test')
+    assert res.environment['TEST_VAR'] == 'test'
+    assert res.environment['PATH'] == environ['PATH']
+
+
+def test_env_launch():
+    res = Command('sh -c "echo $TEST_VAR"', env=dict(TEST_VAR='test'))
+    assert res() is True
+    assert res.stdout == 'test'
+
+
+def test_env_spawn():
+    res = Command(
+        'sh -c "echo $TEST_VAR"',
+        env=dict(TEST_VAR='test'), launcher=LAUNCHER_SPAWN
+    )
+    assert res() is True
+    assert res.stdout == 'test'
+
+
+def test_env_stream():
+    res = Command('sh -c "echo $TEST_VAR"', env=dict(TEST_VAR='test'))
+    assert list(res.stream()) == ['test']
+
+
+def test_env_async(runloop):
+    res = AsyncCommand('sh -c "echo $TEST_VAR"', env=dict(TEST_VAR='test'))
+    assert runloop(res.run()) is True
+    assert res.stdout == 'test'
+
+
+def test_env_pipeline():
+    res = Pipeline('sh -c "echo $TEST_VAR"', 'cat', env=dict(TEST_VAR='test'))
+    assert res() is True
+    assert res.stdout == 'test'
@@ -11,7 +11,7 @@ def test_cmd_log_init(caplog):
     rec = caplog.records[-1]
     assert rec.levelno == DEBUG
     assert 'command initialized:' in rec.msg
-    assert 'echo' in rec.args[-1]
+    assert 'echo' in rec.getMessage()
 
 
 def test_cmd_log_success(caplog):
@@ -24,7 +24,7 @@ def test_cmd_log_success(caplog):
     rec = caplog.records[-1]
     assert rec.levelno == INFO
     assert 'command success:' in rec.msg
-    assert 'echo' in rec.args[-1]
+    assert 'echo' in rec.getMessage()
 
 
 def test_cmd_log_failed(caplog):
@@ -37,4 +37,12 @@ def test_cmd_log_failed(caplog):
     rec = caplog.records[-1]
     assert rec.levelno == ERROR
     assert 'command failed:' in rec.msg
-    assert 'this-is-not-a-command' in rec.args[-1]
+    assert 'this-is-not-a-command' in rec.getMessage()
+
+
+def test_cmd_log_lazy(caplog, monkeypatch):
+    caplog.set_level(ERROR)
+    res = Command('echo')
+    monkeypatch.setattr(Command, 'fields', property(lambda _: 1 / 0))
+    assert res() is True
+    assert not caplog.records
@@ -0,0 +1,86 @@
+from time import monotonic
+
+from git_sh_sync.proc import Command, Pipeline
+
+
+def test_pipeline_init(rootdir):
+    res = Pipeline('ls -1', Command('sort -r'), cwd=rootdir.root)
+    assert len(res.stages) == 2
+    assert res.stages[0].cwd == rootdir.root
+    assert res.stages[1].cwd is None
+    assert res.cmd == [['ls', '-1'], ['sort', '-r']]
+    assert res.command == 'ls -1 | sort -r'
+    assert res.launched is False
+    assert res.success is False
+
+
+def test_pipeline_data_flow():
+    res = Pipeline('cat', 'tr a-z A-Z', 'rev', cin='abc\ndef')
+    assert res() is True
+    assert res.code == 0
+    assert res.out == ['CBA', 'FED']
+    assert res.stderr == ''
+    for stage in res.stages:
+        assert stage.code == 0
+        assert stage.success is True
+        assert stage.duration is not None
+        assert stage.usage is not None
+
+
+def test_pipeline_stage_durations():
+    res = Pipeline('sh -c "sleep 0.1"', 'sh -c "cat; sleep 0.6"')
+    assert res() is True
+    assert res.stages[0].duration < 0.5
+    assert res.stages[1].duration >= 0.6
+    assert res.duration >= 0.6
+
+
+def test_pipeline_large():
+    res = Pipeline('seq 1 200000', 'sort -n', 'tail -n 1')
+    assert res() is True
+    assert res.stdout == '200000'
+
+
+def test_pipeline_stage_failure():
+    res = Pipeline(
+        'sh -c "echo aaa; echo oops >&2; exit 3"', 'cat'
+    )
+    assert res() is False
+    assert res.code == 0
+    assert res.stdout == 'aaa'
+    assert res.stderr == 'oops'
+    assert res.stages[0].code == 3
+    assert res.stages[0].stderr == 'oops'
+    assert res.stages[1].code == 0
+    assert [stage['code'] for stage in res.fields['stages']] == [3, 0]
+
+
+def test_pipeline_launch_error():
+    res = Pipeline('echo', 'this-is-not-a-command', 'cat')
+    assert res() is False
+    assert res.launched is True
+    assert isinstance(res.exc, OSError)
+    assert isinstance(res.stages[1].exc, OSError)
+
+
+def test_pipeline_timeout():
+    start = monotonic()
+    res = Pipeline('sh -c "sleep 10"', 'cat', timeout=0.2)
+    assert res() is False
+    assert monotonic() - start < 5
+    assert res.timed_out is True
+    assert res.stages[0].timed_out is True
+
+
+def test_pipeline_spill():
+    res = Pipeline('seq 1 100000', 'cat', spill=1024)
+    assert res() is True
+    assert res.spilled is True
+    assert res.out[-1] == '100000'
+
+
+def test_pipeline_no_double():
+    res = Pipeline('echo')
+    assert res() is True
+    assert res() is False
+    assert Pipeline()() is False
@@ -0,0 +1,54 @@
+from git_sh_sync.proc import Command, CommandPool
+
+
+def test_pool_init(rootdir):
+    res = CommandPool(['echo', Command('ls')], cwd=rootdir.root, workers=2)
+    assert res.workers == 2
+    assert len(res.commands) == 2
+    assert res.commands[0].cwd == rootdir.root
+    assert res.commands[1].cwd is None
+    assert res.results == []
+    assert res.launched is False
+    assert res.success is False
+
+
+def test_pool_workers_default():
+    res = CommandPool(['echo'])
+    assert res.workers >= 1
+
+
+def test_pool_order():
+    res = CommandPool(
+        ['sh -c "sleep 0.{}; echo {}"'.format(9 - num, num)
+         for num in range(10)],
+        workers=10
+    )
+    assert res() is True
+    assert res.launched is True
+    assert res.success is True
+
+    for num, result in enumerate(res.results):
+        assert result.command is res.commands[num]
+        assert result.success is True
+        assert result.command.stdout == str(num)
+        assert result.duration > 0
+
+
+def test_pool_failure():
+    res = CommandPool(['echo', 'this-is-not-a-command', 'false'])
+    assert res() is False
+    assert res.success is False
+    assert [result.success for result in res.results] == [True, False, False]
+
+
+def test_pool_no_double():
+    res = CommandPool(['echo'])
+    assert res() is True
+    assert res() is False
+    assert res.success is True
+
+
+def test_pool_empty():
+    res = CommandPool([])
+    assert res() is False
+    assert res.launched is False
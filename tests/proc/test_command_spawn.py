@@ -0,0 +1,93 @@
+from time import monotonic
+
+from git_sh_sync import proc
+from git_sh_sync.proc import (
+    LAUNCHER_POPEN, LAUNCHER_SPAWN, Command, CommandUsage
+)
+
+
+def test_spawn_init(helpcmd):
+    res = helpcmd.init('test-command')
+    assert res.launcher == LAUNCHER_POPEN
+
+    res = helpcmd.init('test-command', launcher=LAUNCHER_SPAWN)
+    assert res.launcher == LAUNCHER_SPAWN
+
+
+def test_spawn_echo():
+    res = Command('echo "test test"', launcher=LAUNCHER_SPAWN)
+    assert res() is True
+    assert res.code == 0
+    assert res.stdout == 'test test'
+    assert res.stderr == ''
+    assert isinstance(res.usage, CommandUsage)
+
+
+def test_spawn_cwd(rootdir):
+    res = Command('ls -1', cwd=rootdir.root, launcher=LAUNCHER_SPAWN)
+    assert res() is True
+    assert 'makefile' in res.out
+
+
+def test_spawn_stdin_stderr():
+    content = 'x' * 1024 * 1024
+    res = Command(
+        'sh -c "cat; echo err >&2; exit 3"',
+        cin=content, launcher=LAUNCHER_SPAWN
+    )
+    assert res() is False
+    assert res.code == 3
+    assert res.stdout == content
+    assert res.stderr == 'err'
+
+
+def test_spawn_spill():
+    res = Command('seq 1 100000', spill=1024, launcher=LAUNCHER_SPAWN)
+    assert res() is True
+    assert res.spilled is True
+    assert res.out[-1] == '100000'
+
+
+def test_spawn_timeout():
+    start = monotonic()
+    res = Command(
+        'sh -c "echo early; sleep 10 & sleep 10; wait"',
+        timeout=0.2, launcher=LAUNCHER_SPAWN
+    )
+    assert res() is False
+    assert monotonic() - start < 5
+    assert res.timed_out is True
+    assert res.stdout == 'early'
+
+
+def test_spawn_errors(tmpdir):
+    res = Command('this-is-not-a-command', launcher=LAUNCHER_SPAWN)
+    assert res() is False
+    assert isinstance(res.exc, OSError)
+
+    res = Command(
+        'echo', cwd=str(tmpdir.join('nothing')), launcher=LAUNCHER_SPAWN
+    )
+    assert res() is False
+    assert isinstance(res.exc, OSError)
+
+    res = Command('echo', launcher='nothing')
+    assert res() is False
+    assert isinstance(res.exc, ValueError)
+
+
+def test_spawn_same_as_popen(rootdir):
+    for line in ('git status --porcelain', 'git log -n 3', 'ls -la'):
+        pop = Command(line, cwd=rootdir.root, launcher=LAUNCHER_POPEN)
+        spn = Command(line, cwd=rootdir.root, launcher=LAUNCHER_SPAWN)
+        assert pop() == spn()
+        assert pop.code == spn.code
+        assert pop.stdout == spn.stdout
+
+
+def test_spawn_unavailable(monkeypatch):
+    monkeypatch.setattr(proc, 'posix_spawnp', None)
+    res = Command('echo "test"', launcher=LAUNCHER_SPAWN)
+    assert res() is False
+    assert isinstance(res.exc, ValueError)
+    assert 'posix_spawnp' in str(res.exc)
@@ -0,0 +1,90 @@
+from mmap import mmap
+
+from git_sh_sync.proc import CHAR_NUL, AsyncCommand, Command
+
+
+def test_spill_init(helpcmd):
+    res = helpcmd.init('test-command')
+    assert res.spill is None
+    assert res.spilled is False
+
+    res = helpcmd.init('test-command', spill=42)
+    assert res.spill == 42
+    assert res.spilled is False
+
+
+def test_spill_small():
+    res = Command('echo "test"', spill=1024)
+    assert res() is True
+    assert res.spilled is False
+    assert res.stdout == 'test'
+
+
+def test_spill_large():
+    res = Command('seq 1 100000', spill=1024)
+    assert res() is True
+    assert res.spilled is True
+    assert isinstance(getattr(res, '_data')['stdout'], mmap)
+    assert res.out[0] == '1'
+    assert res.out[-1] == '100000'
+
+
+def test_spill_records():
+    res = Command('seq 1 100000', spill=1024)
+    assert res() is True
+    assert res.spilled is True
+    num = 0
+    for num, line in enumerate(res.records(), start=1):
+        assert line == str(num)
+    assert num == 100000
+
+
+def test_spill_binary():
+    res = Command('seq 1 1000', spill=16, binary=True)
+    assert res() is True
+    assert res.spilled is True
+    assert res.stdout[:4] == b'1\n2\n'
+    assert next(res.records()) == b'1'
+
+
+def test_spill_error():
+    res = Command('this-is-not-a-command', spill=16)
+    assert res() is False
+    assert res.spilled is False
+    assert isinstance(res.exc, OSError)
+
+
+def test_spill_async(runloop):
+    res = AsyncCommand('seq 1 1000', spill=16)
+    assert runloop(res.run()) is True
+    assert res.spilled is True
+    assert res.out[-1] == '1000'
+
+
+def test_records_pipe():
+    res = Command('printf " aaa\\000bbb \\000"')
+    assert res() is True
+    assert res.stdout == 'aaa\0bbb \0'
+    assert list(res.records(sep=CHAR_NUL)) == [' aaa', 'bbb ']
+
+
+def test_records_edited(helpcmd):
+    res = helpcmd.init('test-command')
+    helpcmd.edit(res, stdout='aaa\nbbb')
+    assert list(res.records()) == ['aaa', 'bbb']
+
+
+def test_spill_binary_out():
+    res = Command('cat', cin='aaa\nbbb\n', spill=0, binary=True)
+    assert res() is True
+    assert res.spilled is True
+    assert res.out == [b'aaa', b'bbb']
+
+
+def test_spill_fields():
+    res = Command('seq 1 100000', spill=1024)
+    assert res() is True
+    assert res.spilled is True
+    assert res.fields['stdout'] == '<588895 bytes spilled>'
+    assert '588895 bytes spilled' in repr(res)
+    assert 'stdout' not in getattr(res, '_cache')
@@ -0,0 +1,60 @@
+from git_sh_sync.proc import CHAR_NUL, Command
+
+
+def test_stream_lines():
+    res = Command('printf "aaa\\nbbb\\nccc\\n"')
+    assert list(res.stream()) == ['aaa', 'bbb', 'ccc']
+    assert res.code == 0
+    assert res.success is True
+    assert res.launched is True
+    assert res.stdout == ''
+
+
+def test_stream_nul():
+    res = Command('printf "aaa\\nbbb\\0ccc\\0"')
+    assert list(res.stream(sep=CHAR_NUL)) == ['aaa\nbbb', 'ccc']
+    assert res.success is True
+
+
+def test_stream_no_trailing():
+    res = Command('printf "aaa\\nbbb"')
+    assert list(res.stream()) == ['aaa', 'bbb']
+
+
+def test_stream_large():
+    res = Command('seq 1 100000')
+    num = 0
+    for num, line in enumerate(res.stream(), start=1):
+        assert line == str(num)
+    assert num == 100000
+    assert res.success is True
+
+
+def test_stream_stdin_stderr():
+    res = Command('sh -c "cat; echo err >&2; exit 3"', cin='aaa\nbbb')
+    assert list(res.stream()) == ['aaa', 'bbb']
+    assert res.code == 3
+    assert res.stderr == 'err'
+    assert res.success is False
+
+
+def test_stream_early_close():
+    res = Command('yes')
+    gen = res.stream()
+    assert next(gen) == 'y'
+    gen.close()
+    assert res.launched is True
+    assert res.success is False
+
+
+def test_stream_error():
+    res = Command('this-is-not-a-command')
+    assert list(res.stream()) == []
+    assert res.launched is True
+    assert isinstance(res.exc, OSError)
+
+
+def test_stream_no_double():
+    res = Command('echo')
+    assert list(res.stream()) == ['']
+    assert list(res.stream()) == []
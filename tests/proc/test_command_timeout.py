@@ -0,0 +1,60 @@
+from time import monotonic
+
+from git_sh_sync.proc import AsyncCommand, Command
+
+
+def test_timeout_init(helpcmd):
+    res = helpcmd.init('test-command')
+    assert res.timeout is None
+    assert res.timed_out is False
+
+    res = helpcmd.init('test-command', timeout=23)
+    assert res.timeout == 23
+    assert res.timed_out is False
+
+
+def test_timeout_in_time():
+    res = Command('echo "test"', timeout=10)
+    assert res() is True
+    assert res.timed_out is False
+    assert res.stdout == 'test'
+
+
+def test_timeout_expires():
+    start = monotonic()
+    res = Command('sh -c "echo early; sleep 10"', timeout=0.2)
+    assert res() is False
+    assert monotonic() - start < 5
+    assert res.timed_out is True
+    assert res.launched is True
+    assert res.success is False
+    assert res.code != 0
+    assert res.stdout == 'early'
+    assert res.fields['timed_out'] is True
+
+
+def test_timeout_kills_group():
+    start = monotonic()
+    res = Command('sh -c "sleep 10 & sleep 10; wait"', timeout=0.2)
+    assert res() is False
+    assert monotonic() - start < 5
+    assert res.timed_out is True
+
+
+def test_timeout_stream():
+    start = monotonic()
+    res = Command('sh -c "echo aaa; sleep 10; echo bbb"', timeout=0.2)
+    assert list(res.stream()) == ['aaa']
+    assert monotonic() - start < 5
+    assert res.timed_out is True
+    assert res.success is False
+
+
+def test_timeout_async(runloop):
+    start = monotonic()
+    res = AsyncCommand('sh -c "sleep 10 & sleep 10; wait"', timeout=0.2)
+    assert runloop(res.run()) is False
+    assert monotonic() - start < 5
+    assert res.timed_out is True
+    assert res.success is False
+    assert res.launched is True
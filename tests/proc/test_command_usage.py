@@ -0,0 +1,54 @@
+from time import time
+
+from git_sh_sync.proc import AsyncCommand, Command, CommandUsage
+
+
+def test_usage_init(helpcmd):
+    res = helpcmd.init('test-command')
+    assert res.started is None
+    assert res.duration is None
+    assert res.usage is None
+
+
+def test_usage_launch():
+    before = time()
+    res = Command('sh -c "sleep 0.1"')
+    assert res() is True
+    assert before <= res.started <= time()
+    assert res.duration >= 0.1
+    assert isinstance(res.usage, CommandUsage)
+    assert res.usage.utime >= 0
+    assert res.usage.stime >= 0
+    assert res.usage.maxrss > 0
+
+
+def test_usage_fields():
+    res = Command('echo')
+    assert res() is True
+    fields = res.fields
+    assert fields['started'] == res.started
+    assert fields['duration'] == res.duration
+    assert fields['usage'] == res.usage
+
+
+def test_usage_stream():
+    res = Command('seq 1 10')
+    assert len(list(res.stream())) == 10
+    assert res.duration is not None
+    assert isinstance(res.usage, CommandUsage)
+
+
+def test_usage_error():
+    res = Command('this-is-not-a-command')
+    assert res() is False
+    assert res.started is not None
+    assert res.duration is not None
+    assert res.usage is None
+
+
+def test_usage_async(runloop):
+    res = AsyncCommand('echo')
+    assert runloop(res.run()) is True
+    assert res.started is not None
+    assert res.duration is not None
+    assert res.usage is None
@@ -0,0 +1,126 @@
+from git_sh_sync.proc import Command
+from git_sh_sync.refs import RefReader, direct_reads
+
+
+def test_reader_init(tmpdir):
+    reader = RefReader(str(tmpdir))
+    assert reader.location == str(tmpdir)
+
+
+def test_reader_no_repo(tmpdir):
+    reader = RefReader(str(tmpdir))
+    assert reader.supported is False
+    assert reader.folders is None
+    assert reader.head() is None
+    assert reader.refs() is None
+    assert reader.remotes() is None
+
+
+def test_reader_reftable(committed):
+    folder, _ = committed
+    folder.join('.git', 'reftable').mkdir()
+
+    reader = RefReader(str(folder))
+    assert reader.supported is False
+    assert reader.refs() is None
+
+
+def test_reader_recording(committed, monkeypatch):
+    folder, _ = committed
+    reader = RefReader(str(folder))
+    assert direct_reads() is True
+    assert reader.supported is True
+
+    monkeypatch.setattr(Command, 'recorders', [lambda _: None])
+    assert direct_reads() is False
+    assert reader.supported is False
+    assert reader.head() is None
+
+    monkeypatch.setattr(Command, 'recorders', [])
+    monkeypatch.setattr(Command, 'replayer', lambda _: None)
+    assert direct_reads() is False
+    assert reader.refs() is None
+
+
+def test_reader_head(committed):
+    folder, git = committed
+    reader = RefReader(str(folder))
+
+    assert reader.head() == (
+        git('symbolic-ref', 'HEAD'), git('rev-parse', 'HEAD')
+    )
+
+    git('checkout', '--detach')
+    assert reader.head() == (None, git('rev-parse', 'HEAD'))
+
+
+def test_reader_unborn(tmpdir):
+    folder = tmpdir.mkdir('unborn.git')
+    folder.join('.git').mkdir()
+    folder.join('.git', 'HEAD').write_text(
+        'ref: refs/heads/main\n', 'utf-8'
+    )
+
+    reader = RefReader(str(folder))
+    assert reader.head() == ('refs/heads/main', None)
+    assert reader.refs() == {}
+
+
+def test_reader_loose_and_packed(committed):
+    folder, git = committed
+    oid = git('rev-parse', 'HEAD')
+    git('branch', 'packed')
+    git('tag', 'nested/tag')
+    git('pack-refs', '--all')
+    git('branch', 'loose')
+    git('tag', '-a', '-m', 'annotated', 'annotated')
+
+    reader = RefReader(str(folder))
+    branches = reader.refs('refs/heads/')
+    assert sorted(branches) == sorted(
+        git('for-each-ref', '--format=%(refname)', 'refs/heads/').split()
+    )
+    assert branches['refs/heads/packed'] == oid
+    assert branches['refs/heads/loose'] == oid
+
+    tags = reader.refs('refs/tags/')
+    assert sorted(tags) == ['refs/tags/annotated', 'refs/tags/nested/tag']
+    assert tags['refs/tags/annotated'] == git('rev-parse', 'annotated')
+
+
+def test_reader_loose_wins(committed):
+    folder, git = committed
+    first = git('rev-parse', 'HEAD')
+    git('branch', 'moving')
+    git('pack-refs', '--all')
+    git('commit', '--allow-empty', '-m', 'second commit')
+    git('branch', '-f', 'moving')
+
+    reader = RefReader(str(folder))
+    assert reader.refs()['refs/heads/moving'] != first
+    assert reader.refs()['refs/heads/moving'] == git('rev-parse', 'HEAD')
+
+
+def test_reader_worktree(committed, tmpdir):
+    folder, git = committed
+    other = tmpdir.join('worktree')
+    git('worktree', 'add', '-b', 'other', str(other))
+
+    reader = RefReader(str(other))
+    assert reader.supported is True
+    assert reader.head() == ('refs/heads/other', git('rev-parse', 'HEAD'))
+    assert 'refs/heads/other' in reader.refs()
+
+
+def test_reader_remotes(committed):
+    folder, git = committed
+    reader = RefReader(str(folder))
+    assert reader.remotes() == []
+
+    git('remote', 'add', 'origin', 'https://example.org/a.git')
+    git('remote', 'add', 'backup', 'https://example.org/b.git')
+    assert reader.remotes() == ['origin', 'backup']
+
+    with folder.join('.git', 'config').open('a') as handle:
+        handle.write('[include]\n\tpath = other\n')
+    assert reader.remotes() is None
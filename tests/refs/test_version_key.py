@@ -0,0 +1,13 @@
+from git_sh_sync.refs import version_key
+
+
+def test_version_key_numbers():
+    assert sorted(['v10', 'v9', 'v1.10', 'v1.9'], key=version_key) == [
+        'v1.9', 'v1.10', 'v9', 'v10'
+    ]
+
+
+def test_version_key_text():
+    assert sorted(['bbb', 'aaa', '1', 'a1'], key=version_key) == [
+        '1', 'a1', 'aaa', 'bbb'
+    ]
@@ -0,0 +1,13 @@
+from pytest import fixture
+
+from git_sh_sync.proc import Command
+
+
+@fixture(scope='function')
+def tape(tmpdir):
+    location = tmpdir.join('tape.gz')
+
+    yield str(location)
+
+    assert Command.recorders == []
+    assert Command.replayer is None
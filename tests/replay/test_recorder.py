@@ -0,0 +1,55 @@
+from git_sh_sync.proc import CHAR_NUL, Command, Pipeline
+from git_sh_sync.replay import Recorder, load
+
+
+def test_recorder_init(tape):
+    rec = Recorder(tape)
+    assert rec.location == tape
+    assert rec.count == 0
+    assert Command.recorders == []
+
+
+def test_recorder_writes(tape):
+    with Recorder(tape) as rec:
+        assert Command.recorders == [rec]
+        Command('cat', cin='hello')()
+        Command('false')()
+    assert rec.count == 2
+
+    first, second = load(tape)
+    assert first.cmd == ['cat']
+    assert first.cin == b'hello'
+    assert first.stdout == b'hello'
+    assert first.code == 0
+    assert first.exc is None
+    assert first.duration > 0
+    assert second.cmd == ['false']
+    assert second.cin is None
+    assert second.code == 1
+
+
+def test_recorder_exception(tape):
+    with Recorder(tape):
+        Command('/does/not/exist')()
+
+    rec, = load(tape)
+    assert rec.code is None
+    assert 'exist' in rec.exc
+
+
+def test_recorder_stream(tape):
+    with Recorder(tape):
+        cmd = Command('printf "aaa\\0bbb\\0"')
+        assert list(cmd.stream(sep=CHAR_NUL)) == ['aaa', 'bbb']
+
+    rec, = load(tape)
+    assert rec.stdout == b'aaa\0bbb'
+
+
+def test_recorder_pipeline(tape):
+    with Recorder(tape):
+        Pipeline('echo abc', 'tr a-z A-Z')()
+
+    rec, = load(tape)
+    assert rec.cmd == [['echo', 'abc'], ['tr', 'a-z', 'A-Z']]
+    assert rec.stdout == b'ABC\n'
@@ -0,0 +1,160 @@
+from git_sh_sync.proc import CHAR_NUL, AsyncCommand, Command, Pipeline
+from git_sh_sync.replay import Recorder, Replayer
+from git_sh_sync.repo import Repository
+
+
+def test_replayer_init(tape):
+    with Recorder(tape):
+        Command('true')()
+
+    play = Replayer(tape)
+    assert play.location == tape
+    assert play.count == 0
+    assert Command.replayer is None
+
+
+def test_replayer_output(tape, tmpdir):
+    with Recorder(tape):
+        Command('cat', cin='hello')()
+        Command('pwd', cwd=str(tmpdir))()
+
+    with Replayer(tape) as play:
+        assert Command.replayer is play
+        cat = Command('cat', cin='hello')
+        assert cat() is True
+        assert cat.stdout == 'hello'
+        assert cat.usage is None
+        pwd = Command('pwd', cwd=str(tmpdir))
+        assert pwd() is True
+        assert pwd.stdout == str(tmpdir)
+    assert play.count == 2
+
+
+def test_replayer_not_launched(tape, tmpdir):
+    marker = tmpdir.join('marker')
+    with Recorder(tape):
+        Command('touch marker', cwd=str(tmpdir))()
+    marker.remove()
+
+    with Replayer(tape):
+        assert Command('touch marker', cwd=str(tmpdir))() is True
+    assert marker.check() is False
+
+
+def test_replayer_order(tape, tmpdir):
+    counter = tmpdir.join('counter')
+    with Recorder(tape):
+        for _ in range(2):
+            Command('sh -c "echo x >> counter; wc -l < counter"',
+                    cwd=str(tmpdir))()
+
+    with Replayer(tape):
+        outputs = [
+            Command('sh -c "echo x >> counter; wc -l < counter"',
+                    cwd=str(tmpdir)) for _ in range(3)
+        ]
+        for cmd in outputs:
+            cmd()
+    assert [cmd.stdout for cmd in outputs] == ['1', '2', '2']
+    assert counter.read_text('utf-8') == 'x\nx\n'
+
+
+def test_replayer_missing(tape):
+    with Recorder(tape):
+        Command('true')()
+
+    with Replayer(tape):
+        cmd = Command('false')
+        assert cmd() is False
+        assert isinstance(cmd.exc, ValueError)
+        assert cmd.code is None
+
+
+def test_replayer_failures(tape):
+    with Recorder(tape):
+        Command('false')()
+        Command('/does/not/exist')()
+        Command('sleep 1', timeout=0.05)()
+
+    with Replayer(tape):
+        false = Command('false')
+        assert false() is False
+        assert false.code == 1
+        missing = Command('/does/not/exist')
+        assert missing() is False
+        assert isinstance(missing.exc, OSError)
+        sleep = Command('sleep 1', timeout=0.05)
+        assert sleep() is False
+        assert sleep.timed_out is True
+
+
+def test_replayer_stream(tape):
+    with Recorder(tape):
+        list(Command('printf "aaa\\0bbb\\0"').stream(sep=CHAR_NUL))
+
+    with Replayer(tape):
+        cmd = Command('printf "aaa\\0bbb\\0"')
+        assert list(cmd.stream(sep=CHAR_NUL)) == ['aaa', 'bbb']
+        assert cmd.success is True
+
+
+def test_replayer_spill(tape):
+    with Recorder(tape):
+        Command('seq 1000')()
+
+    with Replayer(tape):
+        cmd = Command('seq 1000', spill=16)
+        assert cmd() is True
+        assert cmd.spilled is True
+        assert cmd.out[-1] == '1000'
+
+
+def test_replayer_async(tape, runloop):
+    with Recorder(tape):
+        runloop(AsyncCommand('echo abc').run())
+
+    with Replayer(tape):
+        cmd = AsyncCommand('echo abc')
+        assert runloop(cmd.run()) is True
+        assert cmd.stdout == 'abc'
+
+
+def test_replayer_pipeline(tape):
+    with Recorder(tape):
+        Pipeline('echo abc', 'tr a-z A-Z')()
+
+    with Replayer(tape):
+        pipe = Pipeline('echo abc', 'tr a-z A-Z')
+        assert pipe() is True
+        assert pipe.stdout == 'ABC'
+
+
+def test_replayer_repository(tape, tmpdir):
+    folder = tmpdir.mkdir('repo')
+    Command('git init', cwd=str(folder))()
+    folder.join('aaa').write_text('content aaa', 'utf-8')
+    Command('git add aaa', cwd=str(folder))()
+    Command('git commit -m "first commit"', cwd=str(folder))()
+    folder.join('bbb').write_text('content bbb', 'utf-8')
+
+    with Recorder(tape):
+        repo = Repository(str(folder), cache=False)
+        status = repo.status
+        branches = repo.branches()
+        tags = repo.tags
+        log = repo.log(num=2)
+
+    assert status.untracked == ['bbb']
+    assert branches.current == 'master'
+    assert branches.all == ['master']
+    assert len(log) == 1
+    assert folder.remove() is None
+
+    with Replayer(tape):
+        repo = Repository(str(folder), cache=False)
+        assert repo.is_repo is True
+        assert repo.status == status
+        assert repo.branches() == branches
+        assert repo.tags == tags
+        assert repo.log(num=2) == log
+    assert folder.check() is False
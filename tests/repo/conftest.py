@@ -4,7 +4,11 @@ from subprocess import run
 
 from pytest import fixture
 
-from git_sh_sync.repo import Repository
+from git_sh_sync.cache import ResultCache
+from git_sh_sync.refs import RefReader
+from git_sh_sync.repo import (
+    GIT_CLONE_MODES, GIT_PROFILES, SPILL_SIZE, Repository
+)
 
 
 @fixture(scope='function')
@@ -17,7 +21,18 @@ def initrepo(tmpdir, monkeypatch):
 
         setattr(repo, 'location', str(folder))
         setattr(repo, 'remote_name', 'origin')
+        setattr(repo, 'timeout', None)
+        setattr(repo, 'spill', SPILL_SIZE)
+        setattr(repo, 'untracked', 'normal')
+        setattr(repo, 'strategy', 'checkout')
+        setattr(repo, 'clone_mode', GIT_CLONE_MODES['full'])
+        setattr(repo, 'object_cache', None)
+        setattr(repo, 'dissociate', False)
+        setattr(repo, 'profile', GIT_PROFILES['default'])
         setattr(repo, '_log', getLogger(repo.__class__.__name__))
+        setattr(repo, '_cache', ResultCache(str(folder)))
+        setattr(repo, '_refs', RefReader(str(folder)))
+        setattr(repo, '_deferred', None)
 
         if init:
             run(['git', 'init'], cwd=str(folder))
@@ -0,0 +1,37 @@
+from git_sh_sync.repo import Repository
+
+
+def test_cache_queries(gitrepo):
+    gitrepo.write('aaa', 'content')
+    gitrepo.add('aaa')
+    gitrepo.commit('aaa commit message')
+
+    cache = gitrepo.repo.cache
+    hits = cache.hits
+
+    assert gitrepo.repo.tags == []
+    assert gitrepo.repo.tags == []
+    assert gitrepo.repo.branches().all == ['master']
+    assert gitrepo.repo.branches().all == ['master']
+    assert len(gitrepo.repo.log()) == 1
+    assert len(gitrepo.repo.log()) == 1
+    assert cache.hits == hits + 3
+
+    assert gitrepo.repo.tag('aaa-tag') is True
+    assert gitrepo.repo.tags == ['aaa-tag']
+
+    assert gitrepo.repo.checkout('other') is True
+    assert gitrepo.repo.branches().current == 'other'
+
+
+def test_cache_disabled(tmpdir):
+    folder = tmpdir.join('repo.git')
+    repo = Repository(str(folder), cache=False)
+
+    cache = repo.cache
+    assert cache.enabled is False
+    assert repo.tags == []
+    assert repo.tags == []
+    assert cache.hits == 0
+
+    assert folder.remove() is None
@@ -31,3 +31,24 @@ def test_call_complete_cycle(tmpdir, gitrepo):
     assert repo.status.clean is True
 
     assert folder.remove() is None
+
+
+def test_call_timeout(tmpdir, gitrepo):
+    gitrepo.write('aaa', 'content')
+    gitrepo.add('aaa')
+    gitrepo.commit('aaa')
+
+    gitrepo.make_bare()
+
+    folder = tmpdir.join('repo.git')
+    repo = Repository(
+        str(folder), remote_url=str(gitrepo.folder), timeout=30
+    )
+    assert repo.timeout == 30
+
+    folder.join('bbb').write_text('content', 'utf-8')
+
+    assert repo() is True
+    assert repo.status.clean is True
+
+    assert folder.remove() is None
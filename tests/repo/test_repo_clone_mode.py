@@ -0,0 +1,82 @@
+from subprocess import PIPE, run
+
+from git_sh_sync.repo import GIT_CLONE_MODES, GitCloneMode, Repository
+
+
+def origin(gitrepo, commits=3):
+    for num in range(commits):
+        gitrepo.write('file', 'content {}'.format(num))
+        gitrepo.add('file')
+        gitrepo.commit('commit {}'.format(num))
+    gitrepo.tag('some-tag')
+    run(
+        ['git', 'config', 'uploadpack.allowFilter', 'true'],
+        cwd=gitrepo.repo.location
+    )
+    return 'file://{}'.format(gitrepo.folder)
+
+
+def config(repo, key):
+    return run(
+        ['git', 'config', key], cwd=repo.location, stdout=PIPE,
+        universal_newlines=True
+    ).stdout.strip()
+
+
+def test_clone_mode_default(tmpdir):
+    repo = Repository(str(tmpdir.join('repo.git')))
+    assert repo.clone_mode == GIT_CLONE_MODES['full']
+    assert repo.is_shallow is False
+    assert repo.deepen() is True
+
+
+def test_clone_mode_shallow(tmpdir, gitrepo):
+    url = origin(gitrepo)
+    repo = Repository(
+        str(tmpdir.join('repo.git')), remote_url=url, clone_mode='shallow'
+    )
+
+    assert repo.is_shallow is True
+    assert len(repo.log()) == 1
+    assert repo.tags == []
+
+    gitrepo.write('other', 'content')
+    gitrepo.add('other')
+    gitrepo.commit('other')
+
+    assert repo.cleanup() is True
+    assert repo.tags == []
+    assert repo.log(num=1)[0].message == 'other'
+
+    assert repo.deepen(depth=1) is True
+    assert repo.is_shallow is True
+    assert repo.deepen() is True
+    assert repo.is_shallow is False
+    assert len(repo.log()) == 4
+
+
+def test_clone_mode_blobless(tmpdir, gitrepo):
+    url = origin(gitrepo)
+    repo = Repository(
+        str(tmpdir.join('repo.git')), remote_url=url, clone_mode='blobless'
+    )
+
+    assert config(repo, 'remote.origin.partialclonefilter') == 'blob:none'
+    assert repo.is_shallow is False
+    assert len(repo.log()) == 3
+    assert repo.tags == ['some-tag']
+    assert repo.read('file') == b'content 2'
+
+
+def test_clone_mode_custom(tmpdir, gitrepo):
+    url = origin(gitrepo)
+    repo = Repository(
+        str(tmpdir.join('repo.git')), remote_url=url,
+        clone_mode=GitCloneMode(
+            filter='tree:0', depth=2, single_branch=True, tags=True
+        )
+    )
+
+    assert config(repo, 'remote.origin.partialclonefilter') == 'tree:0'
+    assert repo.is_shallow is True
+    assert len(repo.log()) == 2
@@ -0,0 +1,69 @@
+from git_sh_sync.proc import Command
+from git_sh_sync.repo import Repository
+
+
+def test_lazy_no_io(tmpdir, monkeypatch):
+    launched = []
+    monkeypatch.setattr(Command, 'recorders', [launched.append])
+
+    folder = tmpdir.join('repo.git')
+    repo = Repository(str(folder), lazy=True)
+
+    assert launched == []
+    assert folder.check() is False
+
+    assert repo.status.clean is True
+    assert folder.join('.git').check(dir=True) is True
+    assert launched
+
+
+def test_lazy_prepares_once(tmpdir):
+    folder = tmpdir.join('repo.git')
+    repo = Repository(str(folder), lazy=True)
+
+    assert repo.is_repo is True
+    assert repo._deferred is None
+    assert repo.branches().current == 'master'
+
+
+def test_open_existing(tmpdir, gitrepo, monkeypatch):
+    launched = []
+    monkeypatch.setattr(Command, 'recorders', [launched.append])
+
+    repos = [Repository.open(str(gitrepo.folder)) for _ in range(100)]
+    assert launched == []
+
+    gitrepo.write('aaa', 'content')
+    assert repos[0].status.untracked == ['aaa']
+    assert repos[0].location == gitrepo.repo.location
+    assert [cmd.cmd[1] for cmd in launched] == ['status']
+
+
+def test_open_missing(tmpdir):
+    folder = tmpdir.join('repo.git')
+    repo = Repository.open(str(folder), master_branch='main')
+
+    assert repo.master_branch == 'main'
+    assert repo.is_repo is False
+    assert folder.check() is False
+
+
+def test_init(tmpdir):
+    folder = tmpdir.join('repo.git')
+    repo = Repository.init(str(folder))
+
+    assert folder.join('.git').check(dir=True) is True
+    assert repo.is_repo is True
+
+
+def test_clone(tmpdir, gitrepo):
+    gitrepo.write('aaa', 'content')
+    gitrepo.add('aaa')
+    gitrepo.commit('aaa')
+
+    folder = tmpdir.join('repo.git')
+    repo = Repository.clone(str(gitrepo.folder), str(folder), lazy=True)
+    assert folder.check() is False
+
+    assert repo.remote_names == ['origin']
+    assert folder.join('aaa').check() is True
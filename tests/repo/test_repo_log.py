@@ -33,3 +33,15 @@ def test_log_multi(gitrepo):
     log = logs[-1]
     assert log.full.startswith(log.short)
     assert log.message == 'bbb commit message'
+
+
+def test_log_multiline(gitrepo):
+    gitrepo.write('aaa', 'content')
+    gitrepo.add('aaa')
+    gitrepo.commit('aaa commit message\n\nwith some body\nmore body')
+
+    logs = gitrepo.repo.log()
+    assert len(logs) == 1
+
+    log = logs[-1]
+    assert log.message == 'aaa commit message\n\nwith some body\nmore body'
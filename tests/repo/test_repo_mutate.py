@@ -1,5 +1,7 @@
 from logging import ERROR
 
+from git_sh_sync.proc import Command
+
 
 def test_mutate_empty(gitrepo):
     assert gitrepo.repo.mutate() is True
@@ -84,3 +86,71 @@ def test_mutate_conflict_logs(gitrepo, conflict, caplog):
     assert 'conflicting file' in rec.msg
     assert 'file' in rec.args[0]
     assert gitrepo.repo.location in rec.args[-1]
+
+
+def test_mutate_bulk_odd_names(gitrepo):
+    names = ['with space', 'with "quotes"', 'with\nnewline', '*']
+    for name in names:
+        gitrepo.write(name, 'content')
+    gitrepo.write('other', 'content')
+
+    assert gitrepo.repo.mutate() is True
+    status = gitrepo.repo.status
+    assert status.clean is True
+
+    for name in names:
+        gitrepo.remove(name)
+
+    assert sorted(gitrepo.repo.status.deleted) == sorted(names)
+    assert gitrepo.repo.mutate() is True
+    assert gitrepo.repo.status.clean is True
+    assert gitrepo.folder.join('other').check() is True
+
+
+def test_mutate_everything(gitrepo):
+    gitrepo.write('aaa', 'content')
+    gitrepo.write('folder/bbb', 'content')
+
+    assert gitrepo.repo.mutate(everything=True) is True
+    assert gitrepo.repo.status.clean is True
+
+
+def test_mutate_reports_paths(gitrepo, caplog):
+    caplog.set_level(ERROR)
+    gitrepo.write('aaa', 'content')
+
+    status = gitrepo.repo.status._replace(untracked=['aaa', 'missing'])
+    assert gitrepo.repo.mutate(status=status) is False
+    assert gitrepo.repo.status.clean is True
+
+    rec = caplog.records[-1]
+    assert 'could not stage' in rec.msg
+    assert rec.args[0] == 'missing'
+
+
+def test_mutate_no_retry_on_lock(gitrepo, caplog, monkeypatch):
+    caplog.set_level(ERROR)
+    for name in ('aaa', 'bbb', 'ccc'):
+        gitrepo.write(name, 'content')
+    status = gitrepo.repo.status
+    gitrepo.folder.join('.git', 'index.lock').write('')
+
+    launched = []
+    monkeypatch.setattr(Command, 'recorders', [launched.append])
+    assert gitrepo.repo.mutate(status=status) is False
+    assert len(launched) == 1
+
+    rec = caplog.records[-1]
+    assert 'could not stage' in rec.msg
+    assert rec.args[0] == 3
+
+
+def test_mutate_untranslated(gitrepo, monkeypatch):
+    gitrepo.write('aaa', 'content')
+    monkeypatch.setenv('LANGUAGE', 'de')
+    monkeypatch.setenv('LC_ALL', 'de_DE.UTF-8')
+
+    launched = []
+    monkeypatch.setattr(Command, 'recorders', [launched.append])
+    assert gitrepo.repo.mutate() is True
+    assert launched[-1].env['LC_ALL'] == 'C'
@@ -0,0 +1,26 @@
+def test_objects_empty(gitrepo):
+    assert gitrepo.repo.objects('HEAD') == [None]
+    assert gitrepo.repo.read('aaa') is None
+    gitrepo.repo.close()
+
+
+def test_objects_read(gitrepo):
+    gitrepo.write('aaa', 'content 1')
+    gitrepo.add('aaa')
+    gitrepo.commit('first commit')
+    gitrepo.checkout_branch('other')
+    gitrepo.write('aaa', 'content 2')
+    gitrepo.add('aaa')
+    gitrepo.commit('second commit')
+
+    assert gitrepo.repo.read('aaa') == b'content 2'
+    assert gitrepo.repo.read('aaa', 'master') == b'content 1'
+    assert gitrepo.repo.read('aaa', 'other') == b'content 2'
+    assert gitrepo.repo.read('nothing', 'other') is None
+    assert gitrepo.repo.read('', 'other') is None
+
+    commit, = gitrepo.repo.objects('other', contents=False)
+    assert commit.kind == 'commit'
+    assert commit.data is None
+
+    gitrepo.repo.close()
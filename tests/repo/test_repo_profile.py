@@ -0,0 +1,62 @@
+from os import chmod, devnull
+
+from git_sh_sync.repo import GIT_PROFILES, GitProfile, Repository
+
+
+def test_profile_default(gitrepo):
+    assert gitrepo.repo.profile == GIT_PROFILES['default']
+
+    cmd = getattr(gitrepo.repo, '_git')('git status')
+    assert cmd.cmd == ['git', 'status']
+    assert cmd.cwd == gitrepo.repo.location
+    assert cmd.environment is None
+
+
+def test_profile_named(tmpdir):
+    folder = tmpdir.join('repo.git')
+    repo = Repository(str(folder), profile='nohooks')
+    assert repo.profile == GIT_PROFILES['nohooks']
+
+    cmd = getattr(repo, '_git')('git commit')
+    assert cmd.cmd == [
+        'git', '-c', 'core.hooksPath={}'.format(devnull), 'commit'
+    ]
+    assert cmd.env['LC_ALL'] == 'C'
+    assert cmd.env['GIT_TERMINAL_PROMPT'] == '0'
+    assert 'GIT_OPTIONAL_LOCKS' not in cmd.env
+
+    cmd = getattr(repo, '_git')('git status', query=True)
+    assert cmd.env['GIT_OPTIONAL_LOCKS'] == '0'
+
+    assert folder.remove() is None
+
+
+def test_profile_custom(tmpdir):
+    folder = tmpdir.join('repo.git')
+    repo = Repository(str(folder), profile=GitProfile(
+        env=dict(GIT_AUTHOR_NAME='Profile Name'), config={}, query_env={}
+    ))
+
+    folder.join('file').write_text('content', 'utf-8')
+    assert repo.scrub() is True
+
+    cmd = getattr(repo, '_git')('git log --format=%an', query=True)
+    assert cmd() is True
+    assert cmd.stdout == 'Profile Name'
+
+    assert folder.remove() is None
+
+
+def test_profile_hooks(tmpdir):
+    def make(profile):
+        folder = tmpdir.join(profile)
+        repo = Repository(str(folder), profile=profile)
+        hook = folder.join('.git', 'hooks', 'pre-commit')
+        hook.write_text('#!/bin/sh\nexit 1\n', 'utf-8', ensure=True)
+        chmod(str(hook), 0o755)
+        folder.join('file').write_text('content', 'utf-8')
+        assert repo.mutate() is True
+        return getattr(repo, '_git')('git commit -m "commit"')()
+
+    assert make('default') is False
+    assert make('nohooks') is True
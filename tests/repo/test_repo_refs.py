@@ -0,0 +1,44 @@
+from subprocess import run
+
+from git_sh_sync.refs import RefReader
+
+
+def test_refs_without_git(gitrepo, monkeypatch):
+    gitrepo.write('aaa', 'content')
+    gitrepo.add('aaa')
+    gitrepo.commit('aaa')
+    gitrepo.tag('v1.9')
+    gitrepo.tag('v1.10')
+    run(['git', 'pack-refs', '--all'], cwd=gitrepo.repo.location)
+    gitrepo.checkout_branch('client')
+
+    monkeypatch.setattr(gitrepo.repo, '_git', None)
+
+    assert gitrepo.repo.is_repo is True
+    assert gitrepo.repo.branches().current == 'client'
+    assert gitrepo.repo.branches().all == ['client', 'master']
+    assert gitrepo.repo.tags == ['v1.10', 'v1.9']
+    assert gitrepo.repo.remote_names == []
+
+
+def test_refs_detached_falls_back(gitrepo):
+    gitrepo.write('aaa', 'content')
+    gitrepo.add('aaa')
+    gitrepo.commit('aaa')
+    run(['git', 'checkout', '--detach'], cwd=gitrepo.repo.location)
+
+    branches = gitrepo.repo.branches()
+    assert 'detached' in branches.current
+    assert 'master' in branches.all
+
+
+def test_refs_unsupported_tags_spilled(gitrepo, monkeypatch):
+    gitrepo.write('aaa', 'content')
+    gitrepo.add('aaa')
+    gitrepo.commit('aaa')
+    gitrepo.tag('v1.9')
+    gitrepo.tag('v1.10')
+
+    monkeypatch.setattr(RefReader, 'folders', property(lambda _: None))
+    gitrepo.repo.spill = 0
+    assert gitrepo.repo.tags == ['v1.10', 'v1.9']
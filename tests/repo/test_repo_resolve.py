@@ -0,0 +1,64 @@
+from subprocess import run
+
+from git_sh_sync.repo import GitRevision
+
+
+def test_resolve_unknown(gitrepo):
+    assert gitrepo.repo.resolve('master') is None
+    assert gitrepo.repo.resolve('') is None
+    assert gitrepo.repo.resolve('-b') is None
+
+    gitrepo.write('aaa', 'content')
+    gitrepo.add('aaa')
+    gitrepo.commit('aaa')
+
+    assert gitrepo.repo.resolve('nope') is None
+    assert gitrepo.repo.resolve('HEAD:aaa') is None
+
+
+def test_resolve_kinds(gitrepo):
+    gitrepo.write('aaa', 'content')
+    gitrepo.add('aaa')
+    gitrepo.commit('aaa')
+    gitrepo.tag('v1')
+    gitrepo.checkout_branch('feature')
+    full = gitrepo.repo.log(num=1)[0].full
+
+    assert gitrepo.repo.resolve('feature') == GitRevision(
+        kind='branch', name='refs/heads/feature', oid=full
+    )
+    assert gitrepo.repo.resolve('v1') == GitRevision(
+        kind='tag', name='refs/tags/v1', oid=full
+    )
+    assert gitrepo.repo.resolve(full[:7]) == GitRevision(
+        kind='commit', name=None, oid=full
+    )
+    assert gitrepo.repo.resolve(full) == GitRevision(
+        kind='commit', name=None, oid=full
+    )
+
+
+def test_resolve_annotated_tag(gitrepo):
+    gitrepo.write('aaa', 'content')
+    gitrepo.add('aaa')
+    gitrepo.commit('aaa')
+    full = gitrepo.repo.log(num=1)[0].full
+    run(
+        ['git', 'tag', '-a', '-m', 'annotated', 'v2'],
+        cwd=gitrepo.repo.location
+    )
+
+    assert gitrepo.repo.resolve('v2') == GitRevision(
+        kind='tag', name='refs/tags/v2', oid=full
+    )
+
+
+def test_resolve_no_substrings(gitrepo):
+    gitrepo.write('aaa', 'content')
+    gitrepo.add('aaa')
+    gitrepo.commit('aaa')
+    gitrepo.checkout_branch('feature')
+
+    assert gitrepo.repo.resolve('feat') is None
+    assert gitrepo.repo.checkout('feat') is True
+    assert gitrepo.repo.branches().current == 'feat'
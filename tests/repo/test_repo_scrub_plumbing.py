@@ -0,0 +1,167 @@
+from logging import WARNING
+from subprocess import PIPE, run
+
+from pytest import raises
+
+from git_sh_sync.repo import Repository
+
+
+def git(repo, *args):
+    return run(
+        ['git', *args], cwd=repo.location, stdout=PIPE,
+        universal_newlines=True
+    ).stdout.strip()
+
+
+def test_plumbing_strategy(tmpdir):
+    folder = tmpdir.join('repo.git')
+    assert Repository(str(folder), strategy='plumbing').strategy == 'plumbing'
+
+    with raises(ValueError):
+        Repository(str(folder), strategy='some')
+
+
+def test_plumbing_unborn(gitrepo):
+    gitrepo.repo.strategy = 'plumbing'
+    gitrepo.write('file', 'content')
+
+    assert gitrepo.repo.scrub(branch_name='temp') is True
+
+    log = gitrepo.repo.log()
+    assert len(log) == 1
+    assert 'auto commit' in log[-1].message
+    assert gitrepo.repo.branches().current == 'master'
+    assert git(gitrepo.repo, 'rev-parse', 'temp') == log[-1].full
+    assert gitrepo.repo.status.clean is True
+    assert gitrepo.folder.join('.git', 'index.lock').check() is False
+
+
+def test_plumbing_keeps_worktree(gitrepo):
+    gitrepo.repo.strategy = 'plumbing'
+    gitrepo.write('aaa', 'content')
+    gitrepo.write('bbb', 'content')
+    gitrepo.add('aaa', 'bbb')
+    gitrepo.commit('first')
+    first = gitrepo.repo.log(num=1)[0].full
+
+    gitrepo.write('aaa', 'changed')
+    gitrepo.remove('bbb')
+    gitrepo.write('new folder/ccc', 'content')
+    before = gitrepo.folder.join('aaa').stat().mtime
+
+    assert gitrepo.repo.scrub(branch_name='temp') is True
+
+    assert gitrepo.folder.join('aaa').stat().mtime == before
+    assert gitrepo.repo.status.clean is True
+    assert git(gitrepo.repo, 'rev-parse', 'HEAD^') == first
+    assert git(gitrepo.repo, 'rev-parse', 'HEAD') == git(
+        gitrepo.repo, 'rev-parse', 'temp'
+    )
+    assert git(gitrepo.repo, 'ls-tree', '-r', '--name-only', 'HEAD').split(
+        '\n'
+    ) == ['aaa', 'new folder/ccc']
+    assert git(gitrepo.repo, 'show', 'HEAD:aaa') == 'changed'
+
+
+def test_plumbing_conflict(gitrepo, conflict, caplog):
+    caplog.set_level(WARNING)
+    conflict(gitrepo, filename='file')
+    gitrepo.repo.strategy = 'plumbing'
+
+    assert gitrepo.repo.scrub() is False
+    assert 'problems discovered' in caplog.records[-1].msg
+    assert gitrepo.folder.join('.git', 'index.lock').check() is False
+    assert 'file' in gitrepo.repo.status.conflicting
+
+
+def test_plumbing_locked(gitrepo, caplog):
+    gitrepo.repo.strategy = 'plumbing'
+    gitrepo.write('file', 'content')
+    gitrepo.folder.join('.git', 'index.lock').write_text('', 'utf-8')
+
+    assert gitrepo.repo.scrub() is False
+    assert 'could not lock' in caplog.records[-1].msg
+    assert gitrepo.repo.log() == []
+    assert gitrepo.folder.join('.git', 'index.lock').check() is True
+
+
+def test_plumbing_merged_branch(gitrepo):
+    gitrepo.repo.strategy = 'plumbing'
+    gitrepo.write('aaa', 'content')
+    gitrepo.add('aaa')
+    gitrepo.commit('first')
+    gitrepo.checkout_branch('temp')
+    gitrepo.checkout('master')
+    gitrepo.write('aaa', 'changed')
+    gitrepo.add('aaa')
+    gitrepo.commit('second')
+
+    gitrepo.write('bbb', 'content')
+    assert gitrepo.repo.scrub(branch_name='temp') is True
+    assert gitrepo.repo.status.clean is True
+    assert git(gitrepo.repo, 'rev-parse', 'temp') == git(
+        gitrepo.repo, 'rev-parse', 'HEAD'
+    )
+
+
+def test_plumbing_unmerged_branch(gitrepo, caplog):
+    gitrepo.repo.strategy = 'plumbing'
+    gitrepo.write('aaa', 'content')
+    gitrepo.add('aaa')
+    gitrepo.commit('first')
+    gitrepo.checkout_branch('temp')
+    gitrepo.write('bbb', 'content')
+    gitrepo.add('bbb')
+    gitrepo.commit('unmerged')
+    unmerged = git(gitrepo.repo, 'rev-parse', 'temp')
+    gitrepo.checkout('master')
+    head = git(gitrepo.repo, 'rev-parse', 'HEAD')
+
+    gitrepo.write('ccc', 'content')
+    assert gitrepo.repo.scrub(branch_name='temp') is False
+    assert git(gitrepo.repo, 'rev-parse', 'temp') == unmerged
+    assert git(gitrepo.repo, 'rev-parse', 'HEAD') == head
+    assert gitrepo.repo.status.untracked == ['ccc']
+    assert gitrepo.folder.join('.git', 'index.lock').check() is False
+    assert 'not merged' in caplog.records[-1].msg
+
+
+def test_plumbing_current_branch(gitrepo):
+    gitrepo.repo.strategy = 'plumbing'
+    gitrepo.write('aaa', 'content')
+    gitrepo.add('aaa')
+    gitrepo.commit('first')
+    first = git(gitrepo.repo, 'rev-parse', 'HEAD')
+
+    gitrepo.write('bbb', 'content')
+    assert gitrepo.repo.scrub(branch_name='master') is True
+    assert gitrepo.repo.status.clean is True
+    assert git(gitrepo.repo, 'rev-parse', 'HEAD^') == first
+    assert git(gitrepo.repo, 'symbolic-ref', 'HEAD') == 'refs/heads/master'
+    assert git(gitrepo.repo, 'diff', '--cached', '--name-only') == ''
+
+
+def test_plumbing_current_branch_unborn(gitrepo):
+    gitrepo.repo.strategy = 'plumbing'
+    gitrepo.write('file', 'content')
+
+    assert gitrepo.repo.scrub(branch_name='master') is True
+    assert gitrepo.repo.status.clean is True
+    assert len(gitrepo.repo.log()) == 1
+    assert git(gitrepo.repo, 'diff', '--cached', '--name-only') == ''
+
+
+def test_plumbing_refs_atomic(gitrepo):
+    gitrepo.repo.strategy = 'plumbing'
+    gitrepo.write('aaa', 'content')
+    gitrepo.add('aaa')
+    gitrepo.commit('first')
+    gitrepo.checkout_branch('temp/blocking')
+    gitrepo.checkout('master')
+    head = git(gitrepo.repo, 'rev-parse', 'HEAD')
+
+    gitrepo.write('bbb', 'content')
+    assert gitrepo.repo.scrub(branch_name='temp') is False
+    assert git(gitrepo.repo, 'rev-parse', 'HEAD') == head
+    assert gitrepo.repo.status.untracked == ['bbb']
+    assert gitrepo.folder.join('.git', 'index.lock').check() is False
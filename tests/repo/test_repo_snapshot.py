@@ -0,0 +1,66 @@
+from subprocess import run
+
+from git_sh_sync.repo import GitSnapshot, Repository
+
+
+def test_snapshot_initial(gitrepo):
+    snap = gitrepo.repo.snapshot()
+    assert isinstance(snap, GitSnapshot)
+    assert snap.oid is None
+    assert snap.branch == gitrepo.repo.branches().current
+    assert snap.upstream is None
+    assert snap.ahead is None
+    assert snap.behind is None
+    assert snap.status.clean is True
+
+
+def test_snapshot_status(gitrepo):
+    gitrepo.write('aaa', 'content')
+    gitrepo.add('aaa')
+    gitrepo.commit('aaa')
+    gitrepo.write('bbb', 'content')
+
+    snap = gitrepo.repo.snapshot()
+    assert snap.oid == gitrepo.repo.log(num=1)[0].full
+    assert snap.status == gitrepo.repo.status
+    assert snap.status.untracked == ['bbb']
+
+
+def test_snapshot_detached(gitrepo):
+    gitrepo.write('aaa', 'content')
+    gitrepo.add('aaa')
+    gitrepo.commit('aaa')
+    full = gitrepo.repo.log(num=1)[0].full
+    gitrepo.checkout(full)
+
+    snap = gitrepo.repo.snapshot()
+    assert snap.branch is None
+    assert snap.oid == full
+
+
+def test_snapshot_upstream(tmpdir, gitrepo):
+    gitrepo.write('aaa', 'content')
+    gitrepo.add('aaa')
+    gitrepo.commit('aaa')
+    branch = gitrepo.repo.branches().current
+
+    folder = tmpdir.join('repo.git')
+    repo = Repository(str(folder), remote_url=str(gitrepo.folder))
+
+    snap = repo.snapshot()
+    assert snap.branch == branch
+    assert snap.upstream == 'origin/{}'.format(branch)
+    assert (snap.ahead, snap.behind) == (0, 0)
+
+    folder.join('bbb').write_text('content', 'utf-8')
+    run(['git', 'add', 'bbb'], cwd=str(folder))
+    run(['git', 'commit', '-m', 'bbb'], cwd=str(folder))
+    gitrepo.write('ccc', 'content')
+    gitrepo.add('ccc')
+    gitrepo.commit('ccc')
+    run(['git', 'fetch'], cwd=str(folder))
+
+    snap = repo.snapshot()
+    assert (snap.ahead, snap.behind) == (1, 1)
+
+    assert folder.remove() is None
@@ -1,3 +1,10 @@
+from subprocess import run
+
+from pytest import raises
+
+from git_sh_sync.repo import GitSubmodule
+
+
 def test_status_untracked(gitrepo):
     assert gitrepo.repo.status.untracked == []
     assert gitrepo.repo.status.clean is True
@@ -57,3 +64,99 @@ def test_status_conflicting(gitrepo, conflict):
 
     assert gitrepo.repo.status.conflicting == ['conflicting']
     assert gitrepo.repo.status.clean is False
+
+
+def test_status_modified_unstaged(gitrepo):
+    gitrepo.write('aaa', 'aaa')
+    gitrepo.write('bbb', 'bbb')
+    gitrepo.add('aaa', 'bbb')
+    gitrepo.commit('aaa and bbb')
+
+    assert gitrepo.repo.status.clean is True
+
+    gitrepo.write('aaa', 'changed')
+    gitrepo.write('bbb', 'changed')
+
+    assert gitrepo.repo.status.modified == ['aaa', 'bbb']
+    assert gitrepo.repo.status.clean is False
+
+
+def test_status_odd_names(gitrepo):
+    gitrepo.write('with space', '')
+    gitrepo.write('with "quotes"', '')
+    gitrepo.write('with\nnewline', '')
+
+    assert sorted(gitrepo.repo.status.untracked) == [
+        'with\nnewline', 'with "quotes"', 'with space'
+    ]
+
+
+def test_status_carriage_return(gitrepo):
+    gitrepo.write('with\rreturn', '')
+
+    assert gitrepo.repo.status.untracked == ['with\rreturn']
+    assert gitrepo.repo.mutate() is True
+    assert gitrepo.repo.status.clean is True
+
+
+def test_status_renamed(gitrepo):
+    gitrepo.write('before', 'content')
+    gitrepo.add('before')
+    gitrepo.commit('before')
+
+    run(['git', 'mv', 'before', 'after'], cwd=gitrepo.repo.location)
+
+    status = gitrepo.repo.status
+    assert status.renamed == [('before', 'after')]
+    assert status.modified == []
+    assert status.clean is True
+
+    gitrepo.write('after', 'changed')
+
+    status = gitrepo.repo.status
+    assert status.renamed == [('before', 'after')]
+    assert status.modified == ['after']
+    assert status.clean is False
+
+
+def test_status_untracked_modes(gitrepo):
+    gitrepo.write('build/one', '')
+    gitrepo.write('build/two', '')
+
+    assert gitrepo.repo.scan(untracked='no').untracked == []
+    assert gitrepo.repo.scan(untracked='no').clean is True
+    assert gitrepo.repo.scan(untracked='normal').untracked == ['build/']
+    assert gitrepo.repo.scan(untracked='all').untracked == [
+        'build/one', 'build/two'
+    ]
+    assert gitrepo.repo.status.untracked == ['build/']
+
+    gitrepo.repo.untracked = 'no'
+    assert gitrepo.repo.status.clean is True
+
+    with raises(ValueError):
+        gitrepo.repo.scan(untracked='some')
+
+
+def test_status_submodules(gitrepo, tmpdir):
+    inner = tmpdir.mkdir('inner.git')
+    run(['git', 'init'], cwd=str(inner))
+    inner.join('file').write_text('content', 'utf-8')
+    run(['git', 'add', 'file'], cwd=str(inner))
+    run(['git', 'commit', '-m', 'inner'], cwd=str(inner))
+
+    run([
+        'git', '-c', 'protocol.file.allow=always',
+        'submodule', 'add', str(inner), 'sub'
+    ], cwd=gitrepo.repo.location)
+    gitrepo.commit('submodule')
+    assert gitrepo.repo.status.submodules == []
+
+    gitrepo.write('sub/file', 'changed')
+    gitrepo.write('sub/other', '')
+
+    status = gitrepo.repo.status
+    assert status.submodules == [GitSubmodule(
+        path='sub', commit=False, modified=True, untracked=True
+    )]
+    assert status.modified == ['sub']
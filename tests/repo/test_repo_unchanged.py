@@ -0,0 +1,114 @@
+from subprocess import run
+
+from git_sh_sync.proc import Command
+from git_sh_sync.refs import RefReader
+from git_sh_sync.repo import Repository
+
+
+def synced(tmpdir, gitrepo):
+    gitrepo.write('aaa', 'content')
+    gitrepo.add('aaa')
+    gitrepo.commit('aaa')
+    gitrepo.tag('aaa-tag')
+    gitrepo.make_bare()
+
+    folder = tmpdir.join('repo.git')
+    return Repository(str(folder), remote_url=str(gitrepo.folder))
+
+
+def commit_remote(gitrepo, name):
+    loc = gitrepo.repo.location
+    run(['git', 'config', '--bool', 'core.bare', 'false'], cwd=loc)
+    gitrepo.write(name, 'content')
+    gitrepo.add(name)
+    gitrepo.commit(name)
+    run(['git', 'config', '--bool', 'core.bare', 'true'], cwd=loc)
+
+
+def launched(monkeypatch):
+    cmds = []
+    monkeypatch.setattr(Command, 'recorders', [
+        lambda cmd: cmds.append(cmd.cmd[1])
+    ])
+    return cmds
+
+
+def test_remote_tips(tmpdir, gitrepo):
+    repo = synced(tmpdir, gitrepo)
+    tips = repo.remote_tips()
+    full = repo.log(num=1)[0].full
+
+    assert tips['refs/heads/master'] == full
+    assert tips['refs/tags/aaa-tag'] == full
+    assert repo.remote_tips('missing') is None
+
+    repo.spill = 0
+    assert repo.remote_tips() == tips
+
+
+def test_unchanged_skips(tmpdir, gitrepo, monkeypatch):
+    repo = synced(tmpdir, gitrepo)
+    assert repo.unchanged() is True
+
+    cmds = launched(monkeypatch)
+    assert repo() is True
+    assert 'pull' not in cmds
+    assert 'push' not in cmds
+    assert 'ls-remote' in cmds
+
+    cmds.clear()
+    assert repo(force=True) is True
+    assert 'pull' in cmds
+    assert 'push' in cmds
+
+
+def test_unchanged_local(tmpdir, gitrepo, monkeypatch):
+    repo = synced(tmpdir, gitrepo)
+    tmpdir.join('repo.git', 'bbb').write_text('x', 'utf-8')
+
+    assert repo.unchanged() is False
+
+    cmds = launched(monkeypatch)
+    assert repo() is True
+    assert 'push' in cmds
+    assert repo.unchanged() is True
+
+
+def test_unchanged_remote(tmpdir, gitrepo, monkeypatch):
+    repo = synced(tmpdir, gitrepo)
+    commit_remote(gitrepo, 'bbb')
+
+    assert repo.unchanged() is False
+
+    cmds = launched(monkeypatch)
+    assert repo() is True
+    assert 'pull' in cmds
+    assert tmpdir.join('repo.git', 'bbb').check() is True
+    assert repo.unchanged() is True
+
+
+def test_unchanged_remote_tag(tmpdir, gitrepo):
+    repo = synced(tmpdir, gitrepo)
+    gitrepo.tag('bbb-tag')
+
+    assert repo.unchanged() is False
+    assert repo() is True
+    assert repo.tags == ['bbb-tag', 'aaa-tag']
+    assert repo.unchanged() is True
+
+
+def test_unchanged_other_branch(tmpdir, gitrepo):
+    repo = synced(tmpdir, gitrepo)
+    run(['git', 'checkout', '-b', 'other'], cwd=repo.location)
+
+    assert repo.unchanged() is False
+    assert repo.unchanged(branch_name='other') is False
+
+
+def test_unchanged_refs_unsupported(tmpdir, gitrepo, monkeypatch):
+    repo = synced(tmpdir, gitrepo)
+    monkeypatch.setattr(RefReader, 'folders', property(lambda _: None))
+
+    assert repo.unchanged() is True
+    gitrepo.tag('bbb-tag')
+    assert repo.unchanged() is False
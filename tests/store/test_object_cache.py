@@ -0,0 +1,93 @@
+from os import path
+from subprocess import run
+
+from git_sh_sync.repo import Repository
+from git_sh_sync.store import ObjectCache
+
+
+def alternates(location):
+    name = path.join(location, '.git', 'objects', 'info', 'alternates')
+    if not path.exists(name):
+        return None
+    with open(name, 'r') as handle:
+        return handle.read().strip()
+
+
+def test_cache_init(tmpdir):
+    cache = ObjectCache(str(tmpdir.join('cache')), timeout=5)
+    assert cache.location == str(tmpdir.join('cache'))
+    assert cache.timeout == 5
+    assert cache.mirrors == []
+
+
+def test_cache_mirror_paths(tmpdir):
+    cache = ObjectCache(str(tmpdir))
+    assert cache.mirror('url') == cache.mirror('url')
+    assert cache.mirror('url') != cache.mirror('other')
+    assert cache.mirror('url').startswith(str(tmpdir))
+
+
+def test_cache_ensure(tmpdir, origin):
+    cache = ObjectCache(str(tmpdir.join('cache')))
+    mirror = cache.ensure(str(origin))
+
+    assert mirror == cache.mirror(str(origin))
+    assert cache.ensure(str(origin)) == mirror
+    assert cache.mirrors == [mirror]
+    assert path.isfile(path.join(mirror, 'HEAD'))
+
+    assert cache.ensure(str(tmpdir.join('missing'))) is None
+
+
+def test_cache_refresh(tmpdir, origin):
+    cache = ObjectCache(str(tmpdir.join('cache')))
+    assert cache.refresh(str(origin)) is False
+
+    cache.ensure(str(origin))
+    assert cache.refresh() is True
+    assert cache.refresh(str(origin)) is True
+
+
+def test_cache_clones(tmpdir, origin):
+    cache = ObjectCache(str(tmpdir.join('cache')))
+
+    first = Repository(
+        str(tmpdir.join('first')), remote_url=str(origin),
+        object_cache=cache
+    )
+    second = Repository(
+        str(tmpdir.join('second')), remote_url=str(origin),
+        object_cache=cache
+    )
+    mirror = cache.mirror(str(origin))
+    assert alternates(first.location) == path.join(mirror, 'objects')
+    assert alternates(second.location) == path.join(mirror, 'objects')
+    assert first.read('aaa') == b'content aaa'
+
+
+def test_cache_dissociate(tmpdir, origin):
+    cache = ObjectCache(str(tmpdir.join('cache')))
+    repo = Repository(
+        str(tmpdir.join('repo')), remote_url=str(origin),
+        object_cache=cache, dissociate=True
+    )
+    assert alternates(repo.location) is None
+    assert repo.read('aaa') == b'content aaa'
+
+
+def test_cache_refresh_helps_pull(tmpdir, origin):
+    cache = ObjectCache(str(tmpdir.join('cache')))
+    repo = Repository(
+        str(tmpdir.join('repo')), remote_url=str(origin),
+        object_cache=cache
+    )
+
+    run(['git', 'config', '--bool', 'core.bare', 'false'], cwd=str(origin))
+    origin.join('bbb').write_text('content bbb', 'utf-8')
+    run(['git', 'add', 'bbb'], cwd=str(origin))
+    run(['git', 'commit', '-m', 'second commit'], cwd=str(origin))
+    run(['git', 'config', '--bool', 'core.bare', 'true'], cwd=str(origin))
+
+    assert cache.refresh() is True
+    assert repo.cleanup() is True
+    assert repo.read('bbb') == b'content bbb'
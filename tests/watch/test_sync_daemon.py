@@ -0,0 +1,173 @@
+from collections import namedtuple
+from os import path
+from time import sleep
+
+from git_sh_sync.proc import Command
+from git_sh_sync.repo import Repository
+from git_sh_sync.watch import SyncDaemon, WatchResult
+
+
+class FakeRepo:
+    def __init__(self, location, *, dirty=0):
+        self.location = str(location)
+        self.calls = 0
+        self.dirty = dirty
+
+    def __call__(self):
+        self.calls += 1
+        return True
+
+    def snapshot(self):
+        return namedtuple('Snapshot', ('status',))(
+            status=namedtuple('Status', ('clean',))(
+                clean=self.calls > self.dirty
+            )
+        )
+
+
+class FailingRepo(FakeRepo):
+    def __init__(self, location, *, failures=1, exc=None):
+        super().__init__(location)
+        self.failures = failures
+        self.exc = exc
+
+    def __call__(self):
+        super().__call__()
+        if self.calls > self.failures:
+            return True
+        if self.exc is not None:
+            raise self.exc
+        return False
+
+
+class EditingRepo(Repository):
+    def __call__(self, *args, **kwargs):
+        res = super().__call__(*args, **kwargs)
+        folder = path.join(self.location, 'ccc')
+        if not path.exists(folder):
+            with open(folder, 'w') as handle:
+                handle.write('content')
+        return res
+
+
+def wait_for(func, timeout=5):
+    for _ in range(int(timeout / 0.01)):
+        if func():
+            return True
+        sleep(0.01)
+    return False
+
+
+def test_daemon_init(tmpdir):
+    repo = FakeRepo(tmpdir)
+    daemon = SyncDaemon([repo, str(tmpdir)], debounce=0.5)
+    assert daemon.repos[0] is repo
+    assert isinstance(daemon.repos[1], Repository)
+    assert daemon.debounce == 0.5
+    assert daemon.running is False
+    assert daemon.results == []
+
+
+def test_daemon_debounce(tmpdir):
+    repo = FakeRepo(tmpdir)
+    with SyncDaemon([repo], debounce=0.2, interval=0.05) as daemon:
+        assert daemon.running is True
+        assert daemon.start() is False
+        for num in range(5):
+            tmpdir.join('file_{}'.format(num)).write_text('x', 'utf-8')
+            sleep(0.02)
+        assert wait_for(lambda: daemon.results)
+        sleep(0.3)
+    assert daemon.running is False
+
+    assert repo.calls == 1
+    res, = daemon.results
+    assert isinstance(res, WatchResult)
+    assert res.location == repo.location
+    assert res.events >= 5
+    assert res.success is True
+
+
+def test_daemon_max_delay(tmpdir):
+    repo = FakeRepo(tmpdir)
+    with SyncDaemon(
+            [repo], debounce=0.2, max_delay=0.2, interval=0.05, poll=True
+    ) as daemon:
+        for num in range(20):
+            tmpdir.join('file').write_text(str(num), 'utf-8')
+            sleep(0.05)
+        assert wait_for(lambda: len(daemon.results) >= 2)
+
+
+def test_daemon_syncs_repository(tmpdir, origin):
+    folder = tmpdir.join('repo.git')
+    repo = Repository(str(folder), remote_url=str(origin))
+
+    with SyncDaemon([repo], debounce=0.2, interval=0.05) as daemon:
+        folder.join('bbb').write_text('content', 'utf-8')
+        assert wait_for(lambda: daemon.results)
+
+    assert daemon.results[0].success is True
+    assert repo.status.clean is True
+
+
+def test_daemon_dirty_after_sync(tmpdir):
+    repo = FakeRepo(tmpdir, dirty=1)
+    with SyncDaemon([repo], debounce=0.1, interval=0.05) as daemon:
+        tmpdir.join('file').write_text('x', 'utf-8')
+        assert wait_for(lambda: len(daemon.results) >= 2)
+        sleep(0.3)
+
+    assert repo.calls == 2
+
+
+def test_daemon_edit_while_syncing(tmpdir, origin):
+    folder = tmpdir.join('repo.git')
+    repo = EditingRepo(str(folder), remote_url=str(origin))
+
+    with SyncDaemon([repo], debounce=0.2, interval=0.05) as daemon:
+        folder.join('bbb').write_text('content', 'utf-8')
+        assert wait_for(lambda: len(daemon.results) >= 2)
+
+    assert all(res.success for res in daemon.results)
+    assert repo.status.clean is True
+    assert Command(['git', 'cat-file', '-e', 'master:ccc'], cwd=str(origin))()
+
+
+def test_daemon_retry(tmpdir):
+    repo = FailingRepo(tmpdir, failures=2)
+    with SyncDaemon([repo], debounce=0.05, interval=0.05) as daemon:
+        tmpdir.join('file').write_text('x', 'utf-8')
+        assert wait_for(lambda: len(daemon.results) >= 3)
+        sleep(0.3)
+
+    assert repo.calls == 3
+    assert [res.success for res in daemon.results] == [False, False, True]
+    assert all(res.events >= 1 for res in daemon.results)
+
+
+def test_daemon_retry_backoff(tmpdir, caplog):
+    repo = FailingRepo(tmpdir, failures=10)
+    with SyncDaemon(
+            [repo], debounce=0.05, interval=0.05, backoff=0.15
+    ) as daemon:
+        tmpdir.join('file').write_text('x', 'utf-8')
+        assert wait_for(lambda: len(daemon.results) >= 4)
+
+    assert [
+        rec.getMessage().split(' in ')[-1] for rec in caplog.records
+        if rec.getMessage().startswith('retrying')
+    ][:4] == [
+        '0.05 seconds', '0.10 seconds', '0.15 seconds', '0.15 seconds'
+    ]
+
+
+def test_daemon_exception(tmpdir, caplog):
+    repo = FailingRepo(tmpdir, exc=RuntimeError('boom'))
+    with SyncDaemon([repo], debounce=0.05, interval=0.05) as daemon:
+        tmpdir.join('file').write_text('x', 'utf-8')
+        assert wait_for(lambda: len(daemon.results) >= 2)
+        assert daemon.running is True
+
+    assert [res.success for res in daemon.results[:2]] == [False, True]
+    assert 'boom' in caplog.text
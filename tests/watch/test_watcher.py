@@ -0,0 +1,66 @@
+from pytest import mark
+
+from git_sh_sync.watch import InotifyWatcher, PollWatcher, watcher
+
+
+@mark.parametrize('make', [
+    InotifyWatcher, lambda loc: PollWatcher(loc, interval=0.01)
+])
+def test_watcher_quiet(tmpdir, make):
+    watch = make(str(tmpdir))
+    assert watch.wait(0.05) == 0
+    watch.close()
+
+
+@mark.parametrize('make', [
+    InotifyWatcher, lambda loc: PollWatcher(loc, interval=0.01)
+])
+def test_watcher_changes(tmpdir, make):
+    tmpdir.join('aaa').write_text('content', 'utf-8')
+    watch = make(str(tmpdir))
+
+    tmpdir.join('aaa').write_text('changed content', 'utf-8')
+    assert watch.wait(1) > 0
+    assert watch.wait(0.05) == 0
+
+    tmpdir.mkdir('folder')
+    assert watch.wait(1) > 0
+    watch.wait(0.05)
+    tmpdir.join('folder', 'bbb').write_text('content', 'utf-8')
+    assert watch.wait(1) > 0
+
+    tmpdir.join('aaa').remove()
+    assert watch.wait(1) > 0
+    watch.close()
+
+
+@mark.parametrize('make', [
+    InotifyWatcher, lambda loc: PollWatcher(loc, interval=0.01)
+])
+def test_watcher_ignores_git(tmpdir, make):
+    tmpdir.mkdir('.git')
+    watch = make(str(tmpdir))
+
+    tmpdir.join('.git', 'index').write_text('content', 'utf-8')
+    assert watch.wait(0.05) == 0
+    watch.close()
+
+
+def test_watcher_choice(tmpdir):
+    assert isinstance(watcher(str(tmpdir)), InotifyWatcher)
+    assert isinstance(watcher(str(tmpdir), poll=True), PollWatcher)
+
+
+def test_watcher_removed_folder(tmpdir):
+    watch = InotifyWatcher(str(tmpdir))
+    folder = tmpdir.join('sub')
+    folder.mkdir()
+    assert watch.wait(1) >= 1
+    assert str(folder) in watch._watches.values()
+
+    folder.remove()
+    assert watch.wait(1) >= 1
+    watch.wait(0.1)
+    assert str(folder) not in watch._watches.values()
+    assert list(watch._watches.values()) == [str(tmpdir)]
+    watch.close()